@@ -4,12 +4,20 @@ API версия агентной системы для технических 
 """
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Dict, Optional, Any, List
 import uuid
+import json
 from datetime import datetime
 from ml_system.interview.interview_system import InterviewSystem
-from ml_system.job_matching import FlexibleResumeMatcher
+from ml_system.interview.src.config import InterviewConfig
+from ml_system.encoders import configure_torch_threads, get_shared_embeddings
+from ml_system.job_matching import MatcherCache, batch_result_details, llm_model_name, score_resumes_batch
+from ml_system.match_cache import MatchResultCache
+from ml_system.resume_features import SkillVocabulary, extract_resume_features, features_cover
+from ml_system.skill_matcher import DEFAULT_SKILL_SYNONYMS
 from langchain_core.messages import HumanMessage, AIMessage
 import os
 from dotenv import load_dotenv
@@ -24,9 +32,13 @@ try:
     client = MongoClient(mongo_uri)
     db = client.aihr_database
     vacancies_collection = db.vacancies
+    skill_vocabulary = SkillVocabulary(collection=db.skill_vocabulary)
+    match_result_cache = MatchResultCache(collection=db.match_results_cache)
 
     print("MongoDB подключена успешно!")
 except Exception as e:
+    skill_vocabulary = SkillVocabulary()
+    match_result_cache = MatchResultCache()
     print(f"Ошибка подключения к MongoDB: {e}")
 
 # Модели данных для API
@@ -72,14 +84,39 @@ class ResumeMatchRequest(BaseModel):
     education_required: Optional[str] = None
     weights: Optional[Dict[str, float]] = None
     vacancy_id: Optional[str] = None
+    resume_features: Optional[Dict[str, Any]] = None
 
 class ResumeMatchResponse(BaseModel):
     total_score_percent: int
     details: Dict[str, Any]
+    # Пересчитанные признаки резюме (если переданные устарели) — для сохранения на стороне backend
+    resume_features: Optional[Dict[str, Any]] = None
+
+class ResumeFeaturesRequest(BaseModel):
+    resume: str
+
+class ResumeItem(BaseModel):
+    id: str
+    resume: str
+    features: Optional[Dict[str, Any]] = None
+
+class ResumeBatchMatchRequest(BaseModel):
+    # Режим 1: одно резюме против списка вакансий
+    resume: Optional[str] = None
+    vacancy_ids: Optional[List[str]] = None
+    # Режим 2: одна вакансия против списка резюме
+    vacancy_id: Optional[str] = None
+    resumes: Optional[List[ResumeItem]] = None
+    resume_features: Optional[Dict[str, Any]] = None
+    weights: Optional[Dict[str, float]] = None
+    top_k: Optional[int] = Field(default=None, ge=1)
 
 # Глобальное хранилище активных интервью
 active_interviews: Dict[str, Dict] = {}
 
+# Кеш скомпилированных матчеров вакансий (переиспользуются между запросами)
+matcher_cache = MatcherCache()
+
 class APIInterviewSystem:
     """API версия системы интервью"""
     
@@ -388,9 +425,32 @@ async def startup_event():
     api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
     if not api_key:
         raise RuntimeError("OPENROUTER_API_KEY не задан. Установите переменную окружения с вашим OpenRouter API ключом.")
+
+    # Энкодер эмбеддингов (загрузка, экспорт ONNX, прогрев) готовится при старте, а не в первом запросе
+    encoder_config = InterviewConfig()
+    if encoder_config.encoder_backend == "torch":
+        # Потоки PyTorch общие для процесса (включая модель семантического поиска навыков)
+        configure_torch_threads(encoder_config.encoder_threads)
+    await run_in_threadpool(
+        get_shared_embeddings,
+        backend=encoder_config.encoder_backend,
+        intra_op_threads=encoder_config.encoder_threads,
+        quantized=encoder_config.encoder_quantized,
+    )
+    print(f"✅ Encoder warmed up ({encoder_config.encoder_backend})")
+
     api_system = APIInterviewSystem(api_key)
     print("✅ API Interview System initialized")
 
+    # Словарь навыков: синонимы по умолчанию и навыки всех вакансий
+    try:
+        vacancy_skills = vacancies_collection.distinct('required_skills') + vacancies_collection.distinct('optional_skills')
+    except Exception as e:
+        print(f"⚠️ Не удалось загрузить навыки вакансий: {e}")
+        vacancy_skills = []
+    skill_vocabulary.extend(list(DEFAULT_SKILL_SYNONYMS) + vacancy_skills)
+    print(f"✅ Skill vocabulary ready: {len(skill_vocabulary)} skills")
+
 # API Endpoints
 
 @app.post("/interviews", response_model=InterviewResponse)
@@ -497,6 +557,19 @@ async def get_next_question(interview_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _ensure_features(resume_text: str, features: Optional[Dict[str, Any]], skills: List[str]):
+    """Возвращает (признаки, пересчитаны ли): переданные признаки, если они покрывают навыки, иначе новые."""
+    skill_vocabulary.extend(skills)
+    if features_cover(features, skill_vocabulary, skills):
+        return features, False
+    return extract_resume_features(resume_text, skill_vocabulary), True
+
+@app.post("/resume-features")
+async def resume_features(request: ResumeFeaturesRequest):
+    """Извлекает признаки резюме (маска навыков, стаж, образование) для хранения в профиле."""
+    features = await run_in_threadpool(extract_resume_features, request.resume or "", skill_vocabulary)
+    return features
+
 @app.post("/resume-match", response_model=ResumeMatchResponse)
 async def match_resume(request: ResumeMatchRequest):
     try:
@@ -515,36 +588,30 @@ async def match_resume(request: ResumeMatchRequest):
         if vacancy is None:
             raise HTTPException(status_code=404, detail="Вакансия не найдена")
 
-        # Безопасные значения по умолчанию
-        required_skills = vacancy.get('required_skills') or []
-        optional_skills = vacancy.get('optional_skills') or []
-        try:
-            min_experience = float(vacancy.get('min_experience', 0))
-            max_experience = float(vacancy.get('max_experience', 100))
-        except Exception:
-            min_experience, max_experience = 0.0, 100.0
-        education_required = vacancy.get('education_required', '') or ' '
-
-        matcher = FlexibleResumeMatcher(
-            required_skills=required_skills,
-            optional_skills=optional_skills,
-            min_experience=min_experience,
-            max_experience=max_experience,
-            education_required=education_required,
-            weights={
-                "required_skills": 0.5,
-                "optional_skills": 0.15,
-                "experience": 0.25,
-                "education": 0.1
-            }
-        )
+        matcher = matcher_cache.get(vacancy, request.weights)
 
         resume_text = request.resume or ""
         if not isinstance(resume_text, str):
             resume_text = str(resume_text)
 
-        result = matcher.evaluate(resume_text)
-        return ResumeMatchResponse(**result)
+        # Дополнение словаря навыков может обращаться к MongoDB — вне цикла событий
+        resume_features, refreshed = await run_in_threadpool(
+            _ensure_features, resume_text, request.resume_features, matcher.required_skills + matcher.optional_skills
+        )
+
+        cache_key = MatchResultCache.make_key(resume_text, vacancy, request.weights, llm_model_name())
+        result = await run_in_threadpool(match_result_cache.get, cache_key)
+        if result is None:
+            result = await matcher.aevaluate(resume_text, resume_features, skill_vocabulary)
+            # Кешируем только ответы LLM: эвристика дешёвая, а резервный результат при сбое LLM не должен закрепляться
+            if result.get("scored_by") == "llm":
+                await run_in_threadpool(match_result_cache.put, cache_key, vacancy_id, result)
+
+        return ResumeMatchResponse(
+            total_score_percent=result["total_score_percent"],
+            details=result["details"],
+            resume_features=resume_features if refreshed else None,
+        )
         
     except Exception as e:
         # Если это уже HTTPException - пробрасываем как есть
@@ -552,6 +619,78 @@ async def match_resume(request: ResumeMatchRequest):
             raise
         raise HTTPException(status_code=500, detail=f"Error matching resume: {str(e)}")
 
+@app.delete("/resume-match/cache/{vacancy_id}")
+async def invalidate_match_cache(vacancy_id: str):
+    """Удаляет кешированные результаты оценки резюме для вакансии (вызывается при её изменении)."""
+    matcher_cache.invalidate(vacancy_id)
+    removed = await run_in_threadpool(match_result_cache.invalidate_vacancy, vacancy_id)
+    return {"vacancy_id": vacancy_id, "removed": removed}
+
+@app.post("/resume-match/batch")
+async def match_resume_batch(request: ResumeBatchMatchRequest):
+    """Пакетная оценка: одно резюме против многих вакансий или одна вакансия против многих резюме.
+
+    Вакансии загружаются одним запросом, матчеры берутся из кеша, эвристическая
+    оценка всех пар считается векторно по предвычисленным признакам резюме
+    (переданным или извлечённым на лету); вакансии с семантическим поиском
+    навыков оцениваются по тексту, как в /resume-match. Ответ — поток NDJSON,
+    отсортированный по убыванию оценки.
+    """
+    if request.resume is not None and request.vacancy_ids:
+        vacancy_ids = list(dict.fromkeys(request.vacancy_ids))
+        resume_ids = [None]
+        resume_texts = [request.resume]
+        resume_features = [request.resume_features]
+    elif request.vacancy_id and request.resumes:
+        vacancy_ids = [request.vacancy_id]
+        resume_ids = [item.id for item in request.resumes]
+        resume_texts = [item.resume for item in request.resumes]
+        resume_features = [item.features for item in request.resumes]
+    else:
+        raise HTTPException(status_code=400, detail="Передайте resume + vacancy_ids или vacancy_id + resumes")
+
+    try:
+        oids = [ObjectId(vacancy_id) for vacancy_id in vacancy_ids]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Некорректный ID вакансии")
+
+    vacancies = await run_in_threadpool(lambda: list(vacancies_collection.find({'_id': {'$in': oids}})))
+    if not vacancies:
+        raise HTTPException(status_code=404, detail="Вакансии не найдены")
+    found_ids = {str(vacancy['_id']) for vacancy in vacancies}
+    missing_ids = [vacancy_id for vacancy_id in vacancy_ids if vacancy_id not in found_ids]
+
+    matchers = [matcher_cache.get(vacancy, request.weights) for vacancy in vacancies]
+    skills = [skill for matcher in matchers for skill in matcher.required_skills + matcher.optional_skills]
+
+    def score():
+        # Текст разбирается только для резюме без актуальных признаков
+        features = [_ensure_features(text, item, skills)[0] for text, item in zip(resume_texts, resume_features)]
+        return score_resumes_batch(matchers, resume_texts, features, skill_vocabulary)
+
+    batch = await run_in_threadpool(score)
+
+    totals = batch["total"]
+    order = sorted(
+        ((v, r) for v in range(totals.shape[0]) for r in range(totals.shape[1])),
+        key=lambda pair: totals[pair[0], pair[1]],
+        reverse=True,
+    )
+    if request.top_k is not None:
+        order = order[:request.top_k]
+
+    def stream():
+        for rank, (v, r) in enumerate(order, start=1):
+            item = batch_result_details(batch, matchers[v], v, r)
+            item.update({"rank": rank, "vacancy_id": str(vacancies[v]['_id'])})
+            if resume_ids[r] is not None:
+                item["resume_id"] = resume_ids[r]
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+        for vacancy_id in missing_ids:
+            yield json.dumps({"vacancy_id": vacancy_id, "error": "Вакансия не найдена"}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 
 
 @app.get("/")
@@ -565,7 +704,10 @@ async def root():
             "submit_answer": "POST /interviews/{interview_id}/answer",
             "get_status": "GET /interviews/{interview_id}/status",
             "get_next_question": "GET /interviews/{interview_id}/next-question",
-            "match_resume": "POST /resume-match"
+            "match_resume": "POST /resume-match",
+            "match_resume_batch": "POST /resume-match/batch",
+            "resume_features": "POST /resume-features",
+            "invalidate_match_cache": "DELETE /resume-match/cache/{vacancy_id}"
         }
     }
 
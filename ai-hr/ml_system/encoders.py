@@ -0,0 +1,342 @@
+"""Бэкенды энкодера эмбеддингов для базы знаний интервью.
+
+Поддерживаются два варианта:
+  * "torch" — `HuggingFaceEmbeddings` (sentence-transformers поверх PyTorch);
+  * "onnx"  — экспортированная ONNX-модель (опционально int8-квантованная),
+    исполняемая ONNX Runtime на CPU с настраиваемым числом потоков.
+
+Оба бэкенда реализуют интерфейс LangChain `Embeddings`
+(`embed_documents` / `embed_query`) и возвращают L2-нормированные векторы.
+
+Число потоков ONNX Runtime задаётся для сессии энкодера. Число intra-op
+потоков PyTorch — настройка всего процесса (влияет и на другие torch-модели,
+например на семантический поиск навыков), поэтому оно не меняется при
+создании энкодера и задаётся явно через `configure_torch_threads`.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKENDS = ("torch", "onnx")
+DEFAULT_ONNX_DIR = os.getenv("AI_HR_ONNX_DIR", "./onnx_models")
+
+_shared_encoders: Dict[Tuple, Embeddings] = {}
+_shared_encoders_lock = threading.Lock()
+
+
+def _model_dir(model_name: str, base_dir: str) -> str:
+    return os.path.join(base_dir, model_name.replace("/", "__"))
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = False) -> str:
+    """Экспортирует трансформер HuggingFace в ONNX и сохраняет токенизатор рядом.
+
+    Args:
+        model_name: Имя модели HuggingFace.
+        output_dir: Каталог для `model.onnx` (и `model_int8.onnx`) и токенизатора.
+        quantize: Дополнительно выполнить динамическую int8-квантизацию весов.
+
+    Returns:
+        Путь к итоговому ONNX-файлу (квантованному, если `quantize=True`).
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, "model.onnx")
+
+    if not os.path.exists(model_path):
+        logger.info(f"Экспорт модели {model_name} в ONNX: {model_path}")
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name)
+        model.eval()
+
+        sample = tokenizer(["пример текста"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                model_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+        tokenizer.save_pretrained(output_dir)
+
+    if not quantize:
+        return model_path
+
+    quantized_path = os.path.join(output_dir, "model_int8.onnx")
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Int8-квантизация ONNX-модели: {quantized_path}")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Энкодер sentence-transformers, исполняемый ONNX Runtime.
+
+    Повторяет пайплайн sentence-transformers для MiniLM: токенизация,
+    mean pooling по маске внимания и L2-нормализация.
+
+    Attributes:
+        batch_size: Размер батча при кодировании документов.
+        max_length: Максимальная длина последовательности в токенах.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        model_dir: Optional[str] = None,
+        quantized: bool = False,
+        intra_op_threads: Optional[int] = None,
+        batch_size: int = 32,
+        max_length: int = 256,
+        warmup: bool = True,
+    ) -> None:
+        """Загружает (при необходимости экспортирует) ONNX-модель и создаёт сессию.
+
+        Args:
+            model_name: Имя исходной модели HuggingFace.
+            model_dir: Каталог с экспортированной моделью (по умолчанию внутри `AI_HR_ONNX_DIR`).
+            quantized: Использовать int8-квантованную модель.
+            intra_op_threads: Число потоков внутри оператора (None — по умолчанию ORT).
+            batch_size: Размер батча при кодировании документов.
+            max_length: Максимальная длина последовательности в токенах.
+            warmup: Выполнить прогревочный прогон сразу после загрузки.
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("onnxruntime не установлен. Для ONNX-энкодера выполните: pip install onnxruntime") from e
+        from transformers import AutoTokenizer
+
+        start = time.perf_counter()
+        model_dir = model_dir or _model_dir(model_name, DEFAULT_ONNX_DIR)
+        model_path = export_onnx_model(model_name, model_dir, quantize=quantized)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.load_seconds = time.perf_counter() - start
+        logger.info(f"ONNX-энкодер загружен за {self.load_seconds:.2f}с ({os.path.basename(model_path)})")
+
+        if warmup:
+            self.warmup()
+
+    def warmup(self) -> float:
+        """Прогоняет короткий батч, чтобы инициализировать ядра ORT до первого запроса.
+
+        Returns:
+            Длительность прогрева в секундах.
+        """
+        start = time.perf_counter()
+        self._encode(["прогрев энкодера"] * min(self.batch_size, 8))
+        elapsed = time.perf_counter() - start
+        logger.info(f"Прогрев ONNX-энкодера: {elapsed:.2f}с")
+        return elapsed
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        batches: List[np.ndarray] = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+            if "token_type_ids" in self._input_names and "token_type_ids" not in feeds:
+                feeds["token_type_ids"] = np.zeros_like(encoded["input_ids"], dtype=np.int64)
+
+            hidden = self.session.run(None, feeds)[0]
+            mask = encoded["attention_mask"].astype(np.float32)[..., None]
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(batches)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Кодирует список документов."""
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Кодирует текст запроса."""
+        return self._encode([text])[0].tolist()
+
+
+def configure_torch_threads(threads: Optional[int]) -> None:
+    """Задаёт число intra-op потоков PyTorch для всего процесса.
+
+    Действует на все torch-модели процесса, поэтому вызывается явно при
+    старте сервиса и только если число потоков настроено.
+
+    Args:
+        threads: Число потоков (None — оставить значение PyTorch по умолчанию).
+    """
+    if not threads:
+        return
+    import torch
+
+    previous = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    logger.info(f"PyTorch intra-op потоки для всего процесса: {previous} -> {threads}")
+
+
+def build_embeddings(
+    backend: str = "torch",
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    intra_op_threads: Optional[int] = None,
+    quantized: bool = False,
+    batch_size: int = 32,
+) -> Embeddings:
+    """Создаёт энкодер эмбеддингов выбранного бэкенда.
+
+    Args:
+        backend: "torch" или "onnx".
+        model_name: Имя модели HuggingFace.
+        intra_op_threads: Число потоков ONNX Runtime (только для "onnx"; потоки PyTorch
+            задаются для процесса через `configure_torch_threads`).
+        quantized: Использовать int8-квантованную ONNX-модель (только для "onnx").
+        batch_size: Размер батча при кодировании документов.
+
+    Returns:
+        Экземпляр LangChain `Embeddings`.
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд энкодера: {backend}. Допустимо: {', '.join(ENCODER_BACKENDS)}")
+
+    if backend == "onnx":
+        return OnnxEmbeddings(
+            model_name=model_name,
+            quantized=quantized,
+            intra_op_threads=intra_op_threads,
+            batch_size=batch_size,
+            warmup=False,
+        )
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={
+            'device': 'cpu',
+            'model_kwargs': {
+                'trust_remote_code': True
+            }
+        },
+        encode_kwargs={
+            'normalize_embeddings': True,
+            'batch_size': batch_size
+        },
+        show_progress=False
+    )
+
+
+def get_shared_embeddings(
+    backend: str = "torch",
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    intra_op_threads: Optional[int] = None,
+    quantized: bool = False,
+    warmup: bool = True,
+) -> Embeddings:
+    """Возвращает энкодер, общий для процесса (модель загружается и прогревается один раз).
+
+    Каждое интервью создаёт собственную `InterviewKnowledgeSystemHF`, поэтому
+    без общего экземпляра модель загружалась бы заново на каждое интервью.
+
+    Args:
+        backend: "torch" или "onnx".
+        model_name: Имя модели HuggingFace.
+        intra_op_threads: Число потоков ONNX Runtime (см. `build_embeddings`).
+        quantized: Использовать int8-квантованную ONNX-модель.
+        warmup: Выполнить прогревочный прогон при первой загрузке.
+
+    Returns:
+        Экземпляр LangChain `Embeddings`.
+    """
+    key = (backend, model_name, intra_op_threads, quantized)
+    with _shared_encoders_lock:
+        encoder = _shared_encoders.get(key)
+        if encoder is not None:
+            return encoder
+
+        start = time.perf_counter()
+        encoder = build_embeddings(backend, model_name, intra_op_threads=intra_op_threads, quantized=quantized)
+        if warmup:
+            encoder.embed_query("прогрев энкодера")
+        logger.info(f"Энкодер '{backend}' ({model_name}) готов за {time.perf_counter() - start:.2f}с (холодный старт)")
+        _shared_encoders[key] = encoder
+        return encoder
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Сравнение бэкендов энкодера: скорость, холодный старт, паритет эмбеддингов")
+    parser.add_argument("--bank", default=os.path.join(os.path.dirname(__file__), "..", "data", "junior_ml_interview_questions_ru.json"))
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        texts = [f"Секция: {item['section']}\nВопрос: {item['question']}" for item in json.load(f)]
+
+    configure_torch_threads(args.threads)
+    report = {"texts": len(texts), "threads": args.threads, "backends": {}}
+    reference: Optional[np.ndarray] = None
+    for name, kwargs in (("torch", {}), ("onnx", {}), ("onnx_int8", {"quantized": True})):
+        backend = "torch" if name == "torch" else "onnx"
+        start = time.perf_counter()
+        encoder = build_embeddings(backend, intra_op_threads=args.threads, **kwargs)
+        encoder.embed_query("прогрев")
+        cold_start = time.perf_counter() - start
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            vectors = np.asarray(encoder.embed_documents(texts), dtype=np.float32)
+            timings.append(time.perf_counter() - start)
+
+        entry = {
+            "cold_start_s": round(cold_start, 3),
+            "texts_per_s": round(len(texts) / min(timings), 1),
+        }
+        if reference is None:
+            reference = vectors
+        else:
+            cosine = (reference * vectors).sum(axis=1)
+            entry["parity_cosine_mean"] = round(float(cosine.mean()), 5)
+            entry["parity_cosine_min"] = round(float(cosine.min()), 5)
+        report["backends"][name] = entry
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
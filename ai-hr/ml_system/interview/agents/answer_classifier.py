@@ -0,0 +1,146 @@
+import logging
+import re
+from typing import Any, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Формулировки отказа от ответа. Срабатывают, только если кроме них в ответе
+# нет содержательных слов: "не знаю точно, наверное градиентный спуск" идет в LLM.
+UNKNOWN_MARKERS = (
+    "не знаю", "незнаю", "не помню", "без понятия", "понятия не имею", "не в курсе",
+    "затрудняюсь", "не могу ответить", "не могу сказать", "не сталкивался", "не сталкивалась",
+    "не работал с этим", "не работала с этим", "нет идей", "не подскажу", "пропущу",
+    "пропустим", "следующий вопрос", "давайте дальше", "хз",
+    "i don't know", "i dont know", "no idea",
+)
+
+# Ответы-заполнители без содержания (учитываются, только если весь ответ из них состоит).
+# "Да"/"нет" сюда не входят: это содержательный ответ на закрытый вопрос.
+FILLER_ANSWERS = frozenset({
+    "ок", "окей", "ну", "хм", "эм", "ээ", "мм", "угу", "ага", "-", "?", "...", "не", "ok",
+})
+
+# Слова, которые сопровождают маркер отказа, не добавляя содержания ("честно говоря, я не знаю").
+MARKER_PADDING = FILLER_ANSWERS | frozenset({
+    "да", "нет", "я", "честно", "говоря", "к", "сожалению", "увы", "пока", "точно", "совсем", "вообще",
+    "наверное", "пожалуй", "извините", "простите", "тут", "здесь", "с", "на", "этим", "этого", "этом",
+    "это", "этот", "такого", "вопрос", "вопроса", "ответ", "ответа", "сразу", "уже", "так", "даже",
+    "и", "а", "sorry",
+})
+
+# Примеры отказов для семантического сравнения (опционально, при наличии энкодера).
+UNKNOWN_EXAMPLES = (
+    "Я не знаю ответа на этот вопрос",
+    "Честно говоря, не сталкивался с этим",
+    "Не могу ответить, давайте следующий вопрос",
+    "Понятия не имею, как это работает",
+    "Затрудняюсь ответить",
+    "Я этого не изучал",
+)
+
+_PUNCT_RE = re.compile(r"[^\w\s'+#-]+")
+_MARKERS_LONGEST_FIRST = sorted(UNKNOWN_MARKERS, key=len, reverse=True)
+
+
+def _normalize(answer: str) -> str:
+    return " ".join(_PUNCT_RE.sub(" ", answer.lower().replace("ё", "е")).split())
+
+
+class UnknownAnswerClassifier:
+    """
+    Дешёвый локальный классификатор ответов "не знаю" перед LLM-оценщиком.
+
+    Проверки по возрастанию стоимости: пустой ответ, ответ из заполнителей,
+    короткий ответ, в котором кроме маркера отказа нет содержательных слов, и
+    (если передан энкодер) косинусное сходство с примерами отказов.
+
+    Attributes:
+        max_words: Максимальная длина (в словах) ответа, который может быть отказом.
+        similarity_threshold: Порог сходства с примерами отказов.
+    """
+
+    def __init__(self, embeddings: Any = None, max_words: int = 8, similarity_threshold: float = 0.85) -> None:
+        """
+        Args:
+            embeddings: Энкодер LangChain `Embeddings` для семантической проверки (опционально).
+            max_words: Максимальная длина ответа-отказа в словах.
+            similarity_threshold: Порог косинусного сходства с примерами отказов.
+        """
+        self.embeddings = embeddings
+        self.max_words = max_words
+        self.similarity_threshold = similarity_threshold
+        self._examples: Optional[np.ndarray] = None
+
+    def _example_matrix(self) -> np.ndarray:
+        if self._examples is None:
+            matrix = np.asarray(self.embeddings.embed_documents(list(UNKNOWN_EXAMPLES)), dtype=np.float32)
+            self._examples = matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+        return self._examples
+
+    def classify(self, answer: str) -> Optional[str]:
+        """Определяет, является ли ответ отказом от ответа.
+
+        Args:
+            answer: Ответ кандидата.
+
+        Returns:
+            Причина ("empty", "filler", "unknown_marker", "similar_to_unknown")
+            или None, если ответ нужно оценивать LLM.
+        """
+        text = _normalize(answer or "")
+        if not text:
+            return "empty"
+        words = text.split()
+        if all(word in FILLER_ANSWERS for word in words):
+            return "filler"
+        if len(words) > self.max_words:
+            return None
+        padded = f" {text} "
+        stripped = padded
+        for marker in _MARKERS_LONGEST_FIRST:
+            stripped = stripped.replace(f" {marker} ", " ")
+        if stripped != padded and all(word in MARKER_PADDING for word in stripped.split()):
+            return "unknown_marker"
+        if self.embeddings is not None:
+            try:
+                vector = np.asarray(self.embeddings.embed_query(answer), dtype=np.float32)
+                vector /= max(float(np.linalg.norm(vector)), 1e-12)
+                if float((self._example_matrix() @ vector).max()) >= self.similarity_threshold:
+                    return "similar_to_unknown"
+            except Exception as e:
+                logger.warning(f"Семантическая проверка ответа недоступна: {e}")
+        return None
+
+
+def unknown_answer_scores() -> dict:
+    """Детальные оценки (0..10) для ответа-отказа."""
+    return {
+        "technical_accuracy": 0,
+        "depth_of_knowledge": 0,
+        "practical_experience": 0,
+        "communication_clarity": 2,
+        "problem_solving_approach": 0,
+        "examples_and_use_cases": 0,
+    }
+
+
+def unknown_answer_analysis(reason: str) -> dict:
+    """Анализ для ответа-отказа; red_flags распознаются контроллером как "не знает"."""
+    return {
+        "inconsistencies": [],
+        "red_flags": ["Кандидат не знает ответа на вопрос"],
+        "strengths": [],
+        "weaknesses": ["Нет ответа по существу"],
+        "follow_up_suggestions": ["Дать направляющую подсказку"],
+        "fast_path": reason,
+    }
+
+
+__all__: List[str] = [
+    "UNKNOWN_MARKERS",
+    "UnknownAnswerClassifier",
+    "unknown_answer_analysis",
+    "unknown_answer_scores",
+]
@@ -1,20 +1,56 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from ..src.prompts import evaluator_prompt
 from ..src.utils import parse_llm_json, safe_truncate
+from .answer_classifier import UnknownAnswerClassifier, unknown_answer_analysis, unknown_answer_scores
 
 logger = logging.getLogger(__name__)
 
+SCORE_WEIGHTS = {
+    "technical_accuracy": 0.25,
+    "depth_of_knowledge": 0.20,
+    "practical_experience": 0.20,
+    "communication_clarity": 0.15,
+    "problem_solving": 0.10,
+    "examples_quality": 0.10,
+}
+
+
+def _score_percent(tech: int, depth: int, practical: int, comm: int, problem: int, examples: int) -> float:
+    return (
+        tech * 10 * SCORE_WEIGHTS["technical_accuracy"]
+        + depth * 10 * SCORE_WEIGHTS["depth_of_knowledge"]
+        + practical * 10 * SCORE_WEIGHTS["practical_experience"]
+        + comm * 10 * SCORE_WEIGHTS["communication_clarity"]
+        + problem * 10 * SCORE_WEIGHTS["problem_solving"]
+        + examples * 10 * SCORE_WEIGHTS["examples_quality"]
+    )
+
+
+def evaluate_answer(
+    state: Dict[str, Any],
+    *,
+    llm: Any,
+    alignment: str,
+    classifier: Optional[UnknownAnswerClassifier] = None,
+) -> Dict[str, Any]:
+    """Оценщик ответов: возвращает {"answer_evaluations": [...]} (добавляет новую оценку).
 
-def evaluate_answer(state: Dict[str, Any], *, llm: Any, alignment: str) -> Dict[str, Any]:
-    """Оценщик ответов: возвращает {"answer_evaluations": [...]} (добавляет новую оценку)."""
+    Если передан `classifier` и ответ распознан как "не знаю", LLM не вызывается:
+    оценка формируется локально, и контроллер переходит к подсказке.
+    """
     logger.debug("--- Агент: Оценщик ответов ---")
 
     current_question = state.get("current_question", {})
     question = current_question.get("content", "")
     answer = state.get("last_candidate_answer", "")
 
+    if classifier is not None:
+        reason = classifier.classify(answer)
+        if reason is not None:
+            return _unknown_answer_evaluation(state, question, answer, reason)
+
     prompt = evaluator_prompt()
     try:
         chain = prompt | llm
@@ -45,22 +81,8 @@ def evaluate_answer(state: Dict[str, Any], *, llm: Any, alignment: str) -> Dict[
         logger.exception(f"Ошибка парсинга JSON из ответа LLM: {e}")
         return _fallback_evaluation(state, question, answer)
 
-    weights = {
-        "technical_accuracy": 0.25,
-        "depth_of_knowledge": 0.20,
-        "practical_experience": 0.20,
-        "communication_clarity": 0.15,
-        "problem_solving": 0.10,
-        "examples_quality": 0.10,
-    }
-
-    final_score_percent = (
-        tech_score * 10 * weights["technical_accuracy"]
-        + depth_score * 10 * weights["depth_of_knowledge"]
-        + practical_score * 10 * weights["practical_experience"]
-        + comm_score * 10 * weights["communication_clarity"]
-        + problem_score * 10 * weights["problem_solving"]
-        + examples_score * 10 * weights["examples_quality"]
+    final_score_percent = _score_percent(
+        tech_score, depth_score, practical_score, comm_score, problem_score, examples_score
     )
 
     evaluation = {
@@ -101,22 +123,8 @@ def _fallback_evaluation(state: Dict[str, Any], question: str, answer: str) -> D
     problem_score = 3
     examples_score = 2
 
-    weights = {
-        "technical_accuracy": 0.25,
-        "depth_of_knowledge": 0.20,
-        "practical_experience": 0.20,
-        "communication_clarity": 0.15,
-        "problem_solving": 0.10,
-        "examples_quality": 0.10,
-    }
-
-    final_score_percent = (
-        tech_score * 10 * weights["technical_accuracy"]
-        + depth_score * 10 * weights["depth_of_knowledge"]
-        + practical_score * 10 * weights["practical_experience"]
-        + comm_score * 10 * weights["communication_clarity"]
-        + problem_score * 10 * weights["problem_solving"]
-        + examples_score * 10 * weights["examples_quality"]
+    final_score_percent = _score_percent(
+        tech_score, depth_score, practical_score, comm_score, problem_score, examples_score
     )
 
     evaluation = {
@@ -147,3 +155,24 @@ def _fallback_evaluation(state: Dict[str, Any], question: str, answer: str) -> D
 
     evaluations = state.get("answer_evaluations", []) + [evaluation]
     return {"answer_evaluations": evaluations}
+
+
+def _unknown_answer_evaluation(state: Dict[str, Any], question: str, answer: str, reason: str) -> Dict[str, Any]:
+    detailed_scores = unknown_answer_scores()
+    final_score_percent = _score_percent(*detailed_scores.values())
+
+    evaluation = {
+        "topic": state.get("current_topic", "Unknown"),
+        "score_percent": final_score_percent,
+        "detailed_scores": detailed_scores,
+        "analysis": unknown_answer_analysis(reason),
+        "question": question,
+        "answer": answer,
+    }
+
+    logger.info(
+        f"Ответ без LLM ({reason}) по теме '{evaluation['topic']}': {final_score_percent:.1f}%"
+    )
+
+    evaluations = state.get("answer_evaluations", []) + [evaluation]
+    return {"answer_evaluations": evaluations}
@@ -16,6 +16,7 @@ from ml_system.interview.src.config import InterviewConfig
 from ml_system.interview.agents.planner import plan_interview
 from ml_system.interview.agents.selector import get_fallback_question, get_resume_question, select_next_question
 from ml_system.interview.agents.conversation import conversation_turn
+from ml_system.interview.agents.answer_classifier import UnknownAnswerClassifier
 from ml_system.interview.agents.evaluator import evaluate_answer
 from ml_system.interview.agents.reporter import generate_report
 from ml_system.interview.workflow import build_graph
@@ -75,11 +76,23 @@ class InterviewSystem:
             logger.debug("Попробуйте проверить API ключ или использовать другую модель")
             raise
         
-        self.knowledge_system = InterviewKnowledgeSystemHF(collection_name=self.collection_name)
+        self.knowledge_system = InterviewKnowledgeSystemHF(
+            collection_name=self.collection_name,
+            embedding_dtype=self.config.embedding_dtype,
+            encoder_backend=self.config.encoder_backend,
+            encoder_threads=self.config.encoder_threads,
+            encoder_quantized=self.config.encoder_quantized,
+        )
         self.assistant = InterviewAssistantHF(knowledge_system=self.knowledge_system)
         
         self.alignment = self.config.alignment
         
+        self.answer_classifier = None
+        if self.config.unknown_answer_fast_path:
+            self.answer_classifier = UnknownAnswerClassifier(
+                embeddings=self.knowledge_system.embeddings if self.config.unknown_answer_semantic else None,
+            )
+        
         self.adaptive_controller = AdaptiveInterviewControllerAgent(
             self.llm,
             max_poor_answers=self.config.max_poor_answers,
@@ -136,7 +149,7 @@ class InterviewSystem:
     
     def _answer_evaluator(self, state: InterviewState) -> Dict[str, Any]:
         """Оценщик ответов (обёртка)."""
-        return evaluate_answer(state, llm=self.llm, alignment=self.alignment)
+        return evaluate_answer(state, llm=self.llm, alignment=self.alignment, classifier=self.answer_classifier)
 
     def _report_generator(self, state: InterviewState) -> Dict[str, Any]:
         """Генератор отчётов (обёртка)."""
@@ -217,18 +230,22 @@ class InterviewSystem:
         )
     
     def load_knowledge(self, knowledge_file: Optional[str] = None, knowledge_json: Optional[Dict[str, Any]] = None) -> None:
-        """Загрузка базы знаний в RAG-хранилище."""
+        """Загрузка базы знаний в RAG-хранилище.
+
+        Повторная загрузка идемпотентна: хранилище синхронизируется с банком,
+        и эмбеддятся только новые или изменённые вопросы.
+        """
         try:
             if knowledge_file is not None:
                 with open(knowledge_file, 'r', encoding='utf-8') as f:
                     knowledge_chunks = json.load(f)
             else:
                 knowledge_chunks = knowledge_json
-            self.knowledge_system.add_knowledge_to_rag(knowledge_chunks)
+            self.knowledge_system.sync_knowledge(knowledge_chunks)
             logger.info(f"База знаний загружена из {knowledge_file}")
         except FileNotFoundError:
             logger.warning(f"Файл {knowledge_file} не найден. RAG-система будет пуста.")
-            self.knowledge_system.add_knowledge_to_rag([{
+            self.knowledge_system.sync_knowledge([{
                 "section": "Python", 
                 "question": "Разница list/tuple", 
                 "grade": "middle",
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -20,6 +21,14 @@ class InterviewConfig:
 
     # RAG
     collection_name: str = "interview_questions_hf"
+    embedding_dtype: str = "float32"  # float32 (ChromaDB) | float16 | int8
+    encoder_backend: str = "torch"  # torch | onnx
+    encoder_threads: Optional[int] = None  # onnx: потоки сессии; torch: потоки PyTorch всего процесса (задаются при старте API)
+    encoder_quantized: bool = False
+
+    # Fast path: ответы "не знаю" оцениваются без LLM
+    unknown_answer_fast_path: bool = True
+    unknown_answer_semantic: bool = False  # дополнительно сравнивать с примерами отказов по эмбеддингам
 
     # Alignment/policy
     alignment: str = (
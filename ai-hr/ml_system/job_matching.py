@@ -1,10 +1,115 @@
 """Модуль сопоставления резюме с требованиями вакансии."""
 
-import re
+import asyncio
 import os
 import json
-from openai import OpenAI
-from typing import Any, Dict, List, Optional
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import httpx
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ml_system.resume_features import (
+    SkillVocabulary,
+    extract_education,
+    extract_experience,
+    features_cover,
+    unpack_skill_bits,
+)
+from ml_system.semantic_skills import SemanticSkillMatcher
+from ml_system.skill_matcher import SkillAutomaton
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "required_skills": 0.5,
+    "optional_skills": 0.15,
+    "experience": 0.25,
+    "education": 0.1,
+}
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+DEFAULT_LLM_MODEL = "mistralai/mistral-7b-instruct:free"
+logger = logging.getLogger(__name__)
+
+
+def parse_llm_band(value: str, default: Tuple[float, float] = (30.0, 75.0)) -> Tuple[float, float]:
+    """Разбирает диапазон "нижняя,верхняя" (проценты) для многоуровневой оценки.
+
+    Args:
+        value: Строка вида "30,75".
+        default: Диапазон, если строка некорректна.
+
+    Returns:
+        Пара (low, high) с 0 <= low <= high <= 100; при ошибке — `default` с предупреждением.
+    """
+    try:
+        low, high = (float(x) for x in value.split(","))
+    except ValueError:
+        logger.warning(f"Некорректный AI_HR_LLM_BAND='{value}': ожидаются два числа через запятую, используется {default}")
+        return default
+    if not 0 <= low <= high <= 100:
+        logger.warning(f"Некорректный AI_HR_LLM_BAND='{value}': нужно 0 <= нижняя <= верхняя <= 100, используется {default}")
+        return default
+    return low, high
+
+
+# Диапазон эвристической оценки (в процентах), в котором многоуровневый режим обращается к LLM.
+DEFAULT_LLM_BAND: Tuple[float, float] = parse_llm_band(os.getenv("AI_HR_LLM_BAND", "30,75"))
+# Таймауты запроса к LLM (секунды): общий и на установку соединения.
+LLM_TIMEOUT = float(os.getenv("AI_HR_LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("AI_HR_LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("AI_HR_LLM_MAX_CONNECTIONS", "64"))
+
+_llm_clients: Dict[Tuple[str, str, bool], Any] = {}
+_llm_clients_lock = threading.Lock()
+
+
+def llm_model_name() -> str:
+    """Возвращает имя модели LLM для оценки резюме (переменная AI_HR_LLM_MODEL)."""
+    return os.getenv("AI_HR_LLM_MODEL", DEFAULT_LLM_MODEL)
+
+
+def get_llm_client(api_key: str, base_url: str = OPENROUTER_BASE_URL, use_async: bool = False):
+    """Возвращает общий для процесса клиент OpenAI-совместимого API.
+
+    Клиент создаётся один раз на (ключ, URL, вариант) и держит пул соединений
+    с keep-alive, поэтому последовательные и параллельные оценки резюме не
+    тратят время на новое TCP/TLS-соединение.
+
+    Args:
+        api_key: Ключ API.
+        base_url: Базовый URL API (по умолчанию OpenRouter).
+        use_async: Вернуть `AsyncOpenAI` вместо `OpenAI`.
+
+    Returns:
+        Экземпляр `OpenAI` или `AsyncOpenAI`.
+    """
+    key = (api_key, base_url, use_async)
+    with _llm_clients_lock:
+        client = _llm_clients.get(key)
+        if client is None:
+            timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+            limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+            if use_async:
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    timeout=timeout,
+                    max_retries=1,
+                    http_client=httpx.AsyncClient(timeout=timeout, limits=limits),
+                )
+            else:
+                client = OpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    timeout=timeout,
+                    max_retries=1,
+                    http_client=httpx.Client(timeout=timeout, limits=limits),
+                )
+            _llm_clients[key] = client
+        return client
 
 
 class FlexibleResumeMatcher:
@@ -23,15 +128,22 @@ class FlexibleResumeMatcher:
         max_experience: Максимальный стаж (в годах), если задан.
         education_required: Требуемый уровень образования.
         weights: Веса критериев в итоговой оценке.
+        semantic_skills: Дополнять точный поиск навыков семантическим (по эмбеддингам).
+        tiered: Многоуровневый режим: сначала эвристика, LLM — только в зоне неопределённости.
+        llm_band: Диапазон эвристической оценки (проценты), в котором вызывается LLM.
     """
     def __init__(
         self,
         required_skills: List[str],
         optional_skills: List[str],
         min_experience: float,
-        job_description: str,
+        job_description: str = "",
         max_experience: Optional[float] = None,
-        education_required: Optional[str] = None
+        education_required: Optional[str] = None,
+        weights: Optional[Dict[str, float]] = None,
+        semantic_skills: Optional[bool] = None,
+        tiered: Optional[bool] = None,
+        llm_band: Optional[Tuple[float, float]] = None
     ) -> None:
         self.required_skills = required_skills
         self.optional_skills = optional_skills
@@ -39,6 +151,17 @@ class FlexibleResumeMatcher:
         self.max_experience = max_experience
         self.education_required = education_required
         self.job_description = job_description
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        # Автомат навыков строится один раз на вакансию и переиспользуется для всех резюме.
+        self._skill_automaton = SkillAutomaton(list(required_skills) + list(optional_skills))
+        if semantic_skills is None:
+            semantic_skills = os.getenv("AI_HR_SEMANTIC_SKILLS", "").strip().lower() in ("1", "true", "yes")
+        self.semantic_skills = semantic_skills
+        self._semantic_matcher: Optional[SemanticSkillMatcher] = None
+        if tiered is None:
+            tiered = os.getenv("AI_HR_TIERED_SCORING", "").strip().lower() in ("1", "true", "yes")
+        self.tiered = tiered
+        self.llm_band = llm_band or DEFAULT_LLM_BAND
 
     def _extract_experience(self, text: str) -> float:
         """Извлекает стаж работы из сырого текста резюме.
@@ -51,12 +174,7 @@ class FlexibleResumeMatcher:
         Returns:
             Оцененный стаж в годах (с учетом месяцев).
         """
-        match = re.search(r'опыт работы\s*---\s*(\d+)\s*(?:лет|год|года)\s*(\d+)?', text.lower())
-        if match:
-            years = int(match.group(1))
-            months = int(match.group(2)) if match.group(2) else 0
-            return round(years + months / 12, 1)
-        return 0.0
+        return extract_experience(text)
 
     def _extract_education(self, text: str) -> str:
         """Извлекает уровень образования из текста резюме.
@@ -67,16 +185,14 @@ class FlexibleResumeMatcher:
         Returns:
             Нормализованное значение уровня образования.
         """
-        text_lower = text.lower()
-        if "высшее" in text_lower:
-            return "высшее"
-        elif "среднее специальное" in text_lower or "колледж" in text_lower:
-            return "среднее специальное"
-        return "не указано"
+        return extract_education(text)
 
     def _check_skills(self, text: str, skills: List[str]) -> Dict[str, bool]:
         """Проверяет наличие перечисленных навыков в тексте.
 
+        Поиск выполняется автоматом Ахо — Корасик за один проход по тексту
+        (с учётом синонимов вроде "k8s" -> "kubernetes").
+
         Args:
             text: Текст резюме.
             skills: Перечень навыков.
@@ -84,8 +200,30 @@ class FlexibleResumeMatcher:
         Returns:
             Словарь {навык: найден ли в тексте}.
         """
-        text_lower = text.lower()
-        return {skill: bool(re.search(r'\b' + re.escape(skill.lower()) + r'\b', text_lower)) for skill in skills}
+        automaton = self._skill_automaton
+        if not set(skills) <= set(automaton.skills):
+            automaton = SkillAutomaton(skills)
+        return automaton.match(text, skills)
+
+    def _find_skills(self, text: str) -> Tuple[Set[str], Dict[str, Dict[str, Any]]]:
+        """Находит навыки вакансии в резюме: точным поиском и (если включено) семантическим.
+
+        Матрица эмбеддингов навыков строится при первом вызове и далее
+        переиспользуется для всех резюме этой вакансии.
+
+        Args:
+            text: Текст резюме.
+
+        Returns:
+            Пара (все найденные навыки, {навык: фраза и сходство} для найденных только семантически).
+        """
+        found = self._skill_automaton.find(text)
+        if not self.semantic_skills:
+            return found, {}
+        if self._semantic_matcher is None:
+            self._semantic_matcher = SemanticSkillMatcher(self._skill_automaton.skills)
+        semantic = self._semantic_matcher.find(text, exclude=found)
+        return found | set(semantic), semantic
 
     def _fallback_rule_based(self, resume_text: str) -> Dict[str, Any]:
         """Резервная эвристическая оценка соответствия без использования LLM.
@@ -98,8 +236,9 @@ class FlexibleResumeMatcher:
         """
         candidate_exp = self._extract_experience(resume_text)
         candidate_edu = self._extract_education(resume_text)
-        required_skills_map = self._check_skills(resume_text, self.required_skills)
-        optional_skills_map = self._check_skills(resume_text, self.optional_skills)
+        found_skills, semantic_matches = self._find_skills(resume_text)
+        required_skills_map = {skill: skill in found_skills for skill in self.required_skills}
+        optional_skills_map = {skill: skill in found_skills for skill in self.optional_skills}
 
         req_found = sum(required_skills_map.values())
         req_total = len(self.required_skills)
@@ -128,25 +267,206 @@ class FlexibleResumeMatcher:
             education_score * self.weights["education"]
         )
 
+        details = {
+            "experience": {"required_years": f"{self.min_experience}-{self.max_experience}", "candidate_has_years": candidate_exp, "score": round(experience_score*100)},
+            "education": {"required": self.education_required, "candidate_has": candidate_edu, "score": round(education_score*100)},
+            "required_skills": {"map": required_skills_map, "score": round(required_score*100)},
+            "optional_skills": {"map": optional_skills_map, "score": round(optional_score*100)},
+        }
+        if self.semantic_skills:
+            details["required_skills"]["semantic"] = {s: m for s, m in semantic_matches.items() if s in required_skills_map}
+            details["optional_skills"]["semantic"] = {s: m for s, m in semantic_matches.items() if s in optional_skills_map}
+
         return {
             "total_score_percent": round(final_score * 100),
-            "details": {
-                "experience": {"required_years": f"{self.min_experience}-{self.max_experience}", "candidate_has_years": candidate_exp, "score": round(experience_score*100)},
-                "education": {"required": self.education_required, "candidate_has": candidate_edu, "score": round(education_score*100)},
-                "required_skills": {"map": required_skills_map, "score": round(required_score*100)},
-                "optional_skills": {"map": optional_skills_map, "score": round(optional_score*100)},
-            }
+            "details": details,
         }
         
-    def evaluate(self, resume_text: str) -> Dict[str, Any]:
+    def _rule_based(
+        self,
+        resume_text: str,
+        resume_features: Optional[Dict[str, Any]] = None,
+        vocabulary: Optional[SkillVocabulary] = None,
+    ) -> Dict[str, Any]:
+        """Эвристическая оценка: по предвычисленным признакам, если они актуальны, иначе по тексту.
+
+        Признаки содержат только точные совпадения навыков, поэтому при
+        семантическом поиске оценка всегда считается по тексту.
+        """
+        skills = self.required_skills + self.optional_skills
+        if not self.semantic_skills and vocabulary is not None and features_cover(resume_features, vocabulary, skills):
+            batch = score_features_batch([self], [resume_features], vocabulary)
+            return batch_result_details(batch, self, 0, 0)
+        return self._fallback_rule_based(resume_text)
+
+    def _build_messages(self, resume_text: str) -> List[Dict[str, str]]:
+        """Формирует сообщения для LLM: рубрику оценки и описание вакансии с резюме."""
+        system_prompt = (
+            "Ты — строгий HR-ассессор. Оцени соответствие резюме требованиям вакансии строго по РУБРИКЕ ниже и верни ТОЛЬКО валидный JSON.\n"
+            "\n"
+            "ТРЕБОВАНИЯ К ФОРМАТУ:\n"
+            "- Верни исключительно JSON без текста вне JSON, без код-блоков и комментариев.\n"
+            "- Все числовые оценки — целые проценты 0..100 (НЕ доли).\n"
+            "- Поля: total_score_percent (int 0..100), details: experience, education, required_skills, optional_skills.\n"
+            "\n"
+            "ПРАВИЛА ИЗВЛЕЧЕНИЯ:\n"
+            "- Извлеки стаж (в годах, допускается дробное), уровень образования (нормализуй), наличие каждого навыка из списков.\n"
+            "- Если факт явно не указан, считай его отсутствующим (0/ложь).\n"
+            "\n"
+            "РУБРИКА И ОГРАНИЧЕНИЯ (0..100):\n"
+            "- required_skills (вес weight_required): доля найденных обязательных навыков.\n"
+            "  • Если не найден НИ ОДИН обязательный — required_skills.score = 0 и итоговый total_score_percent ≤ 25.\n"
+            "  • Если покрытие < 50% обязательных — итоговый total_score_percent ≤ 60.\n"
+            "  • Если покрытие 50..75% — итоговый total_score_percent ≤ 70.\n"
+            "- optional_skills (вес weight_optional): доля найденных доп. навыков (если список пуст — 100). Всегда как проценты 0..100 (НЕ 0..1).\n"
+            "- experience (вес weight_experience):\n"
+            "  • Если опыт не указан или равен 0 → score = 0.\n"
+            "  • Если опыт < min: score ≈ 60 при недостаче ≤ 1 год, линейно снижается до 0 при большой недостаче.\n"
+            "  • Если задан max и опыт > max: штраф до −10 п.п. (нижняя граница 90).\n"
+            "  • Иначе score = 100.\n"
+            "- education (вес weight_education): 100 при точном соответствии требованию, иначе 0. Если требование не задано — 100.\n"
+            "\n"
+            "ФИНАЛЬНЫЙ БАЛЛ:\n"
+            "final = required_skills.score * weight_required + optional_skills.score * weight_optional + experience.score * weight_experience + education.score * weight_education\n"
+            "- Верни total_score_percent = ceil(final), ограничив диапазоном 0..100 и применив ограничения сверху.\n"
+            "\n"
+            "ГРАНИЧНЫЕ СЛУЧАИ:\n"
+            "- Пустое резюме или очень короткое → все секции 0, total_score_percent = 0.\n"
+            "- Не интерпретируй смежные формулировки как наличие конкретного обязательного навыка.\n"
+        )
+
+        vacancy_text_lines = [
+            "ВАКАНСИЯ:",
+            f"- Обязательные навыки: {', '.join(self.required_skills) if self.required_skills else 'нет'}",
+            f"- Дополнительные навыки: {', '.join(self.optional_skills) if self.optional_skills else 'нет'}",
+            f"- Минимальный опыт (лет): {self.min_experience}",
+            f"- Максимальный опыт (лет): {self.max_experience if self.max_experience is not None else 'не задан'}",
+            f"- Образование (требуется): {self.education_required if self.education_required else 'не задано'}",
+            f"- Текст вакансии (описание требований и предстоящих заданий на работе): {self.job_description if self.job_description else 'не задано'}"
+            f"- Веса: required={self.weights.get('required_skills', 0)}, optional={self.weights.get('optional_skills', 0)}, "
+            f"experience={self.weights.get('experience', 0)}, education={self.weights.get('education', 0)}",
+            "",
+            "РЕЗЮМЕ (сырой текст, анализируй и извлекай сам):",
+            resume_text.strip(),
+            "",
+            "Требуемый формат ответа (строго JSON без комментариев и текста вне JSON):",
+            "{",
+            "  \"total_score_percent\": <int 0..100>,",
+            "  \"details\": {",
+            "    \"experience\": {\"candidate_has_years\": <float>, \"score\": <int 0..100>},",
+            "    \"education\": {\"candidate_has\": <str>, \"score\": <int 0..100>},",
+            "    \"required_skills\": {\"map\": {<skill>: <bool>}, \"score\": <int 0..100>},",
+            "    \"optional_skills\": {\"map\": {<skill>: <bool>}, \"score\": <int 0..100>}",
+            "  }",
+            "}"
+        ]
+        user_prompt_text = "\n".join(vacancy_text_lines)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt_text},
+        ]
+
+    @staticmethod
+    def _parse_llm_response(response: Any) -> Dict[str, Any]:
+        """Разбирает ответ LLM в структуру `total_score_percent` / `details`."""
+        content = response.choices[0].message.content if response.choices else ""
+        if not content:
+            raise ValueError("Пустой ответ LLM")
+
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.strip('`')
+            if content.lower().startswith("json\n"):
+                content = content[5:]
+
+        parsed = json.loads(content)
+
+        total = int(parsed.get("total_score_percent", 0))
+        details = parsed.get("details", {})
+        details.setdefault("experience", {})
+        details.setdefault("education", {})
+        details.setdefault("required_skills", {})
+        details.setdefault("optional_skills", {})
+
+        total = max(0, min(100, total))
+
+        return {
+            "total_score_percent": total,
+            "details": details,
+            "scored_by": "llm",
+        }
+
+    def _tier_decision(self, rule_result: Dict[str, Any]) -> Tuple[bool, str]:
+        """Решает, нужно ли уточнять эвристическую оценку через LLM.
+
+        Args:
+            rule_result: Результат эвристической оценки.
+
+        Returns:
+            Пара (обращаться ли к LLM, причина решения).
+        """
+        details = rule_result["details"]
+        if details["required_skills"].get("semantic") or details["optional_skills"].get("semantic"):
+            return True, "ambiguous_skills"
+        score = rule_result["total_score_percent"]
+        low, high = self.llm_band
+        if score < low:
+            return False, "below_band"
+        if score > high:
+            return False, "above_band"
+        return True, "uncertain_band"
+
+    @staticmethod
+    def _with_tier(result: Dict[str, Any], tier: str, reason: str, rule_result: Dict[str, Any]) -> Dict[str, Any]:
+        result["details"]["tier"] = {
+            "tier": tier,
+            "reason": reason,
+            "rule_based_score": rule_result["total_score_percent"],
+        }
+        return result
+
+    def _prepare_tiered(
+        self,
+        resume_text: str,
+        resume_features: Optional[Dict[str, Any]],
+        vocabulary: Optional[SkillVocabulary],
+        rule_result: Optional[Dict[str, Any]],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], str]:
+        """Первый уровень многоуровневой оценки.
+
+        Returns:
+            Тройка (итоговый результат без LLM или None, эвристический результат, причина).
+        """
+        if not self.tiered:
+            return None, None, ""
+        if rule_result is None:
+            rule_result = self._rule_based(resume_text, resume_features, vocabulary)
+        escalate, reason = self._tier_decision(rule_result)
+        if escalate:
+            return None, rule_result, reason
+        return self._with_tier(rule_result, "rule_based", reason, rule_result), rule_result, reason
+
+    def evaluate(
+        self,
+        resume_text: str,
+        resume_features: Optional[Dict[str, Any]] = None,
+        vocabulary: Optional[SkillVocabulary] = None,
+        rule_result: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """Оценивает соответствие резюме требованиям вакансии.
 
         Если задан API-ключ, выполняет запрос к LLM (через OpenRouter) и ожидает
-        строгий JSON-ответ. При любом сбое или отсутствии ключа используется
-        резервная эвристическая оценка.
+        строгий JSON-ответ. При любом сбое, таймауте или отсутствии ключа
+        используется резервная эвристическая оценка. В многоуровневом режиме
+        (`tiered`) LLM вызывается только для оценок внутри `llm_band` или при
+        навыках, найденных лишь семантически; решение записывается в `details.tier`.
 
         Args:
             resume_text: Сырой текст резюме кандидата.
+            resume_features: Предвычисленные признаки резюме (опционально);
+                при актуальности эвристическая оценка не разбирает текст.
+            vocabulary: Словарь навыков, по которому построены признаки.
+            rule_result: Уже посчитанная эвристическая оценка (для многоуровневого режима).
 
         Returns:
             Словарь с ключами `total_score_percent` и `details`.
@@ -154,108 +474,372 @@ class FlexibleResumeMatcher:
         api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
 
         if not api_key:
-            return self._fallback_rule_based(resume_text)
+            return self._rule_based(resume_text, resume_features, vocabulary)
+
+        final, rule_result, reason = self._prepare_tiered(resume_text, resume_features, vocabulary, rule_result)
+        if final is not None:
+            return final
 
         try:
-            client = OpenAI(api_key=api_key, base_url="https://openrouter.ai/api/v1")
-
-            system_prompt = (
-                "Ты — строгий HR-ассессор. Оцени соответствие резюме требованиям вакансии строго по РУБРИКЕ ниже и верни ТОЛЬКО валидный JSON.\n"
-                "\n"
-                "ТРЕБОВАНИЯ К ФОРМАТУ:\n"
-                "- Верни исключительно JSON без текста вне JSON, без код-блоков и комментариев.\n"
-                "- Все числовые оценки — целые проценты 0..100 (НЕ доли).\n"
-                "- Поля: total_score_percent (int 0..100), details: experience, education, required_skills, optional_skills.\n"
-                "\n"
-                "ПРАВИЛА ИЗВЛЕЧЕНИЯ:\n"
-                "- Извлеки стаж (в годах, допускается дробное), уровень образования (нормализуй), наличие каждого навыка из списков.\n"
-                "- Если факт явно не указан, считай его отсутствующим (0/ложь).\n"
-                "\n"
-                "РУБРИКА И ОГРАНИЧЕНИЯ (0..100):\n"
-                "- required_skills (вес weight_required): доля найденных обязательных навыков.\n"
-                "  • Если не найден НИ ОДИН обязательный — required_skills.score = 0 и итоговый total_score_percent ≤ 25.\n"
-                "  • Если покрытие < 50% обязательных — итоговый total_score_percent ≤ 60.\n"
-                "  • Если покрытие 50..75% — итоговый total_score_percent ≤ 70.\n"
-                "- optional_skills (вес weight_optional): доля найденных доп. навыков (если список пуст — 100). Всегда как проценты 0..100 (НЕ 0..1).\n"
-                "- experience (вес weight_experience):\n"
-                "  • Если опыт не указан или равен 0 → score = 0.\n"
-                "  • Если опыт < min: score ≈ 60 при недостаче ≤ 1 год, линейно снижается до 0 при большой недостаче.\n"
-                "  • Если задан max и опыт > max: штраф до −10 п.п. (нижняя граница 90).\n"
-                "  • Иначе score = 100.\n"
-                "- education (вес weight_education): 100 при точном соответствии требованию, иначе 0. Если требование не задано — 100.\n"
-                "\n"
-                "ФИНАЛЬНЫЙ БАЛЛ:\n"
-                "final = required_skills.score * weight_required + optional_skills.score * weight_optional + experience.score * weight_experience + education.score * weight_education\n"
-                "- Верни total_score_percent = ceil(final), ограничив диапазоном 0..100 и применив ограничения сверху.\n"
-                "\n"
-                "ГРАНИЧНЫЕ СЛУЧАИ:\n"
-                "- Пустое резюме или очень короткое → все секции 0, total_score_percent = 0.\n"
-                "- Не интерпретируй смежные формулировки как наличие конкретного обязательного навыка.\n"
+            response = get_llm_client(api_key).chat.completions.create(
+                model=llm_model_name(),
+                messages=self._build_messages(resume_text),
+                temperature=0.1,
             )
+            result = self._parse_llm_response(response)
+            return self._with_tier(result, "llm", reason, rule_result) if rule_result else result
+        except Exception as e:
+            if rule_result is not None:
+                return self._with_tier(rule_result, "rule_based", "llm_error", rule_result)
+            return self._rule_based(resume_text, resume_features, vocabulary)
 
-            vacancy_text_lines = [
-                "ВАКАНСИЯ:",
-                f"- Обязательные навыки: {', '.join(self.required_skills) if self.required_skills else 'нет'}",
-                f"- Дополнительные навыки: {', '.join(self.optional_skills) if self.optional_skills else 'нет'}",
-                f"- Минимальный опыт (лет): {self.min_experience}",
-                f"- Максимальный опыт (лет): {self.max_experience if self.max_experience is not None else 'не задан'}",
-                f"- Образование (требуется): {self.education_required if self.education_required else 'не задано'}",
-                f"- Текст вакансии (описание требований и предстоящих заданий на работе): {self.job_description if self.job_description else 'не задано'}"
-                f"- Веса: required={self.weights.get('required_skills', 0)}, optional={self.weights.get('optional_skills', 0)}, "
-                f"experience={self.weights.get('experience', 0)}, education={self.weights.get('education', 0)}",
-                "",
-                "РЕЗЮМЕ (сырой текст, анализируй и извлекай сам):",
-                resume_text.strip(),
-                "",
-                "Требуемый формат ответа (строго JSON без комментариев и текста вне JSON):",
-                "{",
-                "  \"total_score_percent\": <int 0..100>,",
-                "  \"details\": {",
-                "    \"experience\": {\"candidate_has_years\": <float>, \"score\": <int 0..100>},",
-                "    \"education\": {\"candidate_has\": <str>, \"score\": <int 0..100>},",
-                "    \"required_skills\": {\"map\": {<skill>: <bool>}, \"score\": <int 0..100>},",
-                "    \"optional_skills\": {\"map\": {<skill>: <bool>}, \"score\": <int 0..100>}",
-                "  }",
-                "}"
-            ]
-            user_prompt_text = "\n".join(vacancy_text_lines)
-
-            model_name = os.getenv("AI_HR_LLM_MODEL", "mistralai/mistral-7b-instruct:free")
-
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt_text},
-                ],
+    async def aevaluate(
+        self,
+        resume_text: str,
+        resume_features: Optional[Dict[str, Any]] = None,
+        vocabulary: Optional[SkillVocabulary] = None,
+        rule_result: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Асинхронный вариант `evaluate`: не блокирует цикл событий на время запроса к LLM.
+
+        Эвристическая оценка (с семантическим поиском навыков — загрузка модели и
+        эмбеддинг фраз резюме) выполняется в отдельном потоке.
+
+        Args:
+            resume_text: Сырой текст резюме кандидата.
+            resume_features: Предвычисленные признаки резюме (опционально).
+            vocabulary: Словарь навыков, по которому построены признаки.
+            rule_result: Уже посчитанная эвристическая оценка (для многоуровневого режима).
+
+        Returns:
+            Словарь с ключами `total_score_percent` и `details`.
+        """
+        api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
+
+        if not api_key:
+            return await asyncio.to_thread(self._rule_based, resume_text, resume_features, vocabulary)
+
+        final, rule_result, reason = await asyncio.to_thread(
+            self._prepare_tiered, resume_text, resume_features, vocabulary, rule_result
+        )
+        if final is not None:
+            return final
+
+        try:
+            response = await get_llm_client(api_key, use_async=True).chat.completions.create(
+                model=llm_model_name(),
+                messages=self._build_messages(resume_text),
                 temperature=0.1,
             )
+            result = self._parse_llm_response(response)
+            return self._with_tier(result, "llm", reason, rule_result) if rule_result else result
+        except Exception as e:
+            if rule_result is not None:
+                return self._with_tier(rule_result, "rule_based", "llm_error", rule_result)
+            return await asyncio.to_thread(self._rule_based, resume_text, resume_features, vocabulary)
 
-            content = response.choices[0].message.content if response.choices else ""
-            if not content:
-                raise ValueError("Пустой ответ LLM")
 
-            content = content.strip()
-            if content.startswith("```"):
-                content = content.strip('`')
-                if content.lower().startswith("json\n"):
-                    content = content[5:]
+def vacancy_fingerprint(vacancy: Dict[str, Any]) -> str:
+    """Возвращает отпечаток полей вакансии, влияющих на оценку резюме.
 
-            parsed = json.loads(content)
+    Используется как ключ кеша скомпилированных матчеров: при изменении
+    навыков, опыта, образования или описания отпечаток меняется.
 
-            total = int(parsed.get("total_score_percent", 0))
-            details = parsed.get("details", {})
-            details.setdefault("experience", {})
-            details.setdefault("education", {})
-            details.setdefault("required_skills", {})
-            details.setdefault("optional_skills", {})
+    Args:
+        vacancy: Документ вакансии из MongoDB.
+
+    Returns:
+        Hex-строка SHA-1.
+    """
+    relevant = {
+        "id": str(vacancy.get("_id", "")),
+        "required_skills": vacancy.get("required_skills") or [],
+        "optional_skills": vacancy.get("optional_skills") or [],
+        "min_experience": vacancy.get("min_experience"),
+        "max_experience": vacancy.get("max_experience"),
+        "education_required": vacancy.get("education_required"),
+        "description": vacancy.get("description", ""),
+    }
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def matcher_from_vacancy(vacancy: Dict[str, Any], weights: Optional[Dict[str, float]] = None) -> FlexibleResumeMatcher:
+    """Создаёт матчер по документу вакансии с безопасными значениями по умолчанию.
+
+    Args:
+        vacancy: Документ вакансии из MongoDB.
+        weights: Веса критериев (по умолчанию `DEFAULT_WEIGHTS`).
+
+    Returns:
+        Экземпляр `FlexibleResumeMatcher`.
+    """
+    try:
+        min_experience = float(vacancy.get('min_experience', 0))
+        max_experience = float(vacancy.get('max_experience', 100))
+    except Exception:
+        min_experience, max_experience = 0.0, 100.0
+
+    return FlexibleResumeMatcher(
+        required_skills=vacancy.get('required_skills') or [],
+        optional_skills=vacancy.get('optional_skills') or [],
+        min_experience=min_experience,
+        max_experience=max_experience,
+        education_required=(vacancy.get('education_required') or '').strip() or None,
+        job_description=vacancy.get('description', '') or '',
+        weights=weights,
+    )
+
+
+class MatcherCache:
+    """
+    LRU-кеш скомпилированных матчеров вакансий.
 
-            total = max(0, min(100, total))
+    Ключ — (отпечаток вакансии, веса), поэтому изменённая вакансия автоматически
+    получает новый матчер, а старый вытесняется по LRU.
+    """
 
-            return {
-                "total_score_percent": total,
-                "details": details,
-            }
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._items: "OrderedDict[tuple, FlexibleResumeMatcher]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, vacancy: Dict[str, Any], weights: Optional[Dict[str, float]] = None) -> FlexibleResumeMatcher:
+        """Возвращает матчер для вакансии, создавая его при промахе."""
+        key = ((str(vacancy.get("_id", "")), vacancy_fingerprint(vacancy)), tuple(sorted((weights or {}).items())))
+        with self._lock:
+            matcher = self._items.get(key)
+            if matcher is not None:
+                self._items.move_to_end(key)
+                return matcher
+
+        matcher = matcher_from_vacancy(vacancy, weights)
+        with self._lock:
+            self._items[key] = matcher
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return matcher
+
+    def invalidate(self, vacancy_id: str) -> int:
+        """Удаляет матчеры вакансии (все версии и наборы весов).
 
-        except Exception as e:
-            return self._fallback_rule_based(resume_text)
+        Returns:
+            Число удалённых матчеров.
+        """
+        with self._lock:
+            stale = [key for key in self._items if key[0][0] == vacancy_id]
+            for key in stale:
+                del self._items[key]
+        return len(stale)
+
+
+def score_rule_based_batch(matchers: List[FlexibleResumeMatcher], resumes: List[str]) -> Dict[str, Any]:
+    """Векторизованная эвристическая оценка всех пар (вакансия, резюме).
+
+    Каждое резюме сканируется ровно один раз автоматом по объединённому
+    словарю навыков всех вакансий; покрытие навыков, штрафы за опыт и
+    образование считаются матричными операциями. Результат совпадает с
+    `FlexibleResumeMatcher._fallback_rule_based` для каждой пары.
+
+    Args:
+        matchers: Матчеры вакансий (длина V).
+        resumes: Тексты резюме (длина R).
+
+    Returns:
+        Словарь массивов формы (V, R): `total`, `required`, `optional`,
+        `experience`, `education` (доли 0..1), а также по резюме
+        `candidate_experience`, `candidate_education`, матрица найденных
+        навыков `found` (R, S), словарь навыков `vocabulary` (S) и
+        отображение навыков вакансий в столбцы `column`.
+    """
+    if len(matchers) == 1:
+        automaton = matchers[0]._skill_automaton
+    else:
+        automaton = SkillAutomaton([skill for m in matchers for skill in m.required_skills + m.optional_skills])
+    vocabulary = automaton.skills
+    column = {skill: j for j, skill in enumerate(vocabulary)}
+
+    found = np.zeros((len(resumes), len(vocabulary)), dtype=np.float64)
+    candidate_exp = np.zeros(len(resumes), dtype=np.float64)
+    candidate_edu: List[str] = []
+    for i, text in enumerate(resumes):
+        for skill in automaton.find(text):
+            found[i, column[skill]] = 1.0
+        candidate_exp[i] = extract_experience(text)
+        candidate_edu.append(extract_education(text))
+
+    batch = _score_arrays(matchers, found, column, candidate_exp, candidate_edu)
+    batch["vocabulary"] = vocabulary
+    return batch
+
+
+def score_features_batch(
+    matchers: List[FlexibleResumeMatcher],
+    features: List[Dict[str, Any]],
+    vocabulary: SkillVocabulary,
+) -> Dict[str, Any]:
+    """Оценивает все пары (вакансия, резюме) по предвычисленным признакам резюме.
+
+    Текст резюме не разбирается: битовые маски навыков распаковываются в
+    матрицу, и дальше считаются те же матричные операции, что и в
+    `score_rule_based_batch`. Признаки должны покрывать навыки всех вакансий
+    (см. `resume_features.features_cover`).
+
+    Args:
+        matchers: Матчеры вакансий (длина V).
+        features: Признаки резюме из `extract_resume_features` (длина R).
+        vocabulary: Глобальный словарь навыков, по которому построены признаки.
+
+    Returns:
+        Словарь массивов в формате `score_rule_based_batch`.
+    """
+    skills = list(dict.fromkeys(
+        skill for m in matchers for skill in m.required_skills + m.optional_skills
+        if vocabulary.index(skill) is not None
+    ))
+    column = {skill: j for j, skill in enumerate(skills)}
+    indices = np.asarray([vocabulary.index(skill) for skill in skills], dtype=np.int64)
+
+    size = len(vocabulary)
+    bits = np.zeros((len(features), size), dtype=np.float64)
+    for i, item in enumerate(features):
+        # Столбцы за пределами словаря этого процесса навыкам вакансий не соответствуют
+        n = min(item["vocab_size"], size)
+        bits[i, :n] = unpack_skill_bits(item["skill_bits"], item["vocab_size"])[:n]
+    found = bits[:, indices]
+
+    candidate_exp = np.asarray([float(item.get("experience_years", 0.0)) for item in features], dtype=np.float64)
+    candidate_edu = [item.get("education", "не указано") for item in features]
+    batch = _score_arrays(matchers, found, column, candidate_exp, candidate_edu)
+    batch["vocabulary"] = skills
+    return batch
+
+
+def score_resumes_batch(
+    matchers: List[FlexibleResumeMatcher],
+    resumes: List[str],
+    features: List[Dict[str, Any]],
+    vocabulary: SkillVocabulary,
+) -> Dict[str, Any]:
+    """Оценивает все пары (вакансия, резюме) так же, как `_rule_based` оценивает каждую пару.
+
+    Признаки резюме содержат только точные совпадения навыков, поэтому
+    вакансии с семантическим поиском навыков оцениваются по тексту резюме
+    (`_fallback_rule_based`). Их результаты хранятся в `results` по ключу
+    (v, r), а `total` для этих пар — итоговый балл результата.
+
+    Args:
+        matchers: Матчеры вакансий (длина V).
+        resumes: Тексты резюме (длина R).
+        features: Признаки резюме, покрывающие навыки вакансий (длина R).
+        vocabulary: Глобальный словарь навыков, по которому построены признаки.
+
+    Returns:
+        Словарь в формате `score_features_batch` с дополнительным полем `results`.
+    """
+    batch = score_features_batch(matchers, features, vocabulary)
+    batch["results"] = {}
+    for v, matcher in enumerate(matchers):
+        if not matcher.semantic_skills:
+            continue
+        for r, text in enumerate(resumes):
+            result = matcher._fallback_rule_based(text)
+            batch["results"][(v, r)] = result
+            batch["total"][v, r] = result["total_score_percent"] / 100
+    return batch
+
+
+def _score_arrays(
+    matchers: List[FlexibleResumeMatcher],
+    found: np.ndarray,
+    column: Dict[str, int],
+    candidate_exp: np.ndarray,
+    candidate_edu: List[str],
+) -> Dict[str, Any]:
+    """Считает частные и итоговые оценки по матрице найденных навыков (R, S)."""
+    n_columns = found.shape[1]
+    required_mask = np.zeros((len(matchers), n_columns), dtype=np.float64)
+    optional_mask = np.zeros((len(matchers), n_columns), dtype=np.float64)
+    for v, matcher in enumerate(matchers):
+        for skill in matcher.required_skills:
+            if skill in column:
+                required_mask[v, column[skill]] = 1.0
+        for skill in matcher.optional_skills:
+            if skill in column:
+                optional_mask[v, column[skill]] = 1.0
+
+    def coverage(mask: np.ndarray, totals: np.ndarray) -> np.ndarray:
+        hits = mask @ found.T
+        return np.where(totals[:, None] > 0, hits / np.maximum(totals, 1)[:, None], 1.0)
+
+    required_totals = np.asarray([len(m.required_skills) for m in matchers], dtype=np.float64)
+    optional_totals = np.asarray([len(m.optional_skills) for m in matchers], dtype=np.float64)
+    required_score = coverage(required_mask, required_totals)
+    optional_score = coverage(optional_mask, optional_totals)
+
+    min_exp = np.asarray([m.min_experience for m in matchers], dtype=np.float64)[:, None]
+    max_exp = np.asarray([m.max_experience or 0.0 for m in matchers], dtype=np.float64)[:, None]
+    exp = candidate_exp[None, :]
+    under_penalty = (min_exp - exp) / np.where(min_exp > 0, min_exp, 1.0) * 0.3
+    over_penalty = np.minimum((exp - max_exp) / np.where(max_exp > 0, max_exp, 1.0) * 0.1, 0.1)
+    experience_score = np.where(
+        exp < min_exp, 1.0 - under_penalty,
+        np.where((max_exp > 0) & (exp > max_exp), 1.0 - over_penalty, 1.0),
+    )
+
+    education_score = np.asarray([
+        [1.0 if not m.education_required or edu == m.education_required else 0.0 for edu in candidate_edu]
+        for m in matchers
+    ], dtype=np.float64).reshape(len(matchers), len(candidate_edu))
+
+    weights = np.asarray([
+        [m.weights["required_skills"], m.weights["optional_skills"], m.weights["experience"], m.weights["education"]]
+        for m in matchers
+    ], dtype=np.float64).reshape(len(matchers), 4)
+    total = (
+        required_score * weights[:, 0:1]
+        + optional_score * weights[:, 1:2]
+        + experience_score * weights[:, 2:3]
+        + education_score * weights[:, 3:4]
+    )
+
+    return {
+        "total": total,
+        "required": required_score,
+        "optional": optional_score,
+        "experience": experience_score,
+        "education": education_score,
+        "candidate_experience": candidate_exp,
+        "candidate_education": candidate_edu,
+        "found": found,
+        "column": column,
+    }
+
+
+def batch_result_details(batch: Dict[str, Any], matcher: FlexibleResumeMatcher, v: int, r: int) -> Dict[str, Any]:
+    """Собирает результат пары (v, r) из `score_rule_based_batch` в формате `_fallback_rule_based`."""
+    if (v, r) in batch.get("results", {}):
+        return dict(batch["results"][(v, r)])
+    column = batch["column"]
+    found_row = batch["found"][r]
+
+    def skill_map(skills: List[str]) -> Dict[str, bool]:
+        return {skill: bool(skill in column and found_row[column[skill]]) for skill in skills}
+
+    return {
+        "total_score_percent": int(round(float(batch["total"][v, r]) * 100)),
+        "details": {
+            "experience": {
+                "required_years": f"{matcher.min_experience}-{matcher.max_experience}",
+                "candidate_has_years": round(float(batch["candidate_experience"][r]), 1),
+                "score": int(round(float(batch["experience"][v, r]) * 100)),
+            },
+            "education": {
+                "required": matcher.education_required,
+                "candidate_has": batch["candidate_education"][r],
+                "score": int(round(float(batch["education"][v, r]) * 100)),
+            },
+            "required_skills": {"map": skill_map(matcher.required_skills), "score": int(round(float(batch["required"][v, r]) * 100))},
+            "optional_skills": {"map": skill_map(matcher.optional_skills), "score": int(round(float(batch["optional"][v, r]) * 100))},
+        },
+    }
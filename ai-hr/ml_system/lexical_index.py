@@ -0,0 +1,302 @@
+"""Лексический инвертированный индекс (BM25) для гибридного поиска вопросов.
+
+Используется как быстрый префильтр перед векторным ранжированием: по
+запросу отбирается небольшое множество кандидатов, содержащих точные
+термины (например, "pandas", "градиентный бустинг"), и уже среди них
+считается косинусная близость эмбеддингов.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+_TOKEN_RE = re.compile(r"[0-9a-zа-яё]+(?:[+#]+)?", re.IGNORECASE)
+
+_RU_STOPWORDS = frozenset(
+    "и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по "
+    "только ее мне было вот от меня еще нет о из ему теперь когда даже ну вдруг ли если "
+    "уже или ни быть был него до вас нибудь опять уж вам ведь там потом себя ничего ей "
+    "может они тут где есть надо ней для мы тебя их чем была сам чтоб без будто чего раз "
+    "тоже себе под будет ж тогда кто этот того потому этого какой совсем ним здесь этом "
+    "один почти мой тем чтобы нее сейчас были куда зачем всех никогда можно при наконец "
+    "два об другой хоть после над больше тот через эти нас про всего них какая много "
+    "разве три эту моя впрочем хорошо свою этой перед иногда лучше чуть том нельзя такой "
+    "им более всегда конечно всю между чем отличается отличаются когда какие каких".split()
+)
+
+
+class RussianStemmer:
+    """Стеммер Snowball для русского языка (чистый Python, без зависимостей).
+
+    Латинские токены (названия библиотек, аббревиатуры) не изменяются.
+    Результаты кешируются, так как словарь вопросов сильно повторяется.
+    """
+
+    _VOWELS = "аеиоуыэюя"
+
+    _PERFECTIVE_GERUND_1 = ("вшись", "вши", "в")
+    _PERFECTIVE_GERUND_2 = ("ившись", "ывшись", "ивши", "ывши", "ив", "ыв")
+    _ADJECTIVE = (
+        "ими", "ыми", "его", "ого", "ему", "ому", "ее", "ие", "ые", "ое", "ей", "ий",
+        "ый", "ой", "ем", "им", "ым", "ом", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею",
+    )
+    _PARTICIPLE_1 = ("ем", "нн", "вш", "ющ", "щ")
+    _PARTICIPLE_2 = ("ивш", "ывш", "ующ")
+    _REFLEXIVE = ("ся", "сь")
+    _VERB_1 = (
+        "ете", "йте", "ешь", "нно", "ла", "на", "ли", "ем", "ло", "но", "ет", "ют", "ны",
+        "ть", "й", "л", "н",
+    )
+    _VERB_2 = (
+        "ейте", "уйте", "ила", "ыла", "ена", "ите", "или", "ыли", "ило", "ыло", "ено",
+        "ует", "уют", "ены", "ить", "ыть", "ишь", "ей", "уй", "ил", "ыл", "им", "ым",
+        "ен", "ят", "ит", "ыт", "ую", "ю",
+    )
+    _NOUN = (
+        "иями", "ями", "ами", "ией", "иям", "ием", "иях", "ев", "ов", "ие", "ье", "еи",
+        "ии", "ей", "ой", "ий", "ям", "ем", "ам", "ом", "ах", "ях", "ию", "ью", "ия",
+        "ья", "а", "е", "и", "й", "о", "у", "ы", "ь", "ю", "я",
+    )
+    _SUPERLATIVE = ("ейше", "ейш")
+    _DERIVATIONAL = ("ость", "ост")
+
+    def __init__(self) -> None:
+        self._cache: Dict[str, str] = {}
+
+    def stem(self, word: str) -> str:
+        """Возвращает основу слова."""
+        cached = self._cache.get(word)
+        if cached is not None:
+            return cached
+        result = self._stem(word)
+        self._cache[word] = result
+        return result
+
+    def _regions(self, word: str) -> Tuple[int, int]:
+        rv = len(word)
+        for i, ch in enumerate(word):
+            if ch in self._VOWELS:
+                rv = i + 1
+                break
+        r1 = len(word)
+        for i in range(1, len(word)):
+            if word[i] not in self._VOWELS and word[i - 1] in self._VOWELS:
+                r1 = i + 1
+                break
+        r2 = len(word)
+        for i in range(r1 + 1, len(word)):
+            if word[i] not in self._VOWELS and word[i - 1] in self._VOWELS:
+                r2 = i + 1
+                break
+        return rv, r2
+
+    @staticmethod
+    def _strip(rv: str, suffixes: Iterable[str]) -> Optional[str]:
+        for suffix in suffixes:
+            if rv.endswith(suffix):
+                return rv[: -len(suffix)]
+        return None
+
+    def _strip_group(self, rv: str, group_1: Iterable[str], group_2: Iterable[str]) -> Optional[str]:
+        # Выбираем самое длинное подходящее окончание из обеих групп.
+        best: Optional[str] = None
+        for suffix in group_1:
+            if rv.endswith(suffix) and rv[: -len(suffix)].endswith(("а", "я")):
+                if best is None or len(suffix) > len(best):
+                    best = suffix
+                break
+        for suffix in group_2:
+            if rv.endswith(suffix):
+                if best is None or len(suffix) > len(best):
+                    best = suffix
+                break
+        return rv[: -len(best)] if best is not None else None
+
+    def _stem(self, word: str) -> str:
+        word = word.lower().replace("ё", "е")
+        if not re.fullmatch(r"[а-я]+", word):
+            return word
+
+        rv_start, r2_start = self._regions(word)
+        prefix, rv = word[:rv_start], word[rv_start:]
+
+        # Шаг 1
+        stripped = self._strip_group(rv, self._PERFECTIVE_GERUND_1, self._PERFECTIVE_GERUND_2)
+        if stripped is not None:
+            rv = stripped
+        else:
+            reflexive = self._strip(rv, self._REFLEXIVE)
+            if reflexive is not None:
+                rv = reflexive
+            adjective = self._strip(rv, self._ADJECTIVE)
+            if adjective is not None:
+                participle = self._strip_group(adjective, self._PARTICIPLE_1, self._PARTICIPLE_2)
+                rv = participle if participle is not None else adjective
+            else:
+                verb = self._strip_group(rv, self._VERB_1, self._VERB_2)
+                if verb is not None:
+                    rv = verb
+                else:
+                    noun = self._strip(rv, self._NOUN)
+                    if noun is not None:
+                        rv = noun
+
+        # Шаг 2
+        if rv.endswith("и"):
+            rv = rv[:-1]
+
+        # Шаг 3: словообразовательные окончания только в R2
+        r2_offset = max(0, r2_start - rv_start)
+        for suffix in self._DERIVATIONAL:
+            if rv.endswith(suffix) and len(rv) - len(suffix) >= r2_offset:
+                rv = rv[: -len(suffix)]
+                break
+
+        # Шаг 4
+        if rv.endswith("нн"):
+            rv = rv[:-1]
+        else:
+            superlative = self._strip(rv, self._SUPERLATIVE)
+            if superlative is not None:
+                rv = superlative
+                if rv.endswith("нн"):
+                    rv = rv[:-1]
+            elif rv.endswith("ь"):
+                rv = rv[:-1]
+
+        return prefix + rv
+
+
+class BM25Index:
+    """Инвертированный индекс с ранжированием Okapi BM25.
+
+    Индекс хранит posting-листы `терм -> {doc_id: tf}`, поэтому стоимость
+    запроса пропорциональна суммарной длине posting-листов терминов запроса,
+    а не размеру всего банка вопросов.
+
+    Attributes:
+        k1: Параметр насыщения частоты терма.
+        b: Параметр нормализации по длине документа.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, stemmer: Optional[RussianStemmer] = None) -> None:
+        self.k1 = k1
+        self.b = b
+        self.stemmer = stemmer or RussianStemmer()
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lengths
+
+    def tokenize(self, text: str) -> List[str]:
+        """Разбивает текст на нормализованные термы (нижний регистр, стемминг, без стоп-слов).
+
+        Args:
+            text: Исходный текст.
+
+        Returns:
+            Список термов.
+        """
+        terms: List[str] = []
+        for token in _TOKEN_RE.findall(text.lower()):
+            if token in _RU_STOPWORDS or (len(token) < 2 and not token.isdigit()):
+                continue
+            terms.append(self.stemmer.stem(token))
+        return terms
+
+    def add_document(self, doc_id: str, text: str) -> None:
+        """Индексирует документ; повторное добавление того же `doc_id` заменяет его.
+
+        Args:
+            doc_id: Идентификатор документа (совпадает с id в векторном хранилище).
+            text: Текст документа.
+        """
+        if doc_id in self._doc_lengths:
+            self.remove_document(doc_id)
+        terms = Counter(self.tokenize(text))
+        for term, tf in terms.items():
+            self._postings[term][doc_id] = tf
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def add_documents(self, doc_ids: List[str], texts: List[str]) -> None:
+        """Индексирует набор документов.
+
+        Args:
+            doc_ids: Идентификаторы документов.
+            texts: Тексты документов (в том же порядке).
+        """
+        for doc_id, text in zip(doc_ids, texts):
+            self.add_document(doc_id, text)
+
+    def remove_document(self, doc_id: str) -> None:
+        """Удаляет документ из индекса (если он был проиндексирован)."""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[str, float]]:
+        """Возвращает документы с наибольшим BM25 для запроса.
+
+        Args:
+            query: Текст запроса.
+            limit: Максимальное число кандидатов.
+
+        Returns:
+            Список пар (doc_id, score), отсортированный по убыванию score.
+            Пустой список, если ни один терм запроса не найден в индексе.
+        """
+        n_docs = len(self._doc_lengths)
+        if n_docs == 0:
+            return []
+        avgdl = self._total_length / n_docs if self._total_length else 1.0
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(self.tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        if not scores:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Объединяет несколько ранжирований методом Reciprocal Rank Fusion.
+
+    Args:
+        rankings: Списки doc_id, каждый отсортирован по убыванию релевантности.
+        k: Сглаживающая константа RRF.
+
+    Returns:
+        Список пар (doc_id, fused_score) по убыванию fused_score.
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,148 @@
+"""Кеш результатов сопоставления резюме с вакансией.
+
+Два уровня:
+  * in-process LRU — мгновенный ответ на повторные запросы в том же процессе;
+  * MongoDB — переживает перезапуски и общий для всех воркеров.
+
+Ключ — хеш от (текст резюме, id вакансии, версия вакансии, веса, модель LLM).
+Версия вакансии — отпечаток полей, влияющих на оценку (`vacancy_fingerprint`),
+поэтому изменённая вакансия сразу получает новые ключи. Явная инвалидация
+(`invalidate_vacancy`) дополнительно удаляет устаревшие записи обоих уровней.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from ml_system.job_matching import vacancy_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def resume_hash(resume_text: str) -> str:
+    """Возвращает SHA-1 нормализованного (без краевых пробелов) текста резюме."""
+    return hashlib.sha1((resume_text or "").strip().encode("utf-8")).hexdigest()
+
+
+class MatchResultCache:
+    """
+    Двухуровневый кеш результатов `FlexibleResumeMatcher.evaluate`.
+
+    Attributes:
+        collection: Коллекция MongoDB для постоянного уровня (None — только LRU).
+        max_size: Максимальное число записей LRU-уровня.
+    """
+
+    def __init__(self, collection: Any = None, max_size: int = 4096, ttl_seconds: Optional[int] = 30 * 24 * 3600) -> None:
+        """
+        Args:
+            collection: Коллекция MongoDB (опционально).
+            max_size: Размер LRU-уровня.
+            ttl_seconds: Время жизни записей MongoDB (TTL-индекс); None — без ограничения.
+        """
+        self.collection = collection
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if collection is not None:
+            try:
+                collection.create_index("vacancy_id")
+                if ttl_seconds:
+                    collection.create_index("created_at", expireAfterSeconds=ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Не удалось создать индексы кеша результатов: {e}")
+
+    @staticmethod
+    def make_key(resume_text: str, vacancy: Dict[str, Any], weights: Optional[Dict[str, float]], model: str) -> str:
+        """Строит ключ кеша.
+
+        Args:
+            resume_text: Текст резюме.
+            vacancy: Документ вакансии.
+            weights: Веса критериев (None — по умолчанию).
+            model: Имя модели LLM.
+
+        Returns:
+            Hex-строка SHA-1.
+        """
+        payload = {
+            "resume": resume_hash(resume_text),
+            "vacancy_id": str(vacancy.get("_id", "")),
+            "vacancy_version": vacancy_fingerprint(vacancy),
+            "weights": sorted((weights or {}).items()),
+            "model": model,
+        }
+        return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vacancy_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._items[key] = (vacancy_id, result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Возвращает сохранённый результат (сначала LRU, затем MongoDB) или None."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+
+        if self.collection is not None:
+            try:
+                document = self.collection.find_one({"_id": key})
+            except Exception as e:
+                logger.warning(f"Ошибка чтения кеша результатов из MongoDB: {e}")
+                document = None
+            if document is not None:
+                self._remember(key, document.get("vacancy_id", ""), document["result"])
+                self.hits += 1
+                return document["result"]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, vacancy_id: str, result: Dict[str, Any]) -> None:
+        """Сохраняет результат в оба уровня."""
+        self._remember(key, vacancy_id, result)
+        if self.collection is None:
+            return
+        try:
+            self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "vacancy_id": vacancy_id, "result": result, "created_at": datetime.now(timezone.utc)},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка записи кеша результатов в MongoDB: {e}")
+
+    def invalidate_vacancy(self, vacancy_id: str) -> int:
+        """Удаляет все результаты для вакансии из обоих уровней.
+
+        Args:
+            vacancy_id: Идентификатор вакансии.
+
+        Returns:
+            Число удалённых записей (в MongoDB, а без неё — в LRU).
+        """
+        with self._lock:
+            stale = [key for key, (item_vacancy_id, _) in self._items.items() if item_vacancy_id == vacancy_id]
+            for key in stale:
+                del self._items[key]
+        removed = len(stale)
+        if self.collection is not None:
+            try:
+                removed = self.collection.delete_many({"vacancy_id": vacancy_id}).deleted_count
+            except Exception as e:
+                logger.warning(f"Ошибка инвалидации кеша результатов в MongoDB: {e}")
+        logger.info(f"Кеш результатов для вакансии {vacancy_id} очищен: {removed} записей")
+        return removed
@@ -0,0 +1,321 @@
+"""Бенчмарк и проверка согласованности путей оценки `FlexibleResumeMatcher`.
+
+Генерирует синтетический корпус вакансий и резюме с известной разметкой
+(какие навыки кандидат действительно упоминает — точно, синонимом или
+перефразом; стаж; образование) и прогоняет пути оценки:
+
+  * "rule_based" — `_fallback_rule_based` по одному резюме;
+  * "batch"      — `score_rule_based_batch` (все пары за раз);
+  * "semantic"   — эвристика с семантическим поиском навыков (опционально, нужен энкодер);
+  * "llm"        — полный путь `evaluate` с локальной заглушкой LLM, которая
+                   отвечает оценкой по истинной разметке с заданной задержкой;
+  * "tiered"     — многоуровневый режим с той же заглушкой.
+
+Для каждого пути отчёт содержит пропускную способность (резюме/с), p50/p99
+задержки и согласованность с эталоном "llm": среднюю абсолютную разницу
+баллов, долю оценок в пределах 10 п.п. и совпадение решения о допуске
+(порог `/check-resume`). Результат — JSON:
+
+    python -m ml_system.matching_benchmark --vacancies 20 --resumes 200 --output matching.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml_system import job_matching
+from ml_system.job_matching import FlexibleResumeMatcher, matcher_from_vacancy, score_rule_based_batch
+from ml_system.skill_matcher import DEFAULT_SKILL_SYNONYMS
+
+logger = logging.getLogger(__name__)
+
+SKILL_POOL = [
+    "Python", "SQL", "PostgreSQL", "MongoDB", "Docker", "Kubernetes", "Linux", "Git",
+    "PyTorch", "scikit-learn", "pandas", "NumPy", "machine learning", "deep learning",
+    "natural language processing", "JavaScript", "React", "Node.js", "C++", "C#", "Java",
+    "Go", "Kafka", "Redis", "Airflow", "Spark", "CI/CD", "Excel",
+]
+
+# Перефразы, которые не находятся точным поиском (проверяют семантический путь и LLM).
+PARAPHRASES = {
+    "machine learning": ["построение предсказательных моделей", "обучение моделей на данных"],
+    "deep learning": ["нейронные сети", "обучение нейросетей"],
+    "natural language processing": ["анализ текстов", "обработка текстовых данных"],
+    "PostgreSQL": ["реляционная СУБД постгрес"],
+    "Kubernetes": ["оркестрация контейнеров"],
+    "CI/CD": ["автоматизация сборки и деплоя"],
+    "Kafka": ["брокер сообщений кафка"],
+    "pandas": ["табличные датафреймы"],
+}
+
+EDUCATION_LINES = {
+    "высшее": "Образование: высшее техническое",
+    "среднее специальное": "Образование: колледж",
+    "не указано": "",
+}
+
+_RESUME_MARKER = "РЕЗЮМЕ (сырой текст, анализируй и извлекай сам):\n"
+_FORMAT_MARKER = "\n\nТребуемый формат ответа"
+
+
+def _mention(skill: str, rng: random.Random) -> Tuple[str, str]:
+    """Возвращает (упоминание навыка, способ): точное, синоним или перефраз."""
+    synonyms = DEFAULT_SKILL_SYNONYMS.get(skill.lower(), [])
+    options = [("exact", skill)]
+    options += [("synonym", alias) for alias in synonyms]
+    options += [("paraphrase", phrase) for phrase in PARAPHRASES.get(skill, [])]
+    kind, text = rng.choice(options)
+    return text, kind
+
+
+def build_corpus(n_vacancies: int, n_resumes: int, seed: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Генерирует вакансии и резюме с истинной разметкой.
+
+    Args:
+        n_vacancies: Число вакансий.
+        n_resumes: Число резюме.
+        seed: Зерно генератора.
+
+    Returns:
+        Пара (вакансии в формате MongoDB, резюме {"text", "skills", "experience", "education"}).
+    """
+    rng = random.Random(seed)
+    vacancies = []
+    for i in range(n_vacancies):
+        skills = rng.sample(SKILL_POOL, rng.randint(3, 8))
+        split = rng.randint(2, max(2, len(skills) - 1))
+        min_exp = rng.choice([0, 1, 2, 3, 5])
+        vacancies.append({
+            "_id": f"vacancy_{i}",
+            "required_skills": skills[:split],
+            "optional_skills": skills[split:],
+            "min_experience": min_exp,
+            "max_experience": min_exp + rng.choice([3, 5, 10]),
+            "education_required": rng.choice(["высшее", "высшее", None]),
+            "description": "",
+        })
+
+    resumes = []
+    for _ in range(n_resumes):
+        skills = rng.sample(SKILL_POOL, rng.randint(0, 10))
+        years, months = rng.randint(0, 12), rng.randint(0, 11)
+        education = rng.choice(list(EDUCATION_LINES))
+        mentions = [_mention(skill, rng) for skill in skills]
+        lines = [
+            "Кандидат на позицию разработчика",
+            f"Опыт работы --- {years} лет {months} месяцев" if years else "",
+            "Навыки: " + ", ".join(text for text, _ in mentions) if mentions else "",
+            EDUCATION_LINES[education],
+            "Участвовал в проектах, работал в команде, писал документацию.",
+        ]
+        resumes.append({
+            "text": "\n".join(line for line in lines if line),
+            "skills": {skill.lower(): kind for skill, (_, kind) in zip(skills, mentions)},
+            "experience": round(years + months / 12, 1) if years else 0.0,
+            "education": education,
+        })
+    return vacancies, resumes
+
+
+def oracle_score(matcher: FlexibleResumeMatcher, resume: Dict[str, Any]) -> Dict[str, Any]:
+    """Оценка по истинной разметке по той же рубрике, что и эвристика (эталон "идеального LLM")."""
+    def coverage(skills: List[str]) -> Tuple[Dict[str, bool], float]:
+        found = {skill: skill.lower() in resume["skills"] for skill in skills}
+        return found, (sum(found.values()) / len(skills) if skills else 1.0)
+
+    required_map, required_score = coverage(matcher.required_skills)
+    optional_map, optional_score = coverage(matcher.optional_skills)
+    exp = resume["experience"]
+    experience_score = 1.0
+    if exp < matcher.min_experience:
+        experience_score = 1.0 - (matcher.min_experience - exp) / matcher.min_experience * 0.3
+    elif matcher.max_experience and exp > matcher.max_experience:
+        experience_score = 1.0 - min((exp - matcher.max_experience) / matcher.max_experience * 0.1, 0.1)
+    education_score = 1.0 if not matcher.education_required or resume["education"] == matcher.education_required else 0.0
+    w = matcher.weights
+    total = (
+        required_score * w["required_skills"] + optional_score * w["optional_skills"]
+        + experience_score * w["experience"] + education_score * w["education"]
+    )
+    return {
+        "total_score_percent": round(total * 100),
+        "details": {
+            "experience": {"candidate_has_years": exp, "score": round(experience_score * 100)},
+            "education": {"candidate_has": resume["education"], "score": round(education_score * 100)},
+            "required_skills": {"map": required_map, "score": round(required_score * 100)},
+            "optional_skills": {"map": optional_map, "score": round(optional_score * 100)},
+        },
+    }
+
+
+class StandInLLM:
+    """Локальная заглушка OpenAI-совместимого клиента.
+
+    Извлекает текст резюме из промпта, находит его истинную разметку и
+    возвращает JSON по рубрике после искусственной задержки.
+    """
+
+    def __init__(self, resumes: List[Dict[str, Any]], latency_ms: float) -> None:
+        self._by_text = {resume["text"].strip(): resume for resume in resumes}
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.matcher: Optional[FlexibleResumeMatcher] = None
+        self.chat = self
+        self.completions = self
+
+    def create(self, model: str, messages: List[Dict[str, str]], **kwargs: Any) -> Any:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        prompt = messages[-1]["content"]
+        text = prompt.split(_RESUME_MARKER, 1)[-1].split(_FORMAT_MARKER, 1)[0].strip()
+        result = oracle_score(self.matcher, self._by_text[text])
+        message = type("Message", (), {"content": json.dumps(result, ensure_ascii=False)})()
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+
+def _percentile_ms(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 3) if values else 0.0
+
+
+def _timed_path(name: str, pairs: List[Tuple[FlexibleResumeMatcher, Dict[str, Any]]], score) -> Tuple[Dict[str, Any], List[int]]:
+    latencies: List[float] = []
+    totals: List[int] = []
+    start = time.perf_counter()
+    for matcher, resume in pairs:
+        item_start = time.perf_counter()
+        totals.append(score(matcher, resume)["total_score_percent"])
+        latencies.append(time.perf_counter() - item_start)
+    elapsed = time.perf_counter() - start
+    return {
+        "path": name,
+        "resumes_per_s": round(len(pairs) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p99_ms": _percentile_ms(latencies, 99),
+    }, totals
+
+
+def agreement(totals: List[int], reference: List[int], cutoff: int) -> Dict[str, float]:
+    """Согласованность баллов пути с эталоном.
+
+    Args:
+        totals: Баллы пути.
+        reference: Эталонные баллы.
+        cutoff: Порог допуска к интервью.
+
+    Returns:
+        MAE, доля оценок в пределах 10 п.п. и доля совпадающих решений о допуске.
+    """
+    a = np.asarray(totals, dtype=np.float64)
+    b = np.asarray(reference, dtype=np.float64)
+    return {
+        "mae": round(float(np.abs(a - b).mean()), 2),
+        "within_10pp": round(float((np.abs(a - b) <= 10).mean()), 4),
+        "decision_agreement": round(float(((a >= cutoff) == (b >= cutoff)).mean()), 4),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    vacancies, resumes = build_corpus(args.vacancies, args.resumes, args.seed)
+    matchers = [matcher_from_vacancy(vacancy) for vacancy in vacancies]
+    pairs = [(matcher, resume) for matcher in matchers for resume in resumes]
+
+    report: Dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "vacancies": len(vacancies),
+        "resumes": len(resumes),
+        "pairs": len(pairs),
+        "llm_latency_ms": args.llm_latency_ms,
+        "cutoff": args.cutoff,
+        "paths": [],
+    }
+
+    stand_in = StandInLLM(resumes, args.llm_latency_ms)
+    api_key = "benchmark-stand-in"
+    os.environ["OPENROUTER_API_KEY"] = api_key
+    job_matching._llm_clients[(api_key, job_matching.OPENROUTER_BASE_URL, False)] = stand_in
+
+    def llm_score(matcher: FlexibleResumeMatcher, resume: Dict[str, Any]) -> Dict[str, Any]:
+        stand_in.matcher = matcher
+        matcher.tiered = False
+        return matcher.evaluate(resume["text"])
+
+    llm_pairs = pairs[:args.llm_pairs] if args.llm_pairs else pairs
+    llm_stats, llm_totals = _timed_path("llm", llm_pairs, llm_score)
+    report["paths"].append(llm_stats)
+    n_reference = len(llm_totals)
+
+    rule_stats, rule_totals = _timed_path("rule_based", pairs, lambda m, r: m._fallback_rule_based(r["text"]))
+    rule_stats["agreement"] = agreement(rule_totals[:n_reference], llm_totals, args.cutoff)
+    report["paths"].append(rule_stats)
+
+    start = time.perf_counter()
+    batch = score_rule_based_batch(matchers, [resume["text"] for resume in resumes])
+    elapsed = time.perf_counter() - start
+    batch_totals = np.rint(batch["total"] * 100).astype(int).ravel().tolist()
+    report["paths"].append({
+        "path": "batch",
+        "resumes_per_s": round(len(pairs) / elapsed, 1) if elapsed > 0 else None,
+        "total_ms": round(elapsed * 1000, 3),
+        "matches_rule_based": batch_totals == rule_totals,
+        "agreement": agreement(batch_totals[:n_reference], llm_totals, args.cutoff),
+    })
+
+    def tiered_score(matcher: FlexibleResumeMatcher, resume: Dict[str, Any]) -> Dict[str, Any]:
+        stand_in.matcher = matcher
+        matcher.tiered = True
+        return matcher.evaluate(resume["text"])
+
+    calls_before = stand_in.calls
+    tiered_stats, tiered_totals = _timed_path("tiered", llm_pairs, tiered_score)
+    tiered_stats["llm_call_fraction"] = round((stand_in.calls - calls_before) / max(1, len(llm_pairs)), 4)
+    tiered_stats["agreement"] = agreement(tiered_totals, llm_totals, args.cutoff)
+    report["paths"].append(tiered_stats)
+
+    if args.semantic:
+        os.environ.pop("OPENROUTER_API_KEY", None)
+        semantic_matchers = {id(m): FlexibleResumeMatcher(
+            m.required_skills, m.optional_skills, m.min_experience,
+            max_experience=m.max_experience, education_required=m.education_required, semantic_skills=True,
+        ) for m in matchers}
+        semantic_stats, semantic_totals = _timed_path(
+            "semantic", llm_pairs, lambda m, r: semantic_matchers[id(m)]._fallback_rule_based(r["text"]),
+        )
+        semantic_stats["agreement"] = agreement(semantic_totals, llm_totals, args.cutoff)
+        report["paths"].append(semantic_stats)
+
+    job_matching._llm_clients.pop((api_key, job_matching.OPENROUTER_BASE_URL, False), None)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк и согласованность путей оценки FlexibleResumeMatcher")
+    parser.add_argument("--vacancies", type=int, default=20)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Искусственная задержка заглушки LLM")
+    parser.add_argument("--llm-pairs", type=int, default=0, help="Ограничить число пар для LLM-путей (0 — все)")
+    parser.add_argument("--cutoff", type=int, default=20, help="Порог допуска к интервью (как в /check-resume)")
+    parser.add_argument("--semantic", action="store_true", help="Добавить семантический путь (загружает энкодер)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Путь для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    report = run(args)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Компактное векторное хранилище с квантованными эмбеддингами.
+
+Альтернатива `ChromaDBVectorStore` для банков вопросов: эмбеддинги хранятся
+в виде float16 или int8 (с масштабом на вектор), без накладных расходов HNSW.
+Поиск точный (brute force) и выполняется блоками: int8-блок умножается на
+запрос, после чего результат масштабируется, — полная матрица float32 в
+памяти не материализуется.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = ("float16", "int8")
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Симметрично квантует векторы в int8 с отдельным масштабом для каждой строки.
+
+    Args:
+        vectors: Матрица (n, dim) float32.
+
+    Returns:
+        Пара (codes int8 (n, dim), scales float32 (n,)).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def _matches_filter(metadata: Dict[str, Any], where_filter: Optional[Dict[str, Any]]) -> bool:
+    """Проверяет метаданные на соответствие фильтру в синтаксисе ChromaDB (равенство, $and, $in)."""
+    if not where_filter:
+        return True
+    for key, condition in where_filter.items():
+        if key == "$and":
+            if not all(_matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            if "$eq" in condition and metadata.get(key) != condition["$eq"]:
+                return False
+            if "$in" in condition and metadata.get(key) not in condition["$in"]:
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class QuantizedVectorStore:
+    """
+    In-memory хранилище документов с квантованными эмбеддингами.
+
+    Повторяет интерфейс `ChromaDBVectorStore` (`add_documents`, `query`,
+    `get_documents`), поэтому может подменять его в `InterviewKnowledgeSystemHF`.
+    Эмбеддинги должны передаваться явно и быть L2-нормированными: расстояние
+    считается как косинусное (1 - скалярное произведение).
+
+    Attributes:
+        dtype: Формат хранения эмбеддингов: "float16" или "int8".
+        block_size: Число строк, обрабатываемых за один шаг поиска.
+    """
+
+    def __init__(self, collection_name: str = "interview_knowledge", dtype: str = "int8", block_size: int = 4096) -> None:
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Неподдерживаемый формат эмбеддингов: {dtype}. Допустимо: {', '.join(SUPPORTED_DTYPES)}")
+        self.collection_name = collection_name
+        self.dtype = dtype
+        self.block_size = block_size
+
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        logger.info(f"Квантованное хранилище '{collection_name}' инициализировано ({dtype})")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _encode(self, embeddings: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.dtype == "int8":
+            return quantize_int8(embeddings)
+        return embeddings.astype(np.float16), None
+
+    def add_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> None:
+        """
+        Добавляет документы в хранилище.
+
+        Args:
+            documents: Список текстов документов.
+            metadatas: Список словарей с метаданными для каждого документа.
+            ids: Список уникальных идентификаторов документов.
+            embeddings: Эмбеддинги документов (обязательны).
+        """
+        if embeddings is None:
+            raise ValueError("QuantizedVectorStore требует явно переданные эмбеддинги")
+        duplicates = [doc_id for doc_id in ids if doc_id in self._positions]
+        if duplicates:
+            raise ValueError(f"Документы с такими ID уже существуют: {duplicates[:5]}")
+
+        codes, scales = self._encode(np.asarray(embeddings, dtype=np.float32))
+        if self._codes is None:
+            self._codes, self._scales = codes, scales
+        else:
+            self._codes = np.concatenate([self._codes, codes])
+            if scales is not None:
+                self._scales = np.concatenate([self._scales, scales])
+
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            self._positions[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+            self._documents.append(document)
+            self._metadatas.append(metadata)
+        logger.info(f"Добавлено {len(documents)} документов в коллекцию '{self.collection_name}'")
+
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 5,
+        where_filter: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Выполняет точный поиск ближайших документов по косинусной близости.
+
+        Args:
+            query_text: Текст запроса (не используется, оставлен для совместимости интерфейса).
+            n_results: Количество результатов.
+            where_filter: Фильтр по метаданным (опционально).
+            query_embedding: Эмбеддинг запроса (обязателен).
+
+        Returns:
+            Словарь с полями `ids`, `documents`, `metadatas`, `distances` (формат ChromaDB).
+        """
+        empty = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        if query_embedding is None or self._codes is None:
+            return empty
+
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        mask = None
+        if where_filter:
+            mask = np.fromiter((_matches_filter(m, where_filter) for m in self._metadatas), dtype=bool, count=len(self._metadatas))
+            if not mask.any():
+                return empty
+
+        similarities = np.empty(len(self._ids), dtype=np.float32)
+        for start in range(0, len(self._ids), self.block_size):
+            stop = min(start + self.block_size, len(self._ids))
+            block = self._codes[start:stop].astype(np.float32) @ query_vec
+            if self._scales is not None:
+                block *= self._scales[start:stop]
+            similarities[start:stop] = block
+        if mask is not None:
+            similarities[~mask] = -np.inf
+
+        n_valid = int(mask.sum()) if mask is not None else len(self._ids)
+        n_results = min(n_results, n_valid)
+        if n_results <= 0:
+            return empty
+        top = np.argpartition(-similarities, n_results - 1)[:n_results]
+        top = top[np.argsort(-similarities[top])]
+
+        return {
+            "ids": [[self._ids[i] for i in top]],
+            "documents": [[self._documents[i] for i in top]],
+            "metadatas": [[self._metadatas[i] for i in top]],
+            "distances": [[float(1.0 - similarities[i]) for i in top]],
+        }
+
+    def get_documents(self, ids: List[str], where_filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Возвращает документы по идентификаторам вместе с деквантованными эмбеддингами.
+
+        Args:
+            ids: Идентификаторы документов.
+            where_filter: Фильтр по метаданным (опционально).
+
+        Returns:
+            Словарь с полями `ids`, `documents`, `metadatas`, `embeddings`.
+        """
+        positions = [
+            self._positions[doc_id] for doc_id in ids
+            if doc_id in self._positions and _matches_filter(self._metadatas[self._positions[doc_id]], where_filter)
+        ]
+        if not positions:
+            return {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        index = np.asarray(positions)
+        embeddings = self._codes[index].astype(np.float32)
+        if self._scales is not None:
+            embeddings *= self._scales[index, None]
+        return {
+            "ids": [self._ids[i] for i in positions],
+            "documents": [self._documents[i] for i in positions],
+            "metadatas": [self._metadatas[i] for i in positions],
+            "embeddings": embeddings,
+        }
+
+    def existing_ids(self) -> Set[str]:
+        """Возвращает множество идентификаторов документов хранилища."""
+        return set(self._positions)
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """
+        Удаляет документы и уплотняет матрицу эмбеддингов.
+
+        Args:
+            ids: Идентификаторы удаляемых документов.
+        """
+        removed = {self._positions[doc_id] for doc_id in ids if doc_id in self._positions}
+        if not removed:
+            return
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[list(removed)] = False
+
+        self._codes = self._codes[keep]
+        if self._scales is not None:
+            self._scales = self._scales[keep]
+        self._ids = [doc_id for i, doc_id in enumerate(self._ids) if keep[i]]
+        self._documents = [doc for i, doc in enumerate(self._documents) if keep[i]]
+        self._metadatas = [meta for i, meta in enumerate(self._metadatas) if keep[i]]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        logger.info(f"Удалено {len(removed)} документов из коллекции '{self.collection_name}'")
+
+    def memory_bytes(self) -> int:
+        """Возвращает объём памяти, занятый эмбеддингами (коды + масштабы), в байтах."""
+        if self._codes is None:
+            return 0
+        return int(self._codes.nbytes + (self._scales.nbytes if self._scales is not None else 0))
+
+
+def bytes_per_10k(dim: int, dtype: str) -> int:
+    """Оценивает объём памяти под эмбеддинги 10 000 вопросов для заданного формата.
+
+    Args:
+        dim: Размерность эмбеддингов.
+        dtype: "float32", "float16" или "int8".
+
+    Returns:
+        Число байт (без учёта текстов и метаданных).
+    """
+    per_vector = {"float32": 4 * dim, "float16": 2 * dim, "int8": dim + 4}[dtype]
+    return per_vector * 10_000
+
+
+def recall_at_k(exact: np.ndarray, approx: np.ndarray, k: int) -> float:
+    """Считает recall@k приближённого поиска относительно точного float32.
+
+    Args:
+        exact: Эталонная матрица эмбеддингов float32 (n, dim).
+        approx: Восстановленная (деквантованная) матрица (n, dim).
+        k: Размер выдачи.
+
+    Returns:
+        Средняя доля совпадений top-k, если каждый документ использовать как запрос.
+    """
+    k = min(k, len(exact))
+    exact_top = np.argsort(-(exact @ exact.T), axis=1)[:, :k]
+    approx_top = np.argsort(-(exact @ approx.T), axis=1)[:, :k]
+    hits = [len(set(a) & set(b)) for a, b in zip(exact_top, approx_top)]
+    return float(np.mean(hits) / k)
+
+
+if __name__ == "__main__":
+    import json
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    bank_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(__file__), "..", "data", "junior_ml_interview_questions_ru.json"
+    )
+    with open(bank_path, "r", encoding="utf-8") as f:
+        bank = json.load(f)
+
+    texts = [f"Секция: {item['section']}\nВопрос: {item['question']}" for item in bank]
+    encoder = HuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        encode_kwargs={"normalize_embeddings": True},
+    )
+    exact = np.asarray(encoder.embed_documents(texts), dtype=np.float32)
+    dim = exact.shape[1]
+
+    report = {"questions": len(texts), "dim": dim, "float32_bytes_per_10k": bytes_per_10k(dim, "float32")}
+    for dtype in SUPPORTED_DTYPES:
+        store = QuantizedVectorStore(dtype=dtype)
+        store.add_documents(texts, [{} for _ in texts], [str(i) for i in range(len(texts))], embeddings=exact)
+        approx = store.get_documents([str(i) for i in range(len(texts))])["embeddings"]
+        report[dtype] = {
+            "bytes_per_10k": bytes_per_10k(dim, dtype),
+            "recall@5": round(recall_at_k(exact, approx, 5), 4),
+            "recall@10": round(recall_at_k(exact, approx, 10), 4),
+        }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
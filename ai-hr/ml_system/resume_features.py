@@ -0,0 +1,248 @@
+"""Предвычисленные признаки резюме для быстрого повторного ранжирования.
+
+Признаки извлекаются из текста резюме один раз (при первой оценке
+загруженного резюме) и хранятся в документе пользователя:
+
+  * битовая маска навыков по глобальному словарю `SkillVocabulary`;
+  * стаж в годах;
+  * уровень образования.
+
+Словарь навыков только дополняется (append-only): индекс навыка никогда не
+меняется, поэтому маска, построенная по словарю размера N, остаётся верной
+для всех навыков с индексом < N. Навыки, добавленные в словарь позже,
+требуют пересчёта признаков — это проверяет `features_cover`. Индексы
+имеют смысл только в пределах одного словаря, поэтому признаки помечаются
+его идентификатором (`vocab_id`): словарь в памяти после перезапуска
+нумерует навыки заново, и старые признаки не принимаются.
+"""
+
+import base64
+import logging
+import re
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ml_system.skill_matcher import SkillAutomaton, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Версия формата признаков: увеличивается при изменении правил извлечения.
+FEATURES_VERSION = 2
+
+_EXPERIENCE_RE = re.compile(r'опыт работы\s*---\s*(\d+)\s*(?:лет|год|года)\s*(\d+)?')
+
+
+def extract_experience(text: str) -> float:
+    """Извлекает стаж работы из сырого текста резюме.
+
+    Ожидает паттерн вида: "опыт работы --- <годы> лет <месяцы>".
+
+    Args:
+        text: Текст резюме.
+
+    Returns:
+        Оцененный стаж в годах (с учетом месяцев).
+    """
+    match = _EXPERIENCE_RE.search(text.lower())
+    if match:
+        years = int(match.group(1))
+        months = int(match.group(2)) if match.group(2) else 0
+        return round(years + months / 12, 1)
+    return 0.0
+
+
+def extract_education(text: str) -> str:
+    """Извлекает уровень образования из текста резюме.
+
+    Args:
+        text: Текст резюме.
+
+    Returns:
+        Нормализованное значение уровня образования.
+    """
+    text_lower = text.lower()
+    if "высшее" in text_lower:
+        return "высшее"
+    elif "среднее специальное" in text_lower or "колледж" in text_lower:
+        return "среднее специальное"
+    return "не указано"
+
+
+class SkillVocabulary:
+    """
+    Глобальный append-only словарь навыков.
+
+    Навыки хранятся в нормализованном виде (`normalize_text`), синонимы
+    раскрываются автоматом, поэтому "Python" и "python" — один столбец.
+    Может синхронизироваться с коллекцией MongoDB (один документ со списком
+    навыков, дополняемым через `$addToSet`), чтобы индексы совпадали во всех
+    процессах.
+
+    Attributes:
+        skills: Нормализованные навыки в порядке добавления.
+        identity: Идентификатор словаря: общий для процессов с одной коллекцией
+            MongoDB, случайный для словаря в памяти.
+    """
+
+    _DOCUMENT_ID = "global"
+
+    def __init__(self, skills: Optional[Iterable[str]] = None, collection: Any = None) -> None:
+        """
+        Args:
+            skills: Начальный список навыков.
+            collection: Коллекция MongoDB для хранения словаря (опционально).
+        """
+        self.collection = collection
+        self.skills: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._automaton: Optional[SkillAutomaton] = None
+        self._lock = threading.Lock()
+        self.identity = uuid.uuid4().hex
+        if collection is not None:
+            self._ensure_identity()
+            self._reload()
+        if skills:
+            self.extend(skills)
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def _append_local(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            if key not in self._index:
+                self._index[key] = len(self.skills)
+                self.skills.append(key)
+                self._automaton = None
+
+    def _ensure_identity(self) -> None:
+        # Идентификатор задаётся один раз: первым процессом, создавшим документ (или дополнившим старый документ без него)
+        self.collection.update_one(
+            {"_id": self._DOCUMENT_ID},
+            {"$setOnInsert": {"skills": [], "identity": self.identity}},
+            upsert=True,
+        )
+        self.collection.update_one(
+            {"_id": self._DOCUMENT_ID, "identity": {"$exists": False}},
+            {"$set": {"identity": self.identity}},
+        )
+
+    def _reload(self) -> None:
+        document = self.collection.find_one({"_id": self._DOCUMENT_ID}) or {}
+        self.identity = document.get("identity", self.identity)
+        stored = document.get("skills") or []
+        if stored[:len(self.skills)] != self.skills:
+            raise RuntimeError("Словарь навыков в MongoDB не совпадает с локальным (нарушен порядок append-only)")
+        self._append_local(stored[len(self.skills):])
+
+    def refresh(self) -> None:
+        """Подтягивает навыки, добавленные другими процессами (только при хранении в MongoDB)."""
+        if self.collection is None:
+            return
+        with self._lock:
+            self._reload()
+
+    def index(self, skill: str) -> Optional[int]:
+        """Возвращает индекс навыка в словаре или None."""
+        return self._index.get(normalize_text(skill))
+
+    def extend(self, skills: Iterable[str]) -> List[str]:
+        """Добавляет в словарь отсутствующие навыки.
+
+        Args:
+            skills: Навыки в любом написании.
+
+        Returns:
+            Список добавленных нормализованных навыков.
+        """
+        keys = [normalize_text(s) for s in skills if isinstance(s, str) and s.strip()]
+        with self._lock:
+            new_keys = list(dict.fromkeys(key for key in keys if key not in self._index))
+            if not new_keys:
+                return []
+            if self.collection is not None:
+                self.collection.update_one(
+                    {"_id": self._DOCUMENT_ID},
+                    {"$addToSet": {"skills": {"$each": new_keys}}},
+                    upsert=True,
+                )
+                self._reload()
+            else:
+                self._append_local(new_keys)
+        logger.info(f"Словарь навыков дополнен: +{len(new_keys)} (всего {len(self.skills)})")
+        return new_keys
+
+    def automaton(self) -> SkillAutomaton:
+        """Возвращает автомат по всему словарю (перестраивается после дополнения)."""
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = SkillAutomaton(self.skills)
+            return self._automaton
+
+
+def pack_skill_bits(indices: Iterable[int], size: int) -> str:
+    """Упаковывает индексы найденных навыков в битовую маску (base64)."""
+    bits = np.zeros(size, dtype=np.uint8)
+    bits[list(indices)] = 1
+    return base64.b64encode(np.packbits(bits).tobytes()).decode("ascii")
+
+
+def unpack_skill_bits(encoded: str, size: int) -> np.ndarray:
+    """Распаковывает битовую маску навыков в булев массив длины `size`."""
+    packed = np.frombuffer(base64.b64decode(encoded), dtype=np.uint8)
+    return np.unpackbits(packed, count=size).astype(bool)
+
+
+def extract_resume_features(text: str, vocabulary: SkillVocabulary) -> Dict[str, Any]:
+    """Извлекает признаки резюме за один проход по тексту.
+
+    Args:
+        text: Текст резюме.
+        vocabulary: Глобальный словарь навыков.
+
+    Returns:
+        Словарь признаков: `version`, `vocab_id`, `vocab_size`, `skill_bits`,
+        `experience_years`, `education`. Пригоден для хранения в MongoDB и
+        передачи в JSON.
+    """
+    automaton = vocabulary.automaton()
+    size = len(automaton.skills)
+    found = automaton.find(text or "")
+    return {
+        "version": FEATURES_VERSION,
+        "vocab_id": vocabulary.identity,
+        "vocab_size": size,
+        "skill_bits": pack_skill_bits((vocabulary.index(skill) for skill in found), size),
+        "experience_years": extract_experience(text or ""),
+        "education": extract_education(text or ""),
+    }
+
+
+def features_cover(features: Optional[Dict[str, Any]], vocabulary: SkillVocabulary, skills: Iterable[str]) -> bool:
+    """Проверяет, что признаки актуальны и содержат все указанные навыки.
+
+    Args:
+        features: Признаки резюме (или None).
+        vocabulary: Глобальный словарь навыков.
+        skills: Навыки вакансии.
+
+    Returns:
+        True, если признаки можно использовать без повторного разбора текста.
+    """
+    if not features or features.get("version") != FEATURES_VERSION:
+        return False
+    if features.get("vocab_id") != vocabulary.identity:
+        return False
+    size = features.get("vocab_size", 0)
+    if size > len(vocabulary):
+        # Словарь дополнен другим процессом после загрузки
+        vocabulary.refresh()
+        if size > len(vocabulary):
+            return False
+    for skill in skills:
+        index = vocabulary.index(skill)
+        if index is None or index >= size:
+            return False
+    return True
@@ -1,8 +1,14 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
+import hashlib
 import chromadb
-from langchain_huggingface import HuggingFaceEmbeddings
+import numpy as np
 import logging
 
+from langchain_core.embeddings import Embeddings
+from ml_system.encoders import get_shared_embeddings
+from ml_system.lexical_index import BM25Index, reciprocal_rank_fusion
+from ml_system.quantized_store import QuantizedVectorStore
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -14,6 +20,9 @@ logging.getLogger("backoff").propagate = False
 logging.getLogger("backoff").handlers.clear()
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
+# Глубина каждого ранжирования (BM25 и векторного), участвующая в RRF-слиянии
+HYBRID_RANK_WINDOW = 10
+
 
 class ChromaDBVectorStore:
     """
@@ -43,7 +52,13 @@ class ChromaDBVectorStore:
             logger.exception(f"Критическая ошибка ChromaDB: {e}")
             raise
     
-    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]) -> None:
+    def add_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> None:
         """
         Добавляет документы в коллекцию.
 
@@ -51,19 +66,28 @@ class ChromaDBVectorStore:
             documents: Список текстов документов.
             metadatas: Список словарей с метаданными для каждого документа.
             ids: Список уникальных идентификаторов документов.
+            embeddings: Готовые эмбеддинги документов (опционально). Если не заданы,
+                ChromaDB посчитает их собственной функцией эмбеддингов.
         """
         try:
             self.collection.add(
                 documents=documents,
                 metadatas=metadatas,
-                ids=ids
+                ids=ids,
+                embeddings=embeddings
             )
             logger.info(f"Добавлено {len(documents)} документов в коллекцию '{self.collection_name}'")
         except Exception as e:
             logger.exception(f"Ошибка при добавлении документов: {e}")
             raise
     
-    def query(self, query_text: str, n_results: int = 5, where_filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 5,
+        where_filter: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
         """
         Выполняет семантический поиск по коллекции.
 
@@ -71,20 +95,69 @@ class ChromaDBVectorStore:
             query_text: Текст запроса.
             n_results: Количество результатов.
             where_filter: Фильтр по метаданным (опционально).
+            query_embedding: Готовый эмбеддинг запроса (опционально, имеет приоритет над текстом).
 
         Returns:
-            Словарь с полями `documents`, `metadatas`, `distances`.
+            Словарь с полями `ids`, `documents`, `metadatas`, `distances`.
         """
         try:
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results,
-                where=where_filter
-            )
+            if query_embedding is not None:
+                results = self.collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_results,
+                    where=where_filter
+                )
+            else:
+                results = self.collection.query(
+                    query_texts=[query_text],
+                    n_results=n_results,
+                    where=where_filter
+                )
             return results
         except Exception as e:
             logger.exception(f"Ошибка при поиске: {e}")
-            return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+    def get_documents(self, ids: List[str], where_filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Возвращает документы коллекции по идентификаторам вместе с эмбеддингами.
+
+        Args:
+            ids: Идентификаторы документов.
+            where_filter: Фильтр по метаданным (опционально).
+
+        Returns:
+            Словарь с полями `ids`, `documents`, `metadatas`, `embeddings`.
+        """
+        try:
+            return self.collection.get(
+                ids=ids,
+                where=where_filter,
+                include=["documents", "metadatas", "embeddings"]
+            )
+        except Exception as e:
+            logger.exception(f"Ошибка при получении документов: {e}")
+            return {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+
+    def existing_ids(self) -> Set[str]:
+        """Возвращает множество идентификаторов документов коллекции."""
+        return set(self.collection.get(include=[])["ids"])
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """
+        Удаляет документы из коллекции.
+
+        Args:
+            ids: Идентификаторы удаляемых документов.
+        """
+        if not ids:
+            return
+        try:
+            self.collection.delete(ids=ids)
+            logger.info(f"Удалено {len(ids)} документов из коллекции '{self.collection_name}'")
+        except Exception as e:
+            logger.exception(f"Ошибка при удалении документов: {e}")
+            raise
 
 
 class InterviewKnowledgeSystemHF:
@@ -93,6 +166,8 @@ class InterviewKnowledgeSystemHF:
 
     Подготавливает текстовые документы (вопросы/ответы), эмбеддит их и помещает
     в векторное хранилище; предоставляет семантический поиск по базе знаний.
+    Энкодер общий для процесса (см. `get_shared_embeddings`) и может исполняться
+    через PyTorch или ONNX Runtime.
     """
     
     def __init__(
@@ -100,6 +175,13 @@ class InterviewKnowledgeSystemHF:
         persist_directory: str = "./interview_db",
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         collection_name: str = "interview_questions_hf",
+        lexical_prefilter: bool = True,
+        lexical_candidates: int = 50,
+        embedding_dtype: str = "float32",
+        encoder_backend: str = "torch",
+        encoder_threads: Optional[int] = None,
+        encoder_quantized: bool = False,
+        embeddings: Optional[Embeddings] = None,
     ) -> None:
         """Инициализирует подсистему знаний на базе HuggingFace и ChromaDB.
 
@@ -107,62 +189,162 @@ class InterviewKnowledgeSystemHF:
             persist_directory: Путь к директории хранилища ChromaDB.
             model_name: Имя модели HuggingFace для генерации эмбеддингов.
             collection_name: Название коллекции ChromaDB.
+            lexical_prefilter: Включает BM25-префильтр и гибридное ранжирование.
+            lexical_candidates: Размер множества кандидатов BM25 для векторного ранжирования.
+            embedding_dtype: Формат хранения эмбеддингов банка: "float32" (ChromaDB + HNSW),
+                "float16" или "int8" (компактное `QuantizedVectorStore` с точным поиском).
+            encoder_backend: Бэкенд энкодера: "torch" (sentence-transformers) или "onnx" (ONNX Runtime).
+            encoder_threads: Число потоков ONNX Runtime для энкодера (None — по умолчанию бэкенда;
+                потоки PyTorch задаются для процесса через `configure_torch_threads`).
+            encoder_quantized: Использовать int8-квантованную ONNX-модель.
+            embeddings: Готовый энкодер (параметры encoder_* тогда не используются).
         """
-        logger.info(f"Инициализация HuggingFace модели: {model_name}")
-        logger.info("Первый запуск может занять время для загрузки модели...")
-        
-        model_kwargs = {
-            'device': 'cpu',
-            'model_kwargs': {
-                'trust_remote_code': True
-            }
-        }
-        
-        encode_kwargs = {
-            'normalize_embeddings': True,
-            'batch_size': 32
-        }
-        
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=model_name,
-            model_kwargs=model_kwargs,
-            encode_kwargs=encode_kwargs,
-            show_progress=True
-        )
+        if embeddings is not None:
+            self.embeddings = embeddings
+        else:
+            logger.info(f"Инициализация энкодера ({encoder_backend}): {model_name}")
+            logger.info("Первый запуск может занять время для загрузки модели...")
+            self.embeddings = get_shared_embeddings(
+                backend=encoder_backend,
+                model_name=model_name,
+                intra_op_threads=encoder_threads,
+                quantized=encoder_quantized,
+            )
         
-        self.vector_store = ChromaDBVectorStore(
-            persist_directory=persist_directory,
-            collection_name=collection_name
-        )
+        if embedding_dtype == "float32":
+            self.vector_store = ChromaDBVectorStore(
+                persist_directory=persist_directory,
+                collection_name=collection_name
+            )
+        else:
+            self.vector_store = QuantizedVectorStore(
+                collection_name=collection_name,
+                dtype=embedding_dtype
+            )
+
+        self.lexical_candidates = lexical_candidates
+        self.lexical_index: Optional[BM25Index] = BM25Index() if lexical_prefilter else None
         
         logger.info("Система инициализирована успешно!")
 
-    def add_knowledge_to_rag(self, chunks: List[Dict[str, Any]]) -> None:
-        """Добавляет фрагменты знаний в векторное хранилище RAG.
+    @staticmethod
+    def _prepare_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Нормализует фрагменты знаний и вычисляет для них контентные идентификаторы.
+
+        Идентификатор — хеш от секции и текста вопроса, поэтому не зависит от
+        позиции вопроса в банке: повторная загрузка того же банка даёт те же ID,
+        а дубликаты внутри банка схлопываются.
 
         Args:
             chunks: Элементы с ожидаемыми ключами: section (раздел/тема), question (вопрос).
+
+        Returns:
+            Упорядоченный словарь {doc_id: {"document", "metadata"}}.
         """
-        documents = []
-        metadatas = []
-        ids = []
-        
-        for i, chunk in enumerate(chunks):
+        prepared: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks or []:
             section = chunk.get('section', '').strip()
             question = chunk.get('question', '').strip()
             if not section or not question:
                 continue
 
-            doc_text = f"Секция: {section}\nВопрос: {question}"
-            
-            documents.append(doc_text.strip())
-            metadatas.append({
-                "section": section,
-                "question": question
-            })
-            ids.append(f"question_{i}_{section}")
-        
-        self.vector_store.add_documents(documents, metadatas, ids)
+            digest = hashlib.sha1(f"{section}\n{question}".encode("utf-8")).hexdigest()[:20]
+            prepared[f"question_{digest}"] = {
+                "document": f"Секция: {section}\nВопрос: {question}",
+                "metadata": {
+                    "section": section,
+                    "question": question
+                },
+            }
+        return prepared
+
+    def _add_prepared(self, prepared: Dict[str, Dict[str, Any]], ids: List[str], batch_size: int) -> None:
+        """Эмбеддит и добавляет документы пачками ограниченного размера."""
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
+            documents = [prepared[doc_id]["document"] for doc_id in batch_ids]
+            metadatas = [prepared[doc_id]["metadata"] for doc_id in batch_ids]
+
+            embeddings = self.embeddings.embed_documents(documents)
+            self.vector_store.add_documents(documents, metadatas, batch_ids, embeddings=embeddings)
+
+            if self.lexical_index is not None:
+                self.lexical_index.add_documents(batch_ids, documents)
+
+    def _index_unchanged(self, ids: List[str], batch_size: int) -> None:
+        """Добавляет в лексический индекс документы, которые уже есть в хранилище, но не в индексе.
+
+        Нужен для предзаполненной или общей коллекции: такие документы не эмбеддятся
+        заново, а их тексты берутся из векторного хранилища.
+        """
+        if self.lexical_index is None:
+            return
+        missing = [doc_id for doc_id in ids if doc_id not in self.lexical_index]
+        for start in range(0, len(missing), batch_size):
+            stored = self.vector_store.get_documents(missing[start:start + batch_size])
+            self.lexical_index.add_documents(list(stored.get("ids") or []), list(stored.get("documents") or []))
+
+    def _delete_ids(self, ids: List[str], batch_size: int) -> None:
+        """Удаляет документы из векторного и лексического индексов пачками."""
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
+            self.vector_store.delete_documents(batch_ids)
+            if self.lexical_index is not None:
+                for doc_id in batch_ids:
+                    self.lexical_index.remove_document(doc_id)
+
+    def add_knowledge_to_rag(self, chunks: List[Dict[str, Any]], batch_size: int = 256) -> int:
+        """Добавляет фрагменты знаний в векторное хранилище RAG (идемпотентно).
+
+        Эмбеддятся и добавляются только вопросы, которых ещё нет в хранилище;
+        уже сохранённые вопросы добавляются в лексический индекс, если их там нет.
+
+        Args:
+            chunks: Элементы с ожидаемыми ключами: section (раздел/тема), question (вопрос).
+            batch_size: Максимальный размер пачки при эмбеддинге и записи.
+
+        Returns:
+            Количество добавленных вопросов.
+        """
+        prepared = self._prepare_chunks(chunks)
+        existing = self.vector_store.existing_ids()
+        new_ids = [doc_id for doc_id in prepared if doc_id not in existing]
+        self._index_unchanged([doc_id for doc_id in prepared if doc_id in existing], batch_size)
+        self._add_prepared(prepared, new_ids, batch_size)
+        return len(new_ids)
+
+    def sync_knowledge(self, chunks: List[Dict[str, Any]], batch_size: int = 256) -> Dict[str, int]:
+        """Приводит хранилище в соответствие с банком вопросов (diff-upsert).
+
+        Вычисляет разницу между текущим содержимым и переданным банком: новые и
+        изменённые вопросы эмбеддятся и добавляются, удалённые — удаляются,
+        неизменные не затрагиваются. Стоимость пропорциональна числу изменений,
+        а не размеру банка.
+
+        Args:
+            chunks: Полный банк вопросов (section, question).
+            batch_size: Максимальный размер пачки при эмбеддинге, записи и удалении.
+
+        Returns:
+            Статистика: {"added", "removed", "unchanged"}.
+        """
+        prepared = self._prepare_chunks(chunks)
+        existing = self.vector_store.existing_ids()
+
+        new_ids = [doc_id for doc_id in prepared if doc_id not in existing]
+        removed_ids = [doc_id for doc_id in existing if doc_id not in prepared]
+
+        self._delete_ids(removed_ids, batch_size)
+        self._index_unchanged([doc_id for doc_id in prepared if doc_id in existing], batch_size)
+        self._add_prepared(prepared, new_ids, batch_size)
+
+        stats = {
+            "added": len(new_ids),
+            "removed": len(removed_ids),
+            "unchanged": len(prepared) - len(new_ids),
+        }
+        logger.info(f"Синхронизация базы знаний: {stats}")
+        return stats
 
     def search_questions(self, query: str, grade: Optional[str] = None, section: Optional[str] = None, k: int = 3) -> List[Dict[str, Any]]:
         """Выполняет семантический поиск релевантных вопросов.
@@ -181,15 +363,91 @@ class InterviewKnowledgeSystemHF:
             where_filter["grade"] = grade
         if section:
             where_filter["section"] = section
+        if len(where_filter) > 1:
+            where_filter = {"$and": [{key: value} for key, value in where_filter.items()]}
+
+        query_embedding = self.embeddings.embed_query(query)
+
+        if self.lexical_index is not None and len(self.lexical_index) > 0:
+            hybrid_results = self._hybrid_search(query, query_embedding, where_filter or None, k)
+            if hybrid_results is not None:
+                return hybrid_results
         
         results = self.vector_store.query(
             query_text=query,
             n_results=k,
-            where_filter=where_filter if where_filter else None
+            where_filter=where_filter if where_filter else None,
+            query_embedding=query_embedding
         )
         
         return self._format_search_results(results)
 
+    def _hybrid_search(
+        self,
+        query: str,
+        query_embedding: List[float],
+        where_filter: Optional[Dict[str, Any]],
+        k: int,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Гибридный поиск: BM25-префильтр, векторное ранжирование кандидатов и RRF-слияние.
+
+        Кандидаты — объединение топа BM25 и ближайших соседей векторного поиска:
+        документ без общих с запросом терминов (перефразировка, другой язык) тоже
+        попадает в ранжирование, если он ближе всех по смыслу. Векторная близость
+        считается только для этих кандидатов. В RRF каждое ранжирование участвует
+        первыми `max(k, HYBRID_RANK_WINDOW)` позициями, иначе слабые лексические
+        совпадения всегда получали бы вклад от обоих списков и вытесняли бы
+        семантических соседей.
+
+        Args:
+            query: Текст запроса.
+            query_embedding: Нормализованный эмбеддинг запроса.
+            where_filter: Фильтр по метаданным (опционально).
+            k: Количество возвращаемых результатов.
+
+        Returns:
+            Список результатов в формате `_format_search_results` или None,
+            если ни один терм запроса не найден в лексическом индексе.
+        """
+        lexical_hits = self.lexical_index.search(query, limit=max(self.lexical_candidates, k))
+        if not lexical_hits:
+            return None
+
+        rank_window = max(k, HYBRID_RANK_WINDOW)
+        nearest = self.vector_store.query(
+            query_text=query,
+            n_results=rank_window,
+            where_filter=where_filter,
+            query_embedding=query_embedding
+        )
+        nearest_ids = (nearest.get('ids') or [[]])[0]
+        candidate_request = list(dict.fromkeys([doc_id for doc_id, _ in lexical_hits] + list(nearest_ids)))
+
+        candidates = self.vector_store.get_documents(candidate_request, where_filter)
+        candidate_ids = list(candidates.get("ids") or [])
+        if not candidate_ids:
+            return None
+
+        matrix = np.asarray(candidates["embeddings"], dtype=np.float32)
+        similarities = matrix @ np.asarray(query_embedding, dtype=np.float32)
+        similarity_by_id = dict(zip(candidate_ids, similarities.tolist()))
+        position_by_id = {doc_id: i for i, doc_id in enumerate(candidate_ids)}
+
+        lexical_ranking = [doc_id for doc_id, _ in lexical_hits if doc_id in position_by_id][:rank_window]
+        vector_ranking = sorted(candidate_ids, key=lambda doc_id: similarity_by_id[doc_id], reverse=True)[:rank_window]
+        fused = reciprocal_rank_fusion([lexical_ranking, vector_ranking])
+
+        formatted_results: List[Dict[str, Any]] = []
+        for doc_id, _ in fused[:k]:
+            i = position_by_id[doc_id]
+            formatted_results.append({
+                'content': candidates['documents'][i],
+                'metadata': candidates['metadatas'][i] if candidates.get('metadatas') else {},
+                'distance': 1.0 - similarity_by_id[doc_id],
+            })
+
+        return formatted_results
+
     def _format_search_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Приводит ответ ChromaDB к унифицированному виду.
 
@@ -0,0 +1,297 @@
+"""Бенчмарк поиска вопросов в базе знаний интервью.
+
+Строит синтетические банки вопросов (от сотен до сотен тысяч) на основе
+`data/junior_ml_interview_questions_ru.json` с перефразированием и прогоняет
+`InterviewKnowledgeSystemHF.search_questions` и
+`InterviewAssistantHF.get_questions_for_topic` по комбинациям бэкендов
+хранилища, лексического префильтра и фильтров по метаданным.
+
+Для каждой конфигурации отчёт содержит время построения индекса,
+p50/p99 задержки запроса, память и recall@k относительно точного
+float32-поиска. Эмбеддинги банка и запросов кешируются, поэтому задержки
+отражают только стоимость индекса и ранжирования. Результат — JSON, пригодный для сравнения между запусками:
+
+    python -m ml_system.retrieval_benchmark --sizes 100 1000 10000 --output bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ml_system.retrieva import InterviewAssistantHF, InterviewKnowledgeSystemHF
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BANK = os.path.join(os.path.dirname(__file__), "..", "data", "junior_ml_interview_questions_ru.json")
+
+_PREFIXES = (
+    "", "Объясните: ", "Расскажите, ", "Как бы вы ответили: ", "Вопрос на собеседовании: ",
+    "Опишите своими словами: ", "Коротко: ", "На практике: ",
+)
+_SUFFIXES = (
+    "", " Приведите пример.", " Где это применяется?", " Какие есть подводные камни?",
+    " Как это проверить на практике?", " Сравните с альтернативами.",
+)
+_SYNONYMS = {
+    "Что такое": "Дайте определение:",
+    "Чем": "В чём разница, чем",
+    "Как": "Каким образом",
+    "зачем": "для чего",
+    "когда": "в каких случаях",
+    "модели": "алгоритма",
+    "данных": "датасета",
+}
+
+
+class CachedEmbeddings(Embeddings):
+    """Обёртка над энкодером, которая кодирует каждый текст не более одного раза.
+
+    Позволяет сравнивать конфигурации индекса, не тратя время на повторное
+    кодирование одного и того же банка.
+    """
+
+    def __init__(self, encoder: Embeddings) -> None:
+        self.encoder = encoder
+        self._cache: Dict[str, List[float]] = {}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        missing = list(dict.fromkeys(text for text in texts if text not in self._cache))
+        if missing:
+            for text, vector in zip(missing, self.encoder.embed_documents(missing)):
+                self._cache[text] = vector
+        return [self._cache[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if text not in self._cache:
+            self._cache[text] = self.encoder.embed_query(text)
+        return self._cache[text]
+
+
+def paraphrase(question: str, variant: int) -> str:
+    """Детерминированно перефразирует вопрос (префикс, синонимы, суффикс)."""
+    text = question
+    if variant % 3 == 1:
+        for source, target in _SYNONYMS.items():
+            if source in text:
+                text = text.replace(source, target, 1)
+                break
+    prefix = _PREFIXES[variant % len(_PREFIXES)]
+    suffix = _SUFFIXES[(variant // len(_PREFIXES)) % len(_SUFFIXES)]
+    if prefix and text:
+        text = text[0].lower() + text[1:]
+    return f"{prefix}{text}{suffix}"
+
+
+def build_bank(seed_bank: List[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    """Строит синтетический банк заданного размера перефразированием исходного.
+
+    Варианты, не давшие нового текста, дополняются номером версии, чтобы все
+    вопросы банка были уникальны.
+
+    Args:
+        seed_bank: Исходные вопросы (section, question).
+        size: Требуемое число вопросов.
+
+    Returns:
+        Список вопросов (section, question).
+    """
+    bank: List[Dict[str, Any]] = []
+    seen = set()
+    variant = 0
+    while len(bank) < size:
+        for item in seed_bank:
+            question = paraphrase(item["question"], variant)
+            if question in seen:
+                question = f"{question} (вариант {variant})"
+            seen.add(question)
+            bank.append({"section": item["section"], "question": question})
+            if len(bank) >= size:
+                break
+        variant += 1
+    return bank
+
+
+def build_queries(seed_bank: List[Dict[str, Any]], n_queries: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """Формирует запросы: названия секций и перефразированные вопросы (запрос, секция)."""
+    sections = sorted({item["section"] for item in seed_bank})
+    queries = [(section, section) for section in sections]
+    for item in rng.sample(seed_bank, min(n_queries, len(seed_bank))):
+        queries.append((paraphrase(item["question"], rng.randrange(1, 40)), item["section"]))
+    return queries[:max(n_queries, len(sections))]
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 3) if values else 0.0
+
+
+def _exact_top_k(matrix: np.ndarray, query_vec: np.ndarray, mask: Optional[np.ndarray], k: int) -> List[int]:
+    scores = matrix @ query_vec
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    k = min(k, int(mask.sum()) if mask is not None else len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])].tolist()
+
+
+def run_config(
+    bank: List[Dict[str, Any]],
+    queries: List[Tuple[str, str]],
+    encoder: CachedEmbeddings,
+    embedding_dtype: str,
+    lexical_prefilter: bool,
+    k: int,
+) -> Dict[str, Any]:
+    """Строит индекс одной конфигурации и измеряет задержки и recall@k.
+
+    Args:
+        bank: Банк вопросов.
+        queries: Пары (текст запроса, секция для фильтра).
+        encoder: Энкодер с кешем эмбеддингов банка.
+        embedding_dtype: Формат хранения ("float32" — ChromaDB, "float16", "int8").
+        lexical_prefilter: Включать ли BM25-префильтр.
+        k: Размер выдачи.
+
+    Returns:
+        Словарь с метриками конфигурации.
+    """
+    rss_before = _rss_bytes()
+    system = InterviewKnowledgeSystemHF(
+        collection_name=f"bench_{uuid.uuid4().hex[:12]}",
+        lexical_prefilter=lexical_prefilter,
+        embedding_dtype=embedding_dtype,
+        embeddings=encoder,
+    )
+    assistant = InterviewAssistantHF(system)
+
+    start = time.perf_counter()
+    system.sync_knowledge(bank, batch_size=1024)
+    build_seconds = time.perf_counter() - start
+    rss_after = _rss_bytes()
+
+    prepared = InterviewKnowledgeSystemHF._prepare_chunks(bank)
+    ids = list(prepared)
+    key_to_id = {(p["metadata"]["section"], p["metadata"]["question"]): doc_id for doc_id, p in prepared.items()}
+    matrix = np.asarray(encoder.embed_documents([prepared[doc_id]["document"] for doc_id in ids]), dtype=np.float32)
+    sections = np.asarray([prepared[doc_id]["metadata"]["section"] for doc_id in ids])
+
+    result: Dict[str, Any] = {
+        "embedding_dtype": embedding_dtype,
+        "lexical_prefilter": lexical_prefilter,
+        "index_build_s": round(build_seconds, 3),
+        "rss_delta_mb": round((rss_after - rss_before) / 2**20, 2) if rss_before and rss_after else None,
+    }
+    if hasattr(system.vector_store, "memory_bytes"):
+        result["embedding_bytes"] = system.vector_store.memory_bytes()
+
+    for filter_name in ("none", "section"):
+        latencies: List[float] = []
+        recalls: List[float] = []
+        for query, section in queries:
+            query_vec = np.asarray(encoder.embed_query(query), dtype=np.float32)
+            section_filter = section if filter_name == "section" else None
+
+            start = time.perf_counter()
+            found = system.search_questions(query, section=section_filter, k=k)
+            latencies.append(time.perf_counter() - start)
+
+            mask = sections == section if section_filter else None
+            exact = {ids[i] for i in _exact_top_k(matrix, query_vec, mask, k)}
+            found_ids = {
+                key_to_id.get((item["metadata"].get("section"), item["metadata"].get("question")))
+                for item in found
+            }
+            if exact:
+                recalls.append(len(exact & found_ids) / len(exact))
+
+        result[f"search_{filter_name}"] = {
+            "p50_ms": _percentile(latencies, 50),
+            "p99_ms": _percentile(latencies, 99),
+            f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else None,
+        }
+
+    topic_latencies: List[float] = []
+    for query, _ in queries:
+        start = time.perf_counter()
+        assistant.get_questions_for_topic(query, count=k)
+        topic_latencies.append(time.perf_counter() - start)
+    result["get_questions_for_topic"] = {
+        "p50_ms": _percentile(topic_latencies, 50),
+        "p99_ms": _percentile(topic_latencies, 99),
+    }
+
+    client = getattr(system.vector_store, "client", None)
+    if client is not None:
+        client.delete_collection(system.vector_store.collection_name)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска вопросов InterviewKnowledgeSystemHF")
+    parser.add_argument("--bank", default=DEFAULT_BANK)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--encoder-backend", default="torch", choices=["torch", "onnx"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Путь для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    for name in ("ml_system.retrieva", "ml_system.quantized_store", "chromadb"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        seed_bank = json.load(f)
+
+    from ml_system.encoders import get_shared_embeddings
+
+    rng = random.Random(args.seed)
+    queries = build_queries(seed_bank, args.queries, rng)
+    report: Dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "encoder_backend": args.encoder_backend,
+        "k": args.k,
+        "queries": len(queries),
+        "runs": [],
+    }
+
+    for size in args.sizes:
+        bank = build_bank(seed_bank, size)
+        encoder = CachedEmbeddings(get_shared_embeddings(backend=args.encoder_backend))
+        start = time.perf_counter()
+        encoder.embed_documents([p["document"] for p in InterviewKnowledgeSystemHF._prepare_chunks(bank).values()])
+        encode_seconds = time.perf_counter() - start
+
+        for dtype in args.dtypes:
+            for lexical_prefilter in (False, True):
+                run = run_config(bank, queries, encoder, dtype, lexical_prefilter, args.k)
+                run.update({"bank_size": size, "encode_s": round(encode_seconds, 3)})
+                report["runs"].append(run)
+                logger.info(json.dumps(run, ensure_ascii=False))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Пакетный скрининг папки резюме (PDF/DOCX/TXT) против вакансии.
+
+Разбор документов и эвристическая оценка (CPU) выполняются в пуле процессов,
+запросы к LLM — через ограниченный асинхронный пул в основном процессе.
+Результаты пишутся построчно в JSONL по мере готовности, поэтому прерванный
+запуск продолжается с места остановки: уже записанные файлы пропускаются.
+
+    python -m ml_system.screening resumes/ --vacancy vacancy.json --output results.jsonl --workers 8
+    python -m ml_system.screening resumes/ --vacancy-id 66f0c... --use-llm --llm-concurrency 16
+    python -m ml_system.screening resumes/ --vacancy vacancy.json --use-llm --tiered
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from ml_system.job_matching import FlexibleResumeMatcher, matcher_from_vacancy
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+DEFAULT_PARSER_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "backend", "app", "parser", "parser.py")
+
+# Состояние процесса-воркера: парсер и матчер создаются один раз на процесс.
+_worker_matcher: Optional[FlexibleResumeMatcher] = None
+_worker_parser_cls = None
+
+
+def load_document_parser(parser_path: str = DEFAULT_PARSER_PATH):
+    """Загружает `DocumentParser` из модуля backend по пути к файлу.
+
+    Args:
+        parser_path: Путь к `backend/app/parser/parser.py`.
+
+    Returns:
+        Класс `DocumentParser` или None, если модуль недоступен (тогда
+        поддерживаются только текстовые файлы).
+    """
+    if not os.path.exists(parser_path):
+        logger.warning(f"DocumentParser не найден ({parser_path}), будут обработаны только .txt/.md")
+        return None
+    try:
+        spec = importlib.util.spec_from_file_location("resume_document_parser", parser_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except Exception as e:
+        logger.warning(f"Не удалось загрузить DocumentParser ({e}), будут обработаны только .txt/.md")
+        return None
+    return module.DocumentParser
+
+
+def _init_worker(vacancy: Dict[str, Any], weights: Optional[Dict[str, float]], parser_path: str) -> None:
+    global _worker_matcher, _worker_parser_cls
+    _worker_matcher = matcher_from_vacancy(vacancy, weights)
+    _worker_parser_cls = load_document_parser(parser_path)
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.lower().endswith((".txt", ".md")):
+        return data.decode("utf-8", errors="ignore").strip()
+    if _worker_parser_cls is None:
+        raise RuntimeError("DocumentParser недоступен для PDF/DOCX")
+    return _worker_parser_cls(source=os.path.basename(path)).parse_content(data) or ""
+
+
+def screen_file(path: str, keep_text: bool = False) -> Dict[str, Any]:
+    """Разбирает резюме и выполняет эвристическую оценку (выполняется в процессе-воркере).
+
+    Args:
+        path: Путь к файлу резюме.
+        keep_text: Вернуть текст резюме (нужен для последующей оценки LLM).
+
+    Returns:
+        Запись результата с таймингами (`parse_ms`, `rule_ms`).
+    """
+    record: Dict[str, Any] = {"file": path}
+    start = time.perf_counter()
+    try:
+        text = _read_text(path)
+    except Exception as e:
+        record.update({"error": f"Ошибка разбора: {e}", "parse_ms": round((time.perf_counter() - start) * 1000, 2)})
+        return record
+    record["parse_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    if not text:
+        record["error"] = "Не удалось извлечь текст"
+        return record
+
+    start = time.perf_counter()
+    result = _worker_matcher._fallback_rule_based(text)
+    record["rule_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    record.update({"text_chars": len(text), "total_score_percent": result["total_score_percent"], "details": result["details"], "scored_by": "rule_based"})
+    if keep_text:
+        record["text"] = text
+    return record
+
+
+def collect_files(folder: str) -> List[str]:
+    """Рекурсивно собирает поддерживаемые файлы резюме (в стабильном порядке)."""
+    files = []
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                files.append(os.path.join(root, name))
+    return sorted(files)
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """Возвращает множество файлов, уже записанных в выходной JSONL.
+
+    Недописанная последняя строка (запуск прерван во время записи) отрезается,
+    чтобы дозапись начиналась с новой строки.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.decode("utf-8").splitlines():
+        try:
+            done.add(json.loads(line)["file"])
+        except (ValueError, KeyError):
+            continue
+    return done
+
+
+async def screen_folder(
+    files: List[str],
+    vacancy: Dict[str, Any],
+    output_path: str,
+    weights: Optional[Dict[str, float]] = None,
+    workers: int = os.cpu_count() or 1,
+    use_llm: bool = False,
+    llm_concurrency: int = 8,
+    parser_path: str = DEFAULT_PARSER_PATH,
+    tiered: bool = False,
+) -> Dict[str, Any]:
+    """Оценивает файлы резюме и дописывает результаты в JSONL.
+
+    Args:
+        files: Файлы для обработки (уже без обработанных ранее).
+        vacancy: Документ вакансии (поля как в MongoDB).
+        output_path: Путь к выходному JSONL (открывается на дозапись).
+        weights: Веса критериев.
+        workers: Число процессов для разбора и эвристической оценки.
+        use_llm: Уточнять оценку через LLM.
+        llm_concurrency: Максимум одновременных запросов к LLM.
+        parser_path: Путь к модулю `DocumentParser`.
+        tiered: Обращаться к LLM только для резюме в зоне неопределённости.
+
+    Returns:
+        Сводка: число файлов, ошибок, длительность и пропускная способность.
+    """
+    loop = asyncio.get_running_loop()
+    matcher = matcher_from_vacancy(vacancy, weights)
+    matcher.tiered = tiered
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    queue: asyncio.Queue = asyncio.Queue()
+    for path in files:
+        queue.put_nowait(path)
+    stats = {"processed": 0, "errors": 0, "llm_calls": 0}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(vacancy, weights, parser_path)) as pool, \
+            open(output_path, "a", encoding="utf-8") as out:
+
+        async def consume() -> None:
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                file_start = time.perf_counter()
+                record = await loop.run_in_executor(pool, screen_file, path, use_llm)
+                text = record.pop("text", None)
+                if text is not None:
+                    # Эвристика уже посчитана в воркере: в многоуровневом режиме она решает, нужен ли LLM
+                    rule_result = {"total_score_percent": record["total_score_percent"], "details": record["details"]}
+                    async with llm_slots:
+                        llm_start = time.perf_counter()
+                        result = await matcher.aevaluate(text, rule_result=rule_result)
+                        record["llm_ms"] = round((time.perf_counter() - llm_start) * 1000, 2)
+                    record.update({
+                        "total_score_percent": result["total_score_percent"],
+                        "details": result["details"],
+                        "scored_by": result.get("scored_by", "rule_based"),
+                    })
+                    stats["llm_calls"] += int(record["scored_by"] == "llm")
+                record["total_ms"] = round((time.perf_counter() - file_start) * 1000, 2)
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats["processed"] += 1
+                stats["errors"] += int("error" in record)
+                if stats["processed"] % 500 == 0:
+                    logger.info(f"Обработано {stats['processed']}/{len(files)}")
+
+        # Потребителей больше, чем процессов, чтобы ожидание LLM не простаивало CPU-пул.
+        consumers = workers + (llm_concurrency if use_llm else 0)
+        await asyncio.gather(*(consume() for _ in range(max(1, min(consumers, len(files))))))
+
+    elapsed = time.perf_counter() - start
+    return {
+        **stats,
+        "elapsed_s": round(elapsed, 2),
+        "resumes_per_s": round(stats["processed"] / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def _load_vacancy(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.vacancy:
+        with open(args.vacancy, "r", encoding="utf-8") as f:
+            return json.load(f)
+    from bson import ObjectId
+    from pymongo import MongoClient
+
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://mongo:27017"))
+    vacancy = client.aihr_database.vacancies.find_one({"_id": ObjectId(args.vacancy_id)})
+    if vacancy is None:
+        raise SystemExit(f"Вакансия {args.vacancy_id} не найдена")
+    vacancy["_id"] = str(vacancy["_id"])
+    return {key: value for key, value in vacancy.items() if isinstance(value, (str, int, float, list, type(None)))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Пакетный скрининг резюме против вакансии (JSONL)")
+    parser.add_argument("folder", help="Папка с резюме (PDF/DOCX/TXT), обходится рекурсивно")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--vacancy", help="JSON-файл вакансии (required_skills, optional_skills, min_experience, ...)")
+    source.add_argument("--vacancy-id", help="ID вакансии в MongoDB (MONGO_URI)")
+    parser.add_argument("--output", default="screening_results.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--use-llm", action="store_true", help="Уточнять оценку через LLM (нужен OPENROUTER_API_KEY)")
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--tiered", action="store_true", help="Вызывать LLM только в зоне неопределённости (AI_HR_LLM_BAND)")
+    parser.add_argument("--weights", default=None, help="JSON с весами критериев")
+    parser.add_argument("--parser-path", default=DEFAULT_PARSER_PATH)
+    parser.add_argument("--restart", action="store_true", help="Игнорировать уже записанные результаты")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+    vacancy = _load_vacancy(args)
+    weights = json.loads(args.weights) if args.weights else None
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+
+    files = collect_files(args.folder)
+    done = load_checkpoint(args.output)
+    pending = [path for path in files if path not in done]
+    logger.info(f"Найдено {len(files)} резюме, уже обработано {len(files) - len(pending)}, к обработке {len(pending)}")
+    if not pending:
+        return
+
+    summary = asyncio.run(screen_folder(
+        pending,
+        vacancy,
+        args.output,
+        weights=weights,
+        workers=args.workers,
+        use_llm=args.use_llm,
+        llm_concurrency=args.llm_concurrency,
+        parser_path=args.parser_path,
+        tiered=args.tiered,
+    ))
+    logger.info(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Семантический поиск навыков вакансии в резюме по эмбеддингам.
+
+Дополняет точный поиск (`skill_matcher.SkillAutomaton`): находит навыки,
+упомянутые другими словами или на другом языке ("ML" — "машинное обучение",
+"PyTorch" — "torch"), без обращения к LLM.
+
+Навыки вакансии кодируются один раз в матрицу (S, dim); фразы резюме
+кодируются одним батчем в матрицу (P, dim). Матрица сходства (P, S)
+считается одним умножением, навык считается найденным, если максимум
+по фразам не ниже порога.
+"""
+
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Многоязычная модель: навыки и резюме встречаются и на русском, и на английском.
+DEFAULT_SKILL_MODEL = os.getenv("AI_HR_SKILL_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+DEFAULT_THRESHOLD = float(os.getenv("AI_HR_SKILL_THRESHOLD", "0.7"))
+
+# Разделители фраз: переводы строк, знаки препинания, маркеры списков и тире.
+_SEGMENT_RE = re.compile(r"[\n\r;,•·|()\[\]{}:]+|\.\s+|\s[-–—]\s")
+_WORD_RE = re.compile(r"[0-9a-zа-яё+#.\-/]+", re.IGNORECASE)
+
+
+def resume_phrases(text: str, window_sizes: Sequence[int] = (1, 2), max_segment_words: int = 6, max_phrases: int = 1024) -> List[str]:
+    """Разбивает резюме на короткие фразы-кандидаты для сопоставления с навыками.
+
+    Каждый сегмент (между разделителями) даёт окна из 1-2 слов, а короткие
+    сегменты добавляются целиком — так "машинное обучение" и "опыт с torch"
+    сравниваются с навыками без разбавления остальным текстом.
+
+    Args:
+        text: Текст резюме.
+        window_sizes: Длины скользящих окон в словах.
+        max_segment_words: Сегменты не длиннее этого добавляются целиком.
+        max_phrases: Ограничение на число фраз (по порядку появления).
+
+    Returns:
+        Уникальные фразы в нижнем регистре.
+    """
+    phrases: Dict[str, None] = {}
+    for segment in _SEGMENT_RE.split((text or "").lower()):
+        words = _WORD_RE.findall(segment)
+        if not words:
+            continue
+        if len(words) <= max_segment_words:
+            phrases[" ".join(words)] = None
+        for size in window_sizes:
+            for start in range(0, len(words) - size + 1):
+                window = words[start:start + size]
+                if size == 1 and len(window[0]) < 2:
+                    continue
+                phrases[" ".join(window)] = None
+        if len(phrases) >= max_phrases:
+            break
+    return list(phrases)[:max_phrases]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+class SemanticSkillMatcher:
+    """
+    Поиск навыков по косинусному сходству эмбеддингов.
+
+    Attributes:
+        skills: Навыки вакансии (в исходном написании).
+        threshold: Минимальное сходство фразы и навыка.
+    """
+
+    def __init__(self, skills: Iterable[str], embeddings=None, threshold: float = DEFAULT_THRESHOLD) -> None:
+        """Кодирует навыки вакансии в матрицу.
+
+        Args:
+            skills: Навыки вакансии.
+            embeddings: Энкодер LangChain `Embeddings` (по умолчанию общий
+                многоязычный энкодер процесса).
+            threshold: Порог сходства для засчитывания навыка.
+        """
+        if embeddings is None:
+            from ml_system.encoders import get_shared_embeddings
+
+            embeddings = get_shared_embeddings(model_name=DEFAULT_SKILL_MODEL)
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.skills: List[str] = list(dict.fromkeys(s for s in skills if isinstance(s, str) and s.strip()))
+        if self.skills:
+            self._skill_matrix = _normalize_rows(np.asarray(embeddings.embed_documents(self.skills), dtype=np.float32))
+        else:
+            self._skill_matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def similarities(self, text: str) -> Dict[str, Dict[str, object]]:
+        """Возвращает для каждого навыка лучшую фразу резюме и её сходство.
+
+        Args:
+            text: Текст резюме.
+
+        Returns:
+            Словарь {навык: {"phrase": str, "similarity": float}}; пустой,
+            если в резюме нет фраз.
+        """
+        phrases = resume_phrases(text)
+        if not self.skills or not phrases:
+            return {}
+        phrase_matrix = _normalize_rows(np.asarray(self.embeddings.embed_documents(phrases), dtype=np.float32))
+        scores = phrase_matrix @ self._skill_matrix.T
+        best = scores.argmax(axis=0)
+        return {
+            skill: {"phrase": phrases[best[j]], "similarity": round(float(scores[best[j], j]), 4)}
+            for j, skill in enumerate(self.skills)
+        }
+
+    def find(self, text: str, exclude: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, object]]:
+        """Находит навыки, сходство которых с какой-либо фразой резюме не ниже порога.
+
+        Args:
+            text: Текст резюме.
+            exclude: Навыки, уже найденные точным поиском (не проверяются повторно).
+
+        Returns:
+            Словарь {навык: {"phrase": str, "similarity": float}} только для найденных навыков.
+        """
+        excluded = set(exclude or ())
+        if not [skill for skill in self.skills if skill not in excluded]:
+            return {}
+        return {
+            skill: match for skill, match in self.similarities(text).items()
+            if skill not in excluded and match["similarity"] >= self.threshold
+        }
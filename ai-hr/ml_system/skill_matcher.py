@@ -0,0 +1,161 @@
+"""Поиск навыков в тексте резюме за один проход (автомат Ахо — Корасик).
+
+Автомат строится один раз на вакансию по списку её навыков и их синонимов
+и затем находит все навыки в резюме за время, линейное по длине текста,
+независимо от количества навыков.
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Канонический навык -> синонимы/сокращения. Сопоставление симметрично:
+# если в вакансии указан любой элемент группы, в резюме ищутся все её элементы.
+DEFAULT_SKILL_SYNONYMS: Dict[str, List[str]] = {
+    "kubernetes": ["k8s"],
+    "javascript": ["js"],
+    "postgresql": ["postgres", "psql"],
+    "mongodb": ["mongo"],
+    "python": ["питон"],
+    "c++": ["cpp"],
+    "c#": ["c sharp", "csharp"],
+    ".net": ["dotnet"],
+    "node.js": ["nodejs"],
+    "react": ["react.js", "reactjs"],
+    "machine learning": ["ml", "машинное обучение"],
+    "deep learning": ["dl", "глубокое обучение"],
+    "natural language processing": ["nlp", "обработка естественного языка"],
+    "pytorch": ["torch"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "amazon web services": ["aws"],
+    "ci/cd": ["cicd", "ci cd"],
+    "linux": ["линукс"],
+    "excel": ["эксель"],
+    "1с": ["1c"],
+}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Символы, продолжающие название технологии ("c" не должно находиться внутри "c++" / "c#").
+_SYMBOL_SUFFIXES = "+#"
+
+
+def normalize_text(text: str) -> str:
+    """Приводит текст к виду для сопоставления: нижний регистр, ё -> е, схлопывание пробелов."""
+    return _WHITESPACE_RE.sub(" ", text.lower().replace("ё", "е")).strip()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _synonym_groups(synonyms: Dict[str, Iterable[str]]) -> Dict[str, Set[str]]:
+    groups: Dict[str, Set[str]] = {}
+    for canonical, aliases in synonyms.items():
+        group = {normalize_text(canonical)} | {normalize_text(alias) for alias in aliases}
+        for member in group:
+            groups.setdefault(member, set()).update(group)
+    return groups
+
+
+_DEFAULT_GROUPS = _synonym_groups(DEFAULT_SKILL_SYNONYMS)
+
+
+class SkillAutomaton:
+    """
+    Многошаблонный поиск навыков вакансии в тексте.
+
+    Учитывает границы слов в Unicode (кириллица, цифры) и навыки с символами
+    ("C++", ".NET", "CI/CD"): граница проверяется только со стороны, где шаблон
+    начинается или заканчивается буквой/цифрой.
+
+    Attributes:
+        skills: Навыки в исходном написании (как в вакансии).
+    """
+
+    def __init__(self, skills: Iterable[str], synonyms: Optional[Dict[str, Iterable[str]]] = None) -> None:
+        """Строит автомат по навыкам и их синонимам.
+
+        Args:
+            skills: Навыки вакансии.
+            synonyms: Таблица синонимов {канонический навык: [синонимы]};
+                по умолчанию `DEFAULT_SKILL_SYNONYMS`.
+        """
+        self.skills: List[str] = list(dict.fromkeys(s for s in skills if isinstance(s, str) and s.strip()))
+        groups = _DEFAULT_GROUPS if synonyms is None else _synonym_groups(synonyms)
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for skill in self.skills:
+            normalized = normalize_text(skill)
+            for pattern in groups.get(normalized, {normalized}) | {normalized}:
+                self._add_pattern(pattern, skill)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, skill: str) -> None:
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(pattern), skill))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    @staticmethod
+    def _at_boundary(text: str, start: int, end: int) -> bool:
+        if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end - 1]):
+            following = text[end]
+            if _is_word_char(following) or following in _SYMBOL_SUFFIXES:
+                return False
+        return True
+
+    def find(self, text: str) -> Set[str]:
+        """Находит навыки, упомянутые в тексте, за один проход.
+
+        Args:
+            text: Текст резюме.
+
+        Returns:
+            Множество найденных навыков в исходном написании вакансии.
+        """
+        if not self.skills or not text:
+            return set()
+        text = normalize_text(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        total = len(self.skills)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, skill in out[state]:
+                if skill not in found and self._at_boundary(text, i - length + 1, i + 1):
+                    found.add(skill)
+                    if len(found) == total:
+                        return found
+        return found
+
+    def match(self, text: str, skills: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Возвращает карту {навык: найден ли в тексте} для указанных навыков автомата."""
+        found = self.find(text)
+        return {skill: skill in found for skill in (self.skills if skills is None else skills)}
@@ -0,0 +1,43 @@
+import pytest
+
+from ml_system.interview.agents.answer_classifier import UnknownAnswerClassifier
+
+
+@pytest.fixture
+def classifier():
+    return UnknownAnswerClassifier()
+
+
+@pytest.mark.parametrize("answer", ["да", "Нет.", "yes", "no"])
+def test_yes_no_answers_go_to_llm(classifier, answer):
+    assert classifier.classify(answer) is None
+
+
+@pytest.mark.parametrize("answer", [
+    "Не знаю точно, наверное градиентный спуск",
+    "Не сталкивался, но это регуляризация L1",
+    "Не помню, кажется через GIL",
+])
+def test_hedged_answers_with_content_go_to_llm(classifier, answer):
+    assert classifier.classify(answer) is None
+
+
+@pytest.mark.parametrize("answer", [
+    "Не знаю",
+    "Честно говоря, я не знаю.",
+    "К сожалению, не сталкивался с этим",
+    "Понятия не имею, давайте дальше",
+    "хз",
+])
+def test_bare_refusals_are_detected(classifier, answer):
+    assert classifier.classify(answer) == "unknown_marker"
+
+
+def test_empty_and_filler_answers(classifier):
+    assert classifier.classify("  ") == "empty"
+    assert classifier.classify("ну... хм") == "filler"
+
+
+def test_long_answers_are_never_short_circuited(classifier):
+    answer = "не знаю " * 10
+    assert classifier.classify(answer) is None
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from bson import ObjectId
+
+from ml_system.job_matching import (
+    FlexibleResumeMatcher,
+    batch_result_details,
+    score_features_batch,
+    score_rule_based_batch,
+)
+from ml_system.resume_features import SkillVocabulary, extract_resume_features
+
+RESUMES = [
+    "Опыт работы --- 5 лет 6 месяцев. Высшее образование. Python, SQL, Docker, Kubernetes",
+    "Опыт работы --- 1 год. Колледж. python и k8s",
+    "Опыт работы --- 12 лет. Высшее. Java, Spring, PostgreSQL",
+    "Без опыта",
+]
+
+
+def make_matchers():
+    return [
+        FlexibleResumeMatcher(["Python", "SQL"], ["Docker"], 3, max_experience=6, education_required="высшее", semantic_skills=False),
+        FlexibleResumeMatcher(["Java"], ["PostgreSQL", "Kubernetes"], 2, max_experience=8, semantic_skills=False),
+        FlexibleResumeMatcher(["Kubernetes"], [], 0, weights={"required_skills": 0.7, "optional_skills": 0.1}, semantic_skills=False),
+    ]
+
+
+def test_rule_based_batch_matches_single_pair_scoring():
+    matchers = make_matchers()
+    batch = score_rule_based_batch(matchers, RESUMES)
+    assert batch["total"].shape == (len(matchers), len(RESUMES))
+    for v, matcher in enumerate(matchers):
+        for r, text in enumerate(RESUMES):
+            assert batch_result_details(batch, matcher, v, r) == matcher._fallback_rule_based(text)
+
+
+def test_features_batch_matches_single_pair_scoring():
+    matchers = make_matchers()
+    vocabulary = SkillVocabulary([skill for m in matchers for skill in m.required_skills + m.optional_skills])
+    features = [extract_resume_features(text, vocabulary) for text in RESUMES]
+    batch = score_features_batch(matchers, features, vocabulary)
+    for v, matcher in enumerate(matchers):
+        for r, text in enumerate(RESUMES):
+            assert batch_result_details(batch, matcher, v, r) == matcher._fallback_rule_based(text)
+
+
+class FakeVacancies:
+    def __init__(self, vacancies):
+        self.vacancies = vacancies
+
+    def find(self, query):
+        wanted = set(query["_id"]["$in"])
+        return [vacancy for vacancy in self.vacancies if vacancy["_id"] in wanted]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # Недоступная MongoDB быстро отклоняется: api работает со словарём навыков в памяти
+    monkeypatch.setenv("MONGO_URI", "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=100")
+    monkeypatch.delenv("AI_HR_SEMANTIC_SKILLS", raising=False)
+    import api as api_module
+
+    return api_module
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_endpoint_streams_ranked_pairs(api, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    vacancies = [
+        {"_id": ObjectId(), "required_skills": ["Python", "SQL"], "optional_skills": ["Docker"], "min_experience": 3, "education_required": "высшее"},
+        {"_id": ObjectId(), "required_skills": ["Java"], "optional_skills": ["PostgreSQL"], "min_experience": 2},
+    ]
+    monkeypatch.setattr(api, "vacancies_collection", FakeVacancies(vacancies))
+    client = TestClient(api.app)
+    missing = str(ObjectId())
+    vacancy_ids = [str(vacancies[0]["_id"]), missing, str(vacancies[1]["_id"])]
+
+    response = client.post("/resume-match/batch", json={"resume": RESUMES[0], "vacancy_ids": vacancy_ids})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = read_ndjson(response)
+    results, errors = lines[:-1], lines[-1:]
+    assert [item["rank"] for item in results] == [1, 2]
+    assert [item["vacancy_id"] for item in results] == [str(vacancies[0]["_id"]), str(vacancies[1]["_id"])]
+    scores = [item["total_score_percent"] for item in results]
+    assert scores == sorted(scores, reverse=True)
+    for item, vacancy in zip(results, vacancies):
+        expected = api.matcher_cache.get(vacancy)._fallback_rule_based(RESUMES[0])
+        assert item["total_score_percent"] == expected["total_score_percent"]
+        assert item["details"] == expected["details"]
+    assert errors == [{"vacancy_id": missing, "error": "Вакансия не найдена"}]
+
+    resumes = [{"id": f"r{i}", "resume": text} for i, text in enumerate(RESUMES)]
+    response = client.post("/resume-match/batch", json={"vacancy_id": str(vacancies[0]["_id"]), "resumes": resumes, "top_k": 2})
+    lines = read_ndjson(response)
+    assert [item["rank"] for item in lines] == [1, 2]
+    assert lines[0]["resume_id"] == "r0"
+    assert lines[0]["total_score_percent"] >= lines[1]["total_score_percent"]
+
+
+def test_batch_endpoint_rejects_ambiguous_request(api):
+    from fastapi.testclient import TestClient
+
+    response = TestClient(api.app).post("/resume-match/batch", json={"resume": "Python"})
+    assert response.status_code == 400
@@ -0,0 +1,31 @@
+import sys
+import types
+
+from ml_system.encoders import build_embeddings, configure_torch_threads
+
+
+def fake_torch(monkeypatch):
+    torch = types.ModuleType("torch")
+    torch.threads = 8
+    torch.get_num_threads = lambda: torch.threads
+    torch.set_num_threads = lambda n: setattr(torch, "threads", n)
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    return torch
+
+
+def test_building_torch_encoder_keeps_process_threads(monkeypatch):
+    torch = fake_torch(monkeypatch)
+    huggingface = types.ModuleType("langchain_huggingface")
+    huggingface.HuggingFaceEmbeddings = lambda **kwargs: kwargs
+    monkeypatch.setitem(sys.modules, "langchain_huggingface", huggingface)
+
+    build_embeddings("torch", intra_op_threads=2)
+    assert torch.threads == 8
+
+
+def test_torch_threads_are_set_only_when_configured(monkeypatch):
+    torch = fake_torch(monkeypatch)
+    configure_torch_threads(None)
+    assert torch.threads == 8
+    configure_torch_threads(2)
+    assert torch.threads == 2
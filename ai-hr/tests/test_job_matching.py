@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from ml_system.job_matching import FlexibleResumeMatcher, parse_llm_band
+
+
+def make_matcher(**kwargs):
+    return FlexibleResumeMatcher(["Python", "SQL"], ["Docker"], 2, semantic_skills=False, **kwargs)
+
+
+def test_aevaluate_runs_rule_based_scoring_off_the_event_loop(monkeypatch):
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    matcher = make_matcher()
+    threads = []
+    original = matcher._rule_based
+
+    def recording_rule_based(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(matcher, "_rule_based", recording_rule_based)
+    result = asyncio.run(matcher.aevaluate("Опыт работы --- 3 года. Python, SQL, Docker"))
+
+    assert result["total_score_percent"] > 50
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_llm_band_is_validated():
+    assert parse_llm_band("20, 80") == (20.0, 80.0)
+    for value in ("", "50", "a,b", "80,20", "10,20,30", "-5,50"):
+        assert parse_llm_band(value) == (30.0, 75.0)
+
+
+class FakeSemanticMatcher:
+    """Находит "PostgreSQL" по фразе "реляционные базы данных"."""
+
+    def find(self, text, exclude=()):
+        if "реляционные базы" in text.lower() and "postgresql" not in exclude:
+            return {"postgresql": {"phrase": "реляционные базы данных", "similarity": 0.8}}
+        return {}
+
+
+def test_batch_scores_semantic_vacancies_like_single_match():
+    from ml_system.job_matching import batch_result_details, score_resumes_batch
+    from ml_system.resume_features import SkillVocabulary, extract_resume_features
+
+    exact = FlexibleResumeMatcher(["python", "postgresql"], [], 1, semantic_skills=False)
+    semantic = FlexibleResumeMatcher(["python", "postgresql"], [], 1, semantic_skills=True)
+    semantic._semantic_matcher = FakeSemanticMatcher()
+    vocabulary = SkillVocabulary(["python", "postgresql"])
+    resumes = ["Опыт работы --- 2 года. Python, реляционные базы данных", "Опыт работы --- 3 года. Python, PostgreSQL"]
+    features = [extract_resume_features(text, vocabulary) for text in resumes]
+
+    batch = score_resumes_batch([exact, semantic], resumes, features, vocabulary)
+    for v, matcher in enumerate([exact, semantic]):
+        for r, text in enumerate(resumes):
+            expected = matcher._rule_based(text, features[r], vocabulary)
+            assert batch_result_details(batch, matcher, v, r) == expected
+            assert round(batch["total"][v, r] * 100) == expected["total_score_percent"]
+    assert batch_result_details(batch, semantic, 1, 0)["details"]["required_skills"]["map"]["postgresql"]
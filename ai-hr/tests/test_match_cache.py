@@ -0,0 +1,32 @@
+from ml_system.match_cache import MatchResultCache
+
+VACANCY = {"_id": "v1", "required_skills": ["Python"], "description": "Backend"}
+
+
+def test_key_depends_on_resume_vacancy_version_weights_and_model():
+    key = MatchResultCache.make_key("резюме", VACANCY, None, "model-a")
+    assert key == MatchResultCache.make_key("  резюме\n", VACANCY, None, "model-a")
+    assert key != MatchResultCache.make_key("резюме", {**VACANCY, "required_skills": ["Go"]}, None, "model-a")
+    assert key != MatchResultCache.make_key("резюме", VACANCY, {"experience": 0.5}, "model-a")
+    assert key != MatchResultCache.make_key("резюме", VACANCY, None, "model-b")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = MatchResultCache(max_size=2)
+    cache.put("a", "v1", {"score": 1})
+    cache.put("b", "v1", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    cache.put("c", "v2", {"score": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_invalidate_vacancy_removes_only_its_results():
+    cache = MatchResultCache()
+    cache.put("a", "v1", {"score": 1})
+    cache.put("b", "v2", {"score": 2})
+    assert cache.invalidate_vacancy("v1") == 1
+    assert cache.get("a") is None
+    assert cache.get("b") == {"score": 2}
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from ml_system.quantized_store import QuantizedVectorStore, quantize_int8, recall_at_k
+
+
+def normalized(n, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_int8_quantization_round_trip_is_close():
+    vectors = normalized(50)
+    codes, scales = quantize_int8(vectors)
+    assert codes.dtype == np.int8
+    assert np.abs(codes.astype(np.float32) * scales[:, None] - vectors).max() < 0.01
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_query_matches_exact_search(dtype):
+    vectors = normalized(200)
+    store = QuantizedVectorStore(dtype=dtype, block_size=64)
+    ids = [f"q{i}" for i in range(len(vectors))]
+    metadatas = [{"section": "ML" if i % 2 else "Python"} for i in range(len(vectors))]
+    store.add_documents([f"doc {i}" for i in range(len(vectors))], metadatas, ids, embeddings=vectors)
+
+    results = store.query("", n_results=5, query_embedding=vectors[7])
+    assert results["ids"][0][0] == "q7"
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=0.01)
+
+    filtered = store.query("", n_results=5, where_filter={"section": "ML"}, query_embedding=vectors[7])
+    assert all(metadata["section"] == "ML" for metadata in filtered["metadatas"][0])
+
+
+def test_delete_and_get_documents():
+    vectors = normalized(4)
+    store = QuantizedVectorStore(dtype="int8")
+    store.add_documents(["a", "b", "c", "d"], [{}] * 4, ["a", "b", "c", "d"], embeddings=vectors)
+    store.delete_documents(["b"])
+
+    assert store.existing_ids() == {"a", "c", "d"}
+    documents = store.get_documents(["d", "b"])
+    assert documents["ids"] == ["d"]
+    assert np.allclose(documents["embeddings"][0], vectors[3], atol=0.01)
+    with pytest.raises(ValueError):
+        store.add_documents(["a"], [{}], ["a"], embeddings=vectors[:1])
+
+
+def test_recall_of_int8_store_is_high():
+    exact = normalized(300)
+    codes, scales = quantize_int8(exact)
+    assert recall_at_k(exact, codes.astype(np.float32) * scales[:, None], k=10) > 0.95
@@ -0,0 +1,108 @@
+import numpy as np
+
+from ml_system.job_matching import FlexibleResumeMatcher, score_features_batch
+from ml_system.resume_features import (
+    SkillVocabulary,
+    extract_resume_features,
+    features_cover,
+    pack_skill_bits,
+    unpack_skill_bits,
+)
+
+
+class FakeCollection:
+    """Минимальная коллекция MongoDB: один документ, $setOnInsert, $set и $addToSet с $each."""
+
+    def __init__(self):
+        self.documents = {}
+
+    def find_one(self, query):
+        return self.documents.get(query["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        document = self.documents.get(query["_id"])
+        if document is None:
+            if not upsert:
+                return
+            document = self.documents[query["_id"]] = {"_id": query["_id"], **update.get("$setOnInsert", {})}
+        if "identity" in query and ("identity" in document) == (not query["identity"]["$exists"]):
+            return
+        document.update(update.get("$set", {}))
+        if "$addToSet" in update:
+            skills = document.setdefault("skills", [])
+            for skill in update["$addToSet"]["skills"]["$each"]:
+                if skill not in skills:
+                    skills.append(skill)
+
+
+def test_skill_bits_round_trip():
+    encoded = pack_skill_bits([0, 3, 9], 10)
+    assert np.flatnonzero(unpack_skill_bits(encoded, 10)).tolist() == [0, 3, 9]
+
+
+def test_vocabulary_is_append_only_and_normalized():
+    vocabulary = SkillVocabulary(["Python", "SQL"])
+    assert vocabulary.extend(["python", "Docker", "  "]) == ["docker"]
+    assert [vocabulary.index(skill) for skill in ("PYTHON", "sql", "docker")] == [0, 1, 2]
+
+
+def test_vocabulary_indices_are_shared_through_collection():
+    collection = FakeCollection()
+    first = SkillVocabulary(["python"], collection=collection)
+    second = SkillVocabulary(collection=collection)
+    second.extend(["docker"])
+    first.extend(["kafka"])
+    assert first.skills == ["python", "docker", "kafka"]
+
+
+def test_features_cover_only_skills_known_when_extracted():
+    vocabulary = SkillVocabulary(["Python", "Docker"])
+    features = extract_resume_features("Python, Docker, Kafka", vocabulary)
+    bits = unpack_skill_bits(features["skill_bits"], features["vocab_size"])
+    assert bits.tolist() == [True, True]
+    assert features_cover(features, vocabulary, ["python", "docker"])
+
+    vocabulary.extend(["Kafka"])
+    assert not features_cover(features, vocabulary, ["Kafka"])
+    assert not features_cover(None, vocabulary, ["python"])
+
+
+def test_vocabulary_identity_is_shared_through_collection_only():
+    collection = FakeCollection()
+    assert SkillVocabulary(collection=collection).identity == SkillVocabulary(collection=collection).identity
+    assert SkillVocabulary().identity != SkillVocabulary().identity
+
+    # Документ, созданный до появления идентификатора, получает его один раз
+    legacy = FakeCollection()
+    legacy.documents["global"] = {"_id": "global", "skills": ["python"]}
+    first = SkillVocabulary(collection=legacy)
+    assert first.skills == ["python"]
+    assert SkillVocabulary(collection=legacy).identity == first.identity
+
+
+def test_features_from_another_vocabulary_are_rejected():
+    # Словарь в памяти после перезапуска: те же навыки, другой порядок
+    before = SkillVocabulary(["Python", "Docker"])
+    features = extract_resume_features("Python", before)
+    after = SkillVocabulary(["Docker", "Python"])
+    assert not features_cover(features, after, ["python"])
+
+
+def test_features_newer_than_local_vocabulary():
+    collection = FakeCollection()
+    local = SkillVocabulary(["python", "sql"], collection=collection)
+    other_worker = SkillVocabulary(collection=collection)
+    other_worker.extend(["docker", "kafka", "go"])
+    features = extract_resume_features("python, go", other_worker)
+    assert features["vocab_size"] == 5 and len(local) == 2
+
+    # Локальный словарь подтягивает навыки из коллекции
+    assert features_cover(features, local, ["python", "go"])
+    assert len(local) == 5
+
+    # Признаки шире словаря не ломают пакетную оценку
+    stale = SkillVocabulary(["python", "sql"])
+    stale_features = dict(features, vocab_id=stale.identity)
+    matcher = FlexibleResumeMatcher(["python", "sql"], [], 0, semantic_skills=False)
+    batch = score_features_batch([matcher], [stale_features], stale)
+    assert batch["total"].shape == (1, 1)
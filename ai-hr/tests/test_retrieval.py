@@ -0,0 +1,117 @@
+import numpy as np
+
+from ml_system.lexical_index import BM25Index, RussianStemmer, reciprocal_rank_fusion
+from ml_system.quantized_store import QuantizedVectorStore
+from ml_system.retrieva import InterviewKnowledgeSystemHF
+
+
+class ConceptEmbeddings:
+    """Эмбеддинги по словарю понятий: синонимы на разных языках дают один вектор."""
+
+    CONCEPTS = [
+        ("переобуч", "overfitting"),
+        ("градиент", "gradient"),
+        ("pandas", "датафрейм"),
+        ("регуляризац", "regularization"),
+    ]
+
+    def _embed(self, text):
+        text = text.lower()
+        vector = np.full(len(self.CONCEPTS), 0.01, dtype=np.float32)
+        for i, words in enumerate(self.CONCEPTS):
+            if any(word in text for word in words):
+                vector[i] = 1.0
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def make_system(lexical_candidates=50):
+    system = InterviewKnowledgeSystemHF.__new__(InterviewKnowledgeSystemHF)
+    system.embeddings = ConceptEmbeddings()
+    system.vector_store = QuantizedVectorStore(dtype="float16")
+    system.lexical_candidates = lexical_candidates
+    system.lexical_index = BM25Index()
+    return system
+
+
+BANK = [
+    {"section": "ML", "question": "Что такое overfitting и как его заметить?"},
+    {"section": "ML", "question": "Как работает градиентный спуск?"},
+    {"section": "Python", "question": "Как объединить два датафрейма в pandas?"},
+    {"section": "ML", "question": "Зачем нужна регуляризация в линейных моделях?"},
+]
+
+
+def test_stemmer_reduces_inflections_to_common_stem():
+    stemmer = RussianStemmer()
+    assert stemmer.stem("моделями") == stemmer.stem("модели") == stemmer.stem("модель")
+    assert stemmer.stem("pandas") == "pandas"
+
+
+def test_bm25_ranks_documents_with_query_terms():
+    index = BM25Index()
+    index.add_documents(["a", "b", "c"], ["градиентный бустинг", "градиентный спуск и бустинг", "pandas merge"])
+    hits = [doc_id for doc_id, _ in index.search("бустинг")]
+    assert set(hits) == {"a", "b"}
+    assert index.search("kubernetes") == []
+
+    index.remove_document("a")
+    assert [doc_id for doc_id, _ in index.search("бустинг")] == ["b"]
+
+
+def test_reciprocal_rank_fusion_prefers_documents_ranked_high_in_both_lists():
+    fused = [doc_id for doc_id, _ in reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"]])]
+    assert fused[0] == "b"
+
+
+def test_hybrid_search_returns_nearest_neighbours_without_lexical_overlap():
+    system = make_system()
+    overfitting = [
+        {"section": "ML", "question": f"Как бороться с overfitting, пример {i}?"} for i in range(12)
+    ]
+    # Вопросы про "модели" совпадают с запросом лексически, но не по смыслу
+    system.add_knowledge_to_rag(BANK + overfitting + [
+        {"section": "MLOps", "question": "Как версионировать модели?"},
+        {"section": "MLOps", "question": "Как выкатывать модели в прод?"},
+        {"section": "MLOps", "question": "Где хранить модели и артефакты?"},
+    ])
+
+    results = system.search_questions("Переобучение модели", k=3)
+
+    questions = [item["metadata"]["question"] for item in results]
+    assert len(results) == 3
+    assert any("overfitting" in question for question in questions)
+
+
+def test_documents_already_in_shared_store_are_indexed_lexically():
+    first = make_system()
+    assert first.add_knowledge_to_rag(BANK) == len(BANK)
+
+    second = make_system()
+    second.vector_store = first.vector_store
+    assert second.add_knowledge_to_rag(BANK) == 0
+    assert len(second.lexical_index) == len(BANK)
+    assert [doc_id for doc_id, _ in second.lexical_index.search("pandas")]
+
+    third = make_system()
+    third.vector_store = first.vector_store
+    stats = third.sync_knowledge(BANK[:3])
+    assert stats == {"added": 0, "removed": 1, "unchanged": 3}
+    assert len(third.lexical_index) == 3
+
+
+def test_benchmark_config_uses_the_given_encoder(monkeypatch):
+    import ml_system.retrieva as retrieva
+    from ml_system.retrieval_benchmark import CachedEmbeddings, run_config
+
+    def no_model(*args, **kwargs):
+        raise AssertionError("энкодер не должен загружаться")
+
+    monkeypatch.setattr(retrieva, "get_shared_embeddings", no_model)
+    run = run_config(BANK, [("overfitting", "ML")], CachedEmbeddings(ConceptEmbeddings()), "float16", True, 2)
+    assert run["embedding_dtype"] == "float16"
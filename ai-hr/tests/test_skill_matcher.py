@@ -0,0 +1,19 @@
+from ml_system.skill_matcher import DEFAULT_SKILL_SYNONYMS, SkillAutomaton
+
+
+def test_finds_skills_and_synonyms_in_one_pass():
+    automaton = SkillAutomaton(["Python", "Kubernetes", "PostgreSQL", "Docker"], DEFAULT_SKILL_SYNONYMS)
+    found = automaton.find("Пишу на питоне... то есть на Python, деплой в k8s, база — Postgres")
+    assert found == {"Python", "Kubernetes", "PostgreSQL"}
+
+
+def test_respects_word_and_symbol_boundaries():
+    automaton = SkillAutomaton(["C", "C++", "Go", "Java"])
+    assert automaton.find("Опыт: C++ и JavaScript, играю в Go") == {"C++", "Go"}
+    assert automaton.find("Начинал с C, потом C#") == {"C"}
+
+
+def test_match_reports_every_requested_skill():
+    automaton = SkillAutomaton(["SQL", "Spark"])
+    assert automaton.match("Уверенный SQL") == {"SQL": True, "Spark": False}
+    assert automaton.find("") == set()
@@ -96,6 +96,9 @@ def check_resume_score(caller_identity):
         except Exception as e:
             return jsonify({'message': f'Ошибка при обработке резюме: {str(e)}'}), 500
 
+    # Сохраненные признаки резюме; если их нет или они устарели, /resume-match пересчитает их и вернет в ответе
+    resume_features = user.get('resume_features')
+
     existing_check = interviews_collection.find_one({
         'user_id': ObjectId(user_id),
         'vacancy_id': ObjectId(vacancy_id)
@@ -113,8 +116,15 @@ def check_resume_score(caller_identity):
 
     try:
         
-        match_result = match_resume(parsed_resume_data, vacancy.get('description', ''), vacancy_id)
+        match_result = match_resume(parsed_resume_data, vacancy.get('description', ''), vacancy_id, resume_features)
         resume_score = match_result.get('total_score_percent', 0)
+
+        # Сервис пересчитывает признаки, если в вакансии появились новые навыки
+        if match_result.get('resume_features'):
+            users_collection.update_one(
+                {'_id': ObjectId(user_id)},
+                {'$set': {'resume_features': match_result['resume_features']}}
+            )
         
     except Exception as e:
         logger.exception("AI-HR match_resume error: %s", e)
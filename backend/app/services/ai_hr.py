@@ -39,14 +39,21 @@ def _make_request(method, endpoint, **kwargs):
         raise AIHRServiceError("Не удалось связаться с AI-сервисом.")
 
 
-def match_resume(resume_data, job_description, vacancy_id):
+def match_resume(resume_data, job_description, vacancy_id, resume_features=None):
     payload = {
         'resume': resume_data,
         'vacancy_id': str(vacancy_id)
     }
+    if resume_features:
+        payload['resume_features'] = resume_features
     logging.info(f"Отправка запроса на /resume-match для вакансии {vacancy_id}")
     return _make_request('post', '/resume-match', json=payload)
 
+def invalidate_match_cache(vacancy_id):
+    """Сбрасывает кешированные оценки резюме для вакансии после её изменения."""
+    logging.info(f"Инвалидация кеша оценок резюме для вакансии {vacancy_id}")
+    return _make_request('delete', f'/resume-match/cache/{vacancy_id}', timeout=10)
+
 def start_interview(resume_data, vacancy_id, job_description=""):
     payload = {
         "resume": resume_data or "Резюме не найдено",
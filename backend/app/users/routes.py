@@ -181,7 +181,7 @@ def update_resume(caller_identity):
 
         users_collection.update_one(
             {"_id": ObjectId(user_id)},
-            {"$set": {"resume_path": file_url,'parsed_resume': None}}
+            {"$set": {"resume_path": file_url,'parsed_resume': None,'resume_features': None}}
         )
 
         return jsonify({
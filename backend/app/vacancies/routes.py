@@ -9,11 +9,23 @@ from ..services.export_to_yandex_cloud import create_s3_session, upload_file_obj
 from ..services.delete_from_yandex_cloud import delete_file_from_s3
 import os
 from ..core.decorators import token_required, roles_required
+from ..services.ai_hr import invalidate_match_cache
 import logging
 
 vacancies_bp = Blueprint('vacancies', __name__)
 logger = logging.getLogger(__name__)
 
+# Поля вакансии, от которых зависит оценка резюме
+MATCHING_FIELDS = ('required_skills', 'optional_skills', 'min_experience', 'max_experience', 'education_required', 'description')
+
+
+def _invalidate_match_cache(vacancy_id):
+    """Сбросить кеш оценок резюме в AI-сервисе; ошибка не прерывает операцию с вакансией."""
+    try:
+        invalidate_match_cache(vacancy_id)
+    except Exception as e:
+        logger.warning("Match cache invalidation failed for vacancy %s: %s", vacancy_id, e)
+
 @vacancies_bp.route('/vacancies/create', methods=['POST'])
 @token_required
 @roles_required('company')
@@ -190,6 +202,7 @@ def update_vacancy(caller_identity, vacancy_id):
 
     if not update_fields:
         return jsonify({'message': 'Нет разрешенных полей для обновления'}), 400
+    update_fields['updated_at'] = datetime.now(timezone.utc)
 
     # 3. Обновление в MongoDB
     try:
@@ -201,6 +214,9 @@ def update_vacancy(caller_identity, vacancy_id):
         logger.exception("/vacancies/%s update error: %s", vacancy_id, e)
         return jsonify({'message': 'Ошибка при обновлении вакансии', 'error': str(e)}), 500
 
+    if any(field in update_fields for field in MATCHING_FIELDS):
+        _invalidate_match_cache(vacancy_id)
+
     return jsonify({'message': 'Вакансия успешно обновлена'}), 200
 
 @vacancies_bp.route('/vacancies/<vacancy_id>', methods=['DELETE'])
@@ -229,6 +245,8 @@ def delete_vacancy(caller_identity, vacancy_id):
         logger.exception("/vacancies/%s delete error: %s", vacancy_id, e)
         return jsonify({'message': 'Ошибка при удалении вакансии', 'error': str(e)}), 500
 
+    _invalidate_match_cache(vacancy_id)
+
     return jsonify({'message': 'Вакансия успешно удалена'}), 200
 
 @vacancies_bp.route('/vacancies/<vacancy_id>/candidates', methods=['GET'])
@@ -8,6 +8,8 @@ export class VoiceTranscriptionClient {
   private ws: WebSocket | null = null
   private isConnected = false
   private messageQueue: any[] = []
+  // Номер следующего аудио чанка в текущей записи (заголовок бинарного кадра)
+  private chunkSeq = 0
   private onTranscriptionCallback?: (text: string) => void
   private onAnalysisCallback?: (analysis: any) => void
   private onErrorCallback?: (error: string) => void
@@ -75,6 +77,9 @@ export class VoiceTranscriptionClient {
               }
               
               console.log('✅ Финальный результат обработан, соединение остается открытым')
+            } else if (data.type === 'busy') {
+              console.warn(`🚦 Сервис распознавания перегружен, ожидание ~${data.estimated_wait_s}с`)
+              this.onErrorCallback?.(data.message)
             } else {
               console.log('Неизвестный тип сообщения:', data.type)
             }
@@ -114,19 +119,15 @@ export class VoiceTranscriptionClient {
     }
 
     try {
-      // Конвертируем ArrayBuffer в base64
-      const uint8Array = new Uint8Array(audioData)
-      const binaryString = Array.from(uint8Array).map(byte => String.fromCharCode(byte)).join('')
-      const base64Data = btoa(binaryString)
-
-      const message = {
-        type: 'audio_chunk',
-        data: base64Data
-      }
-
-      console.log(`📤 Отправляем аудио чанк размером ${audioData.byteLength} байт (base64: ${base64Data.length} символов)`)
-      this.ws.send(JSON.stringify(message))
-      console.log('✅ Аудио чанк успешно отправлен')
+      // Бинарный кадр: тип (1 байт, 0x01 — аудио) + номер чанка (uint32 BE) + байты WebM/Opus
+      const frame = new Uint8Array(5 + audioData.byteLength)
+      const header = new DataView(frame.buffer)
+      header.setUint8(0, 0x01)
+      header.setUint32(1, this.chunkSeq)
+      frame.set(new Uint8Array(audioData), 5)
+      this.chunkSeq = (this.chunkSeq + 1) >>> 0
+
+      this.ws.send(frame)
     } catch (error) {
       console.error('❌ Ошибка при отправке аудио чанка:', error)
       this.onErrorCallback?.('Ошибка при отправке аудио данных')
@@ -146,6 +147,7 @@ export class VoiceTranscriptionClient {
 
       console.log('🔚 Отправляем сигнал завершения транскрипции')
       this.ws.send(JSON.stringify(message))
+      this.chunkSeq = 0
     } catch (error) {
       console.error('❌ Ошибка при завершении транскрипции:', error)
       this.onErrorCallback?.('Ошибка при завершении транскрипции')
@@ -0,0 +1,123 @@
+# ==============================================================================
+# ASR BACKENDS
+# ==============================================================================
+# Бэкенд распознавания выбирается переменными окружения, без изменений кода:
+#   ASR_BACKEND       whisper (openai-whisper, PyTorch) | faster-whisper (CTranslate2)
+#   WHISPER_MODEL     tiny | base | small | medium | large-v3 ...
+#   ASR_COMPUTE_TYPE  тип вычислений CTranslate2: int8 | int8_float32 | float32 ...
+#   ASR_BEAM_SIZE     ширина луча (faster-whisper; 1 — жадное декодирование)
+#   ASR_CPU_THREADS   потоки CTranslate2 на CPU (0 — по числу ядер)
+# Язык всегда русский.
+
+import os
+import time
+
+import numpy as np
+
+LANGUAGE = "ru"
+
+
+class ASRBackend:
+    """Общий интерфейс: float32 PCM 16 кГц mono -> текст."""
+
+    name = "base"
+    # True, если transcribe_batch обрабатывает батч одним проходом модели (иначе BatchingEngine не нужен)
+    supports_batching = False
+
+    def transcribe(self, audio_np: np.ndarray, prompt: str = None) -> str:
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: list) -> list:
+        """Транскрипция нескольких фрагментов (до 30 с); по умолчанию последовательно."""
+        return [self.transcribe(audio_np) for audio_np in audios]
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper (PyTorch)."""
+
+    name = "whisper"
+    supports_batching = True
+
+    def __init__(self, model_name: str = "small"):
+        import whisper
+
+        self.whisper = whisper
+        self.model_name = model_name
+        self.model = whisper.load_model(model_name)
+        self.fp16 = self.model.device.type == "cuda"
+
+    def transcribe(self, audio_np: np.ndarray, prompt: str = None) -> str:
+        result = self.model.transcribe(audio_np, language=LANGUAGE, initial_prompt=prompt or None, fp16=self.fp16)
+        return result["text"].strip()
+
+    def transcribe_batch(self, audios: list) -> list:
+        """Один проход энкодера и декодера на батч log-mel окон по 30 с."""
+        import torch
+
+        whisper = self.whisper
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio_np)), self.model.dims.n_mels)
+            for audio_np in audios
+        ]).to(self.model.device)
+        options = whisper.DecodingOptions(language=LANGUAGE, fp16=self.fp16, without_timestamps=True)
+        results = whisper.decode(self.model, mels, options)
+        return [result.text.strip() for result in results]
+
+
+class FasterWhisperBackend(ASRBackend):
+    """faster-whisper (CTranslate2), по умолчанию int8 на CPU."""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str = "small", compute_type: str = "int8", beam_size: int = 5,
+                 cpu_threads: int = 0, device: str = "cpu"):
+        from faster_whisper import WhisperModel
+
+        self.model_name = model_name
+        self.beam_size = beam_size
+        self.model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+    def transcribe(self, audio_np: np.ndarray, prompt: str = None) -> str:
+        segments, _ = self.model.transcribe(
+            audio_np,
+            language=LANGUAGE,
+            beam_size=self.beam_size,
+            initial_prompt=prompt or None,
+            condition_on_previous_text=False,
+        )
+        # segments — генератор: декодирование выполняется при итерации
+        return "".join(segment.text for segment in segments).strip()
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def backend_supports_batching() -> bool:
+    """Поддерживает ли бэкенд из ASR_BACKEND настоящий батчинг (без загрузки модели)."""
+    backend = BACKENDS.get(os.getenv("ASR_BACKEND", "whisper").strip().lower())
+    return backend is not None and backend.supports_batching
+
+
+def load_asr_backend() -> ASRBackend:
+    """Создает бэкенд по переменным окружения (см. заголовок модуля)."""
+    backend_name = os.getenv("ASR_BACKEND", "whisper").strip().lower()
+    model_name = os.getenv("WHISPER_MODEL", "small").strip()
+    if backend_name not in BACKENDS:
+        raise ValueError(f"Неизвестный ASR_BACKEND '{backend_name}', доступны: {', '.join(BACKENDS)}")
+
+    print(f"🤖 Загрузка модели '{model_name}' (бэкенд {backend_name})...")
+    start_time = time.time()
+    if backend_name == FasterWhisperBackend.name:
+        backend = FasterWhisperBackend(
+            model_name,
+            compute_type=os.getenv("ASR_COMPUTE_TYPE", "int8").strip(),
+            beam_size=int(os.getenv("ASR_BEAM_SIZE", "5")),
+            cpu_threads=int(os.getenv("ASR_CPU_THREADS", "0")),
+        )
+    else:
+        backend = WhisperBackend(model_name)
+    print(f"✅ Модель '{model_name}' ({backend_name}) загружена за {time.time() - start_time:.1f}с.")
+    return backend
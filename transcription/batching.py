@@ -0,0 +1,106 @@
+# ==============================================================================
+# BATCHED TRANSCRIPTION ACROSS SESSIONS
+# ==============================================================================
+# Когда несколько кандидатов отвечают одновременно, их фрагменты (до 30 с —
+# окно Whisper) собираются в один батч: энкодер и декодер выполняются один раз
+# на батч, а результаты раздаются обратно по сессиям. Батч отправляется, когда
+# набралось `batch_size` фрагментов или первый фрагмент ждет `max_wait_ms`.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from decoder import SAMPLE_RATE
+from streaming import SpeechSegmenter
+
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+
+def split_windows(audio_np: np.ndarray) -> list:
+    """Режет запись на фрагменты не длиннее окна Whisper, по возможности по паузам."""
+    if len(audio_np) <= WINDOW_SAMPLES:
+        return [audio_np]
+    segmenter = SpeechSegmenter(min_segment_s=10.0, max_segment_s=28.0)
+    windows = segmenter.feed(audio_np)
+    last = segmenter.flush()
+    if last is not None:
+        windows.append(last)
+    return windows
+
+
+class BatchingEngine:
+    """Собирает фрагменты из разных сессий в батчи для `backend.transcribe_batch`."""
+
+    def __init__(self, backend, batch_size: int = 8, max_wait_ms: int = 50):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.busy_s = 0.0
+        self.audio_s = 0.0
+        self._thread = threading.Thread(target=self._loop, name="asr-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def name(self):
+        return f"{self.backend.name}, батчи до {self.batch_size}"
+
+    def transcribe(self, audio_np: np.ndarray, prompt: str = None) -> str:
+        """Блокирующая транскрипция через общий батч.
+
+        Контекст `prompt` в батче не используется: параметры декодирования общие на батч.
+        """
+        futures = []
+        for window in split_windows(audio_np):
+            future = Future()
+            self._requests.put((window, future))
+            futures.append(future)
+        return " ".join(text for text in (future.result() for future in futures) if text).strip()
+
+    def _collect(self) -> list:
+        batch = [self._requests.get()]
+        deadline = time.time() + self.max_wait_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            start_time = time.time()
+            try:
+                texts = self.backend.transcribe_batch([audio for audio, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), text in zip(batch, texts):
+                future.set_result(text)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.busy_s += time.time() - start_time
+                self.audio_s += sum(len(audio) for audio, _ in batch) / SAMPLE_RATE
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'batch_size': self.batch_size,
+                'max_wait_ms': round(self.max_wait_s * 1000),
+                'batches': self.batches,
+                'items': self.items,
+                'avg_batch_size': round(self.items / self.batches, 2) if self.batches else None,
+                'real_time_factor': round(self.busy_s / self.audio_s, 3) if self.audio_s else None,
+            }
@@ -0,0 +1,189 @@
+# ==============================================================================
+# IN-MEMORY AUDIO DECODING
+# ==============================================================================
+# WebM/Opus от MediaRecorder декодируется ffmpeg через пайпы сразу в float32
+# PCM 16 кГц mono — без временных файлов и без повторного ресемплинга в librosa.
+# Процесс ffmpeg декодирует ровно один поток, поэтому пул держит заранее
+# запущенные процессы: запуск ffmpeg (десятки мс) уходит с горячего пути,
+# а на место выданного процесса в фоне запускается новый.
+
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class FFmpegStreamDecoder:
+    """Инкрементальный декодер: байты контейнера в stdin ffmpeg, float32 PCM из stdout."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.process = subprocess.Popen(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-probesize", "32768", "-analyzeduration", "0",
+                "-i", "pipe:0",
+                "-f", "f32le", "-ac", "1", "-ar", str(sample_rate),
+                "pipe:1",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        self._pending = []
+        self._remainder = b""
+        self._errors = deque(maxlen=20)
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+        # stderr тоже вычитывается постоянно: на битом входе ffmpeg пишет много ошибок и иначе встанет на полном пайпе
+        self._stderr_reader = threading.Thread(target=self._stderr_loop, daemon=True)
+        self._stderr_reader.start()
+
+    def _read_loop(self):
+        # Отдельный поток постоянно вычитывает stdout, иначе ffmpeg заблокируется на полном пайпе
+        while True:
+            data = self.process.stdout.read1(65536)
+            if not data:
+                break
+            with self._lock:
+                data = self._remainder + data
+                usable = len(data) - len(data) % 4
+                self._remainder = data[usable:]
+                if usable:
+                    self._pending.append(np.frombuffer(data[:usable], dtype=np.float32))
+
+    def _stderr_loop(self):
+        for line in self.process.stderr:
+            self._errors.append(line)
+
+    def feed(self, chunk: bytes):
+        """Передает очередной фрагмент контейнера декодеру (блокирующая запись в пайп)."""
+        self.process.stdin.write(chunk)
+        self.process.stdin.flush()
+
+    def read(self) -> np.ndarray:
+        """Возвращает сэмплы, декодированные с момента предыдущего вызова."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(pending)
+
+    def close(self, timeout: float = 10.0) -> np.ndarray:
+        """Закрывает вход, дожидается конца декодирования и возвращает оставшиеся сэмплы."""
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self._reader.join(timeout)
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        if self.process.returncode not in (0, None):
+            self._stderr_reader.join(timeout)
+            error = b"".join(self._errors).decode("utf-8", errors="ignore").strip()
+            if error:
+                print(f"⚠️ ffmpeg завершился с кодом {self.process.returncode}: {error[:300]}")
+        return self.read()
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+
+
+class DecoderPool:
+    """Пул заранее запущенных процессов ffmpeg."""
+
+    def __init__(self, size: int = 2, sample_rate: int = SAMPLE_RATE):
+        self.size = size
+        self.sample_rate = sample_rate
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.spawned = 0
+        self.reused = 0
+        for _ in range(size):
+            self._spawn()
+
+    def _spawn(self):
+        # После всплеска записей пул не должен разрастаться сверх size простаивающих процессов
+        with self._lock:
+            if len(self._idle) >= self.size:
+                return
+        try:
+            decoder = FFmpegStreamDecoder(self.sample_rate)
+        except Exception as e:
+            print(f"⚠️ Не удалось запустить ffmpeg для пула декодеров: {e}")
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(decoder)
+                self.spawned += 1
+                decoder = None
+        if decoder is not None:
+            decoder.kill()
+
+    def acquire(self) -> FFmpegStreamDecoder:
+        """Выдает готовый декодер (один на запись) и запускает замену в фоне."""
+        decoder = None
+        with self._lock:
+            while self._idle and decoder is None:
+                candidate = self._idle.popleft()
+                if candidate.process.poll() is None:
+                    decoder = candidate
+        if decoder is None:
+            decoder = FFmpegStreamDecoder(self.sample_rate)
+        else:
+            self.reused += 1
+        threading.Thread(target=self._spawn, daemon=True).start()
+        return decoder
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for decoder in idle:
+            decoder.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_decoder_pool() -> DecoderPool:
+    """Общий пул процесса (размер задается DECODER_POOL_SIZE)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DecoderPool(size=int(os.getenv("DECODER_POOL_SIZE", "2")))
+        return _pool
+
+
+def decode_audio_bytes(audio_bytes: bytes, pool: DecoderPool = None):
+    """Декодирует запись целиком в памяти.
+
+    Returns:
+        (audio_np, stats): float32 PCM 16 кГц и тайминги
+        {'decode_ms', 'audio_seconds', 'decode_ms_per_audio_s'}.
+    """
+    start_time = time.time()
+    decoder = (pool or get_decoder_pool()).acquire()
+    try:
+        decoder.feed(audio_bytes)
+        audio_np = decoder.close()
+    except Exception:
+        decoder.kill()
+        raise
+    decode_ms = (time.time() - start_time) * 1000
+    audio_seconds = len(audio_np) / SAMPLE_RATE
+    stats = {
+        'decode_ms': round(decode_ms, 1),
+        'audio_seconds': round(audio_seconds, 2),
+        'decode_ms_per_audio_s': round(decode_ms / audio_seconds, 2) if audio_seconds > 0 else None,
+    }
+    return audio_np, stats
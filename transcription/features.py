@@ -0,0 +1,325 @@
+# ==============================================================================
+# SINGLE-STFT ACOUSTIC FEATURES
+# ==============================================================================
+# Все признаки для features_to_tags считаются из одного разбиения сигнала на
+# кадры (2048/512, центрирование с нулевым дополнением — как в librosa):
+#   * RMS и маска речи — из самих кадров;
+#   * спектральный центроид — из модуля одного STFT этих кадров;
+#   * темп — по огибающей онсетов из mel-спектра того же STFT;
+#   * высота тона — векторизованный YIN по тем же кадрам (автокорреляция через FFT)
+#     вместо piptrack: оценивается основной тон, а не все гармоники спектра.
+
+from collections import deque
+
+import numpy as np
+import librosa
+
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+FMIN = 65.0
+FMAX = 400.0
+YIN_THRESHOLD = 0.15
+# YIN считается по каждому второму кадру, по центральным 1024 сэмплам, после
+# прореживания в 2 раза: для статистик основного тона (до FMAX) этого достаточно
+YIN_FRAME_STEP = 2
+YIN_LENGTH = 1024
+YIN_DECIMATION = 2
+
+_mel_cache = {}
+_WINDOW = np.hanning(FRAME_LENGTH + 1)[:-1].astype(np.float32)  # периодическое окно Ханна, как в librosa
+
+
+def _frames(audio: np.ndarray) -> np.ndarray:
+    padded = np.pad(audio.astype(np.float32, copy=False), FRAME_LENGTH // 2)
+    if len(padded) < FRAME_LENGTH:
+        padded = np.pad(padded, (0, FRAME_LENGTH - len(padded)))
+    return np.lib.stride_tricks.sliding_window_view(padded, FRAME_LENGTH)[::HOP_LENGTH]
+
+
+def _mel_basis(sr: int) -> np.ndarray:
+    if sr not in _mel_cache:
+        _mel_cache[sr] = librosa.filters.mel(sr=sr, n_fft=FRAME_LENGTH)
+    return _mel_cache[sr]
+
+
+def _onset_envelope(power: np.ndarray, sr: int) -> np.ndarray:
+    """Огибающая онсетов как в librosa.beat.beat_track (медиана по mel-полосам), но из готового спектра мощности."""
+    mel_db = librosa.power_to_db(_mel_basis(sr) @ power.T)
+    flux = np.median(np.maximum(0.0, mel_db[:, 1:] - mel_db[:, :-1]), axis=0)
+    return np.pad(flux, (1 + FRAME_LENGTH // (2 * HOP_LENGTH), 0))[:power.shape[0]]
+
+
+def _yin(frames: np.ndarray, sr: int) -> np.ndarray:
+    """Оценки основного тона (Гц) для каждого переданного кадра; 0 — тон не найден."""
+    if len(frames) == 0:
+        return np.zeros(0)
+    start = (frames.shape[1] - YIN_LENGTH) // 2
+    x = frames[:, start:start + YIN_LENGTH].astype(np.float32)
+    x = x.reshape(len(x), -1, YIN_DECIMATION).mean(axis=2)
+    sr = sr / YIN_DECIMATION
+    n = x.shape[1]
+    min_lag = max(2, int(sr / FMAX))
+    max_lag = min(int(sr / FMIN), n // 2)
+
+    # d(t) = sum_{j<n-t} (x_j - x_{j+t})^2 через автокорреляцию и кумулятивные энергии
+    spectrum = np.fft.rfft(x, n=2 * n)
+    acf = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n=2 * n)[:, :max_lag + 2]
+    cumulative = np.cumsum(x.astype(np.float64) ** 2, axis=1)
+    lags = np.arange(max_lag + 2)
+    head = cumulative[:, n - 1 - lags]
+    tail = cumulative[:, -1:] - np.concatenate([np.zeros((len(x), 1)), cumulative[:, lags[1:] - 1]], axis=1)
+    diff = np.maximum(head + tail - 2 * acf, 0.0)
+
+    # Кумулятивно нормированная разность (CMND)
+    cmnd = np.ones_like(diff)
+    running = np.cumsum(diff[:, 1:], axis=1)
+    cmnd[:, 1:] = diff[:, 1:] * lags[1:] / np.maximum(running, 1e-12)
+
+    window = cmnd[:, min_lag:max_lag + 1]
+    below = window < YIN_THRESHOLD
+    has_pitch = below.any(axis=1)
+    # Первый провал ниже порога, уточненный до локального минимума в пределах min_lag
+    first = np.argmax(below, axis=1)
+    offsets = np.minimum(first[:, None] + np.arange(min_lag), window.shape[1] - 1)
+    best = np.take_along_axis(offsets, np.argmin(np.take_along_axis(window, offsets, axis=1), axis=1)[:, None], axis=1)[:, 0]
+    tau = best + min_lag
+
+    # Параболическая интерполяция минимума
+    rows = np.arange(len(x))
+    left, centre, right = cmnd[rows, tau - 1], cmnd[rows, tau], cmnd[rows, tau + 1]
+    denominator = left - 2 * centre + right
+    shift = np.where(np.abs(denominator) > 1e-12, 0.5 * (left - right) / np.where(denominator == 0, 1, denominator), 0.0)
+    return np.where(has_pitch, sr / (tau + np.clip(shift, -1, 1)), 0.0)
+
+
+def compute_features(audio: np.ndarray, sr: int) -> dict:
+    """Признаки из одного STFT (ключи и смысл — как у extract_features)."""
+    frames = _frames(audio)
+    energy = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    magnitude = np.abs(np.fft.rfft(frames * _WINDOW, axis=1))
+    power = magnitude ** 2
+
+    features = {}
+    features['avg_energy'] = np.mean(energy)
+    features['energy_std'] = np.std(energy)
+    features['energy_stability'] = 1 / (np.std(energy) + 0.001)
+
+    silence_threshold = np.mean(energy) * 0.15
+    speech_mask = energy > silence_threshold
+    features['speech_ratio'] = np.sum(speech_mask) / len(energy) if len(energy) > 0 else 0.0
+
+    voiced = np.flatnonzero(speech_mask)
+    pitch = _yin(frames[voiced[voiced % YIN_FRAME_STEP == 0]], sr)
+    pitch_values = pitch[pitch > 0]
+    if len(pitch_values) > 0:
+        features['avg_pitch'] = np.mean(pitch_values)
+        features['pitch_std'] = np.std(pitch_values)
+        features['pitch_stability'] = 1 / (np.std(pitch_values) + 0.1)
+    else:
+        features['avg_pitch'] = 0
+        features['pitch_std'] = 0
+        features['pitch_stability'] = 0
+
+    tempo = librosa.feature.tempo(onset_envelope=_onset_envelope(power, sr), sr=sr, hop_length=HOP_LENGTH)
+    features['tempo'] = float(tempo[0]) if np.ndim(tempo) else float(tempo)
+
+    freqs = np.fft.rfftfreq(FRAME_LENGTH, 1.0 / sr)
+    spectral_centroids = (magnitude @ freqs) / np.maximum(magnitude.sum(axis=1), 1e-10)
+    features['spectral_brightness'] = np.mean(spectral_centroids)
+    features['brightness_stability'] = 1 / (np.std(spectral_centroids) + 0.1)
+    return features
+
+
+class RunningStats:
+    """Среднее и дисперсия по Уэлфорду; пачки значений объединяются формулой Чана."""
+
+    def __init__(self, count: float = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def merge(self, other: "RunningStats"):
+        total = self.count + other.count
+        if total == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        mean = float(np.mean(values))
+        self.merge(RunningStats(len(values), mean, float(np.sum((values - mean) ** 2))))
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+
+class StreamingFeatures:
+    """
+    Признаки compute_features, накапливаемые по мере поступления аудио.
+
+    Разбиение на кадры совпадает с пакетным (центрирование нулями в начале и
+    в конце записи). Память постоянна: хранятся только хвост незаконченного
+    кадра, накопители Уэлфорда и гистограмма по уровню энергии. Порог речи
+    (0.15 x средняя энергия всей записи) известен только в конце, поэтому доля
+    речи и статистики тона накапливаются по логарифмическим корзинам энергии
+    и объединяются для корзин выше порога в finalize(). Огибающая онсетов для
+    темпа хранится за последние `max_onset_seconds`; порог top_db для нее
+    берется от максимума, накопленного к текущему кадру, поэтому темп может
+    незначительно отличаться от пакетного (на стационарных сигналах без
+    онсетов, например чистом тоне, оценка темпа неустойчива в обоих режимах).
+    """
+
+    ENERGY_BINS = np.logspace(-6, 1, 401)
+
+    def __init__(self, sr: int, max_onset_seconds: float = 300.0):
+        self.sr = sr
+        self._buffer = np.zeros(FRAME_LENGTH // 2, dtype=np.float32)
+        self._frame_index = 0
+        self.samples = 0
+        self.energy = RunningStats()
+        self.centroid = RunningStats()
+        bins = len(self.ENERGY_BINS) + 1
+        self._bin_frames = np.zeros(bins)
+        self._bin_pitch_count = np.zeros(bins)
+        self._bin_pitch_mean = np.zeros(bins)
+        self._bin_pitch_m2 = np.zeros(bins)
+        self._freqs = np.fft.rfftfreq(FRAME_LENGTH, 1.0 / sr)
+        self._mel_max_db = -np.inf
+        self._previous_mel_db = None
+        self._onset = deque([0.0] * (1 + FRAME_LENGTH // (2 * HOP_LENGTH)), maxlen=int(max_onset_seconds * sr / HOP_LENGTH))
+
+    def update(self, samples: np.ndarray):
+        """Учитывает очередной фрагмент PCM."""
+        self.samples += len(samples)
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False)])
+        count = (len(self._buffer) - FRAME_LENGTH) // HOP_LENGTH + 1 if len(self._buffer) >= FRAME_LENGTH else 0
+        if count == 0:
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(self._buffer, FRAME_LENGTH)[::HOP_LENGTH][:count]
+        self._process(frames)
+        self._buffer = self._buffer[count * HOP_LENGTH:].copy()
+
+    def _process(self, frames: np.ndarray):
+        indices = self._frame_index + np.arange(len(frames))
+        self._frame_index += len(frames)
+
+        energy = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+        magnitude = np.abs(np.fft.rfft(frames * _WINDOW, axis=1))
+        self.energy.update(energy)
+        self.centroid.update((magnitude @ self._freqs) / np.maximum(magnitude.sum(axis=1), 1e-10))
+
+        bins = np.digitize(energy, self.ENERGY_BINS)
+        self._bin_frames += np.bincount(bins, minlength=len(self._bin_frames))
+
+        step = indices % YIN_FRAME_STEP == 0
+        pitch = _yin(frames[step], self.sr)
+        found = pitch > 0
+        self._update_pitch_bins(bins[step][found], pitch[found])
+
+        # Огибающая онсетов: порог top_db считается от максимума, накопленного с начала записи
+        mel_power_db = 10.0 * np.log10(np.maximum(_mel_basis(self.sr) @ (magnitude ** 2).T, 1e-10))
+        self._mel_max_db = max(self._mel_max_db, float(mel_power_db.max()))
+        mel_db = np.maximum(mel_power_db, self._mel_max_db - 80.0)
+        if self._previous_mel_db is not None:
+            mel_db_with_previous = np.concatenate([self._previous_mel_db, mel_db], axis=1)
+        else:
+            mel_db_with_previous = mel_db
+        flux = np.median(np.maximum(0.0, mel_db_with_previous[:, 1:] - mel_db_with_previous[:, :-1]), axis=0)
+        self._onset.extend(flux.tolist())
+        self._previous_mel_db = mel_db[:, -1:]
+
+    def _update_pitch_bins(self, bins: np.ndarray, pitch: np.ndarray):
+        # Та же формула Чана, векторизованная по корзинам энергии
+        if len(pitch) == 0:
+            return
+        size = len(self._bin_frames)
+        count = np.bincount(bins, minlength=size).astype(float)
+        mean = np.bincount(bins, weights=pitch, minlength=size) / np.maximum(count, 1)
+        m2 = np.bincount(bins, weights=(pitch - mean[bins]) ** 2, minlength=size)
+        total = np.maximum(self._bin_pitch_count + count, 1)
+        delta = mean - self._bin_pitch_mean
+        self._bin_pitch_mean += delta * count / total
+        self._bin_pitch_m2 += m2 + delta ** 2 * self._bin_pitch_count * count / total
+        self._bin_pitch_count += count
+
+    def finalize(self) -> dict:
+        """Досчитывает последние кадры и возвращает признаки (ключи как у compute_features)."""
+        tail = np.concatenate([self._buffer, np.zeros(FRAME_LENGTH // 2, dtype=np.float32)])
+        if len(tail) >= FRAME_LENGTH:
+            # Кадры с началом до конца записи, как при пакетном центрировании
+            count = (self.samples + FRAME_LENGTH // 2 * 2 - FRAME_LENGTH) // HOP_LENGTH + 1 - self._frame_index
+            frames = np.lib.stride_tricks.sliding_window_view(tail, FRAME_LENGTH)[::HOP_LENGTH][:max(count, 0)]
+            if len(frames):
+                self._process(frames)
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+        features = {}
+        features['avg_energy'] = self.energy.mean
+        features['energy_std'] = self.energy.std
+        features['energy_stability'] = 1 / (self.energy.std + 0.001)
+
+        # Корзины целиком выше порога речи
+        speech_bins = np.arange(len(self._bin_frames)) >= np.searchsorted(self.ENERGY_BINS, self.energy.mean * 0.15)
+        features['speech_ratio'] = self._bin_frames[speech_bins].sum() / self.energy.count if self.energy.count else 0.0
+
+        pitch = RunningStats()
+        for b in np.flatnonzero(speech_bins & (self._bin_pitch_count > 0)):
+            pitch.merge(RunningStats(self._bin_pitch_count[b], self._bin_pitch_mean[b], self._bin_pitch_m2[b]))
+        if pitch.count > 0:
+            features['avg_pitch'] = pitch.mean
+            features['pitch_std'] = pitch.std
+            features['pitch_stability'] = 1 / (pitch.std + 0.1)
+        else:
+            features['avg_pitch'] = 0
+            features['pitch_std'] = 0
+            features['pitch_stability'] = 0
+
+        onset = np.asarray(self._onset)[:max(self._frame_index, 1)]
+        tempo = librosa.feature.tempo(onset_envelope=onset, sr=self.sr, hop_length=HOP_LENGTH)
+        features['tempo'] = float(tempo[0]) if np.ndim(tempo) else float(tempo)
+
+        features['spectral_brightness'] = self.centroid.mean
+        features['brightness_stability'] = 1 / (self.centroid.std + 0.1)
+        return features
+
+
+def compute_features_librosa(audio: np.ndarray, sr: int) -> dict:
+    """Прежний расчет отдельными вызовами librosa (rms, piptrack, beat_track, spectral_centroid)."""
+    features = {}
+
+    # Энергетические характеристики
+    energy = librosa.feature.rms(y=audio)[0]
+    features['avg_energy'] = np.mean(energy)
+    features['energy_std'] = np.std(energy)
+    features['energy_stability'] = 1 / (np.std(energy) + 0.001)
+
+    # Высота тона
+    pitches, magnitudes = librosa.piptrack(y=audio, sr=sr)
+    pitch_values = pitches[pitches > 0]
+    if len(pitch_values) > 0:
+        features['avg_pitch'] = np.mean(pitch_values)
+        features['pitch_std'] = np.std(pitch_values)
+        features['pitch_stability'] = 1 / (np.std(pitch_values) + 0.1)
+    else:
+        features['avg_pitch'] = 0
+        features['pitch_std'] = 0
+        features['pitch_stability'] = 0
+
+    # Темп и речевая активность
+    tempo, _ = librosa.beat.beat_track(y=audio, sr=sr)
+    features['tempo'] = tempo[0] if isinstance(tempo, np.ndarray) and tempo.size > 0 else tempo
+
+    silence_threshold = np.mean(energy) * 0.15
+    speech_frames = np.sum(energy > silence_threshold)
+    features['speech_ratio'] = speech_frames / len(energy) if len(energy) > 0 else 0.0
+
+    # Спектральные характеристики
+    spectral_centroids = librosa.feature.spectral_centroid(y=audio, sr=sr)[0]
+    features['spectral_brightness'] = np.mean(spectral_centroids)
+    features['brightness_stability'] = 1 / (np.std(spectral_centroids) + 0.1)
+    return features
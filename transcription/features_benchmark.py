@@ -0,0 +1,91 @@
+# ==============================================================================
+# FEATURE ENGINE BENCHMARK
+# ==============================================================================
+# Сравнение compute_features (один STFT + YIN) с прежним расчетом через librosa
+# по скорости, значениям признаков и итоговым тегам/оценкам features_to_tags на
+# синтетическом "голосе": гармонический сигнал с плавающим основным тоном,
+# паузами и шумом.
+#
+#   python features_benchmark.py --durations 5 30 120 --repeats 3
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from features import compute_features, compute_features_librosa
+from voice_analyser import features_to_tags
+
+SR = 16000
+
+
+def synthetic_voice(seconds: float, f0: float = 140.0, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SR)) / SR
+    frequency = f0 * (1 + 0.08 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(frequency) / SR
+    signal = sum((0.3 / k) * np.sin(k * phase) for k in range(1, 8))
+    syllables = (np.sin(2 * np.pi * 2.5 * t) > -0.3).astype(float)
+    return (signal * syllables + 0.005 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def best_time(fn, audio: np.ndarray, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(audio, SR)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def tags_and_scores(features: dict):
+    with contextlib.redirect_stdout(io.StringIO()):  # features_to_tags печатает ход работы
+        return features_to_tags(features)
+
+
+def print_tag_diff(reference: dict, fast: dict):
+    """Печатает оценки обоих движков и расхождения тегов."""
+    reference_tags, fast_tags = tags_and_scores(reference), tags_and_scores(fast)
+    only_reference = sorted(set(reference_tags['tags']) - set(fast_tags['tags']))
+    only_fast = sorted(set(fast_tags['tags']) - set(reference_tags['tags']))
+    print(f"   {'оценка':<22}{'librosa':>14}{'fast':>14}")
+    for key in reference_tags['scores']:
+        print(f"   {key:<22}{reference_tags['scores'][key]:>14.1f}{fast_tags['scores'][key]:>14.1f}")
+    print(f"   {'overall_score':<22}{reference_tags['overall_score']:>14.1f}{fast_tags['overall_score']:>14.1f}")
+    if not only_reference and not only_fast and reference_tags['scores'] == fast_tags['scores']:
+        print("   ✅ Теги и оценки совпадают")
+    else:
+        print(f"   ⚠️ Теги только librosa: {only_reference or '-'}; только fast: {only_fast or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость и согласованность движков акустических признаков")
+    parser.add_argument("--durations", type=float, nargs="+", default=[5, 30, 120], help="Длительности сигналов, с")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--f0", type=float, default=140.0, help="Основной тон синтетического голоса, Гц")
+    args = parser.parse_args()
+
+    # Прогрев: первый вызов librosa компилирует numba-ядра
+    warmup = synthetic_voice(2, args.f0)
+    compute_features_librosa(warmup, SR)
+    compute_features(warmup, SR)
+
+    for seconds in args.durations:
+        audio = synthetic_voice(seconds, args.f0)
+        librosa_s, reference = best_time(compute_features_librosa, audio, args.repeats)
+        fast_s, fast = best_time(compute_features, audio, args.repeats)
+        print(f"\n⏱️ {seconds:.0f}с аудио: librosa {librosa_s * 1000:.1f} мс, fast {fast_s * 1000:.1f} мс, ускорение x{librosa_s / fast_s:.1f}")
+        print(f"   {'признак':<22}{'librosa':>14}{'fast':>14}{'отн. разница':>14}")
+        for key in reference:
+            ref_value, fast_value = float(reference[key]), float(fast[key])
+            relative = abs(fast_value - ref_value) / max(abs(ref_value), 1e-9)
+            print(f"   {key:<22}{ref_value:>14.4f}{fast_value:>14.4f}{relative:>13.1%}")
+        print_tag_diff(reference, fast)
+    print(f"\nℹ️ avg_pitch/pitch_std: librosa усредняет все пики piptrack (гармоники), fast — основной тон YIN ({args.f0:.0f} Гц в сигнале).")
+    print("ℹ️ Пороги features_to_tags подобраны по librosa: при расхождении тегов FEATURE_ENGINE=fast требует пересчета порогов.")
+
+
+if __name__ == "__main__":
+    main()
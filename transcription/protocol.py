@@ -0,0 +1,39 @@
+# ==============================================================================
+# BINARY WEBSOCKET FRAMING
+# ==============================================================================
+# Аудио передается бинарными кадрами: 5-байтовый заголовок и сырые байты
+# WebM/Opus без base64. Управляющие сообщения ("start", "end") остаются
+# текстовыми JSON-кадрами; старый формат {"type": "audio_chunk", "data": <base64>}
+# по-прежнему принимается.
+#
+#   offset  size  поле
+#   0       1     тип кадра (FRAME_AUDIO = 0x01)
+#   1       4     порядковый номер чанка в записи (uint32, big-endian, с 0)
+#   5       ...   полезная нагрузка
+
+import struct
+
+FRAME_AUDIO = 0x01
+HEADER = struct.Struct(">BI")
+
+
+class FrameError(ValueError):
+    """Некорректный бинарный кадр."""
+
+
+def pack_audio_frame(seq: int, payload: bytes) -> bytes:
+    return HEADER.pack(FRAME_AUDIO, seq & 0xFFFFFFFF) + payload
+
+
+def unpack_audio_frame(frame: bytes):
+    """Разбирает бинарный кадр.
+
+    Returns:
+        (seq, payload)
+    """
+    if len(frame) < HEADER.size:
+        raise FrameError(f"Кадр короче заголовка ({len(frame)} байт)")
+    kind, seq = HEADER.unpack_from(frame)
+    if kind != FRAME_AUDIO:
+        raise FrameError(f"Неизвестный тип кадра: {kind}")
+    return seq, memoryview(frame)[HEADER.size:]
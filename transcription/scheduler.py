@@ -0,0 +1,113 @@
+# ==============================================================================
+# ADMISSION CONTROL FOR TRANSCRIPTION
+# ==============================================================================
+# Whisper на CPU обрабатывает задачи фактически последовательно, поэтому
+# транскрипция идет через собственный ограниченный пул потоков. Очередь имеет
+# предел: при насыщении новая запись не принимается, а клиент получает
+# сообщение "busy" с оценкой ожидания. У каждой задачи есть крайний срок —
+# задача, простоявшая в очереди дольше него, не запускается.
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DeadlineExceeded(Exception):
+    """Задача не была запущена до истечения крайнего срока."""
+
+
+class TranscriptionQueue:
+    """Ограниченная очередь задач транскрипции с метриками."""
+
+    def __init__(self, workers: int = 1, max_pending: int = 4, deadline_s: float = 120.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.deadline_s = deadline_s
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asr")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.avg_task_s = None
+        self.avg_wait_s = 0.0
+
+    def saturated(self) -> bool:
+        """True, если новую запись принимать нельзя."""
+        with self._lock:
+            return self.queued + self.running >= self.max_pending
+
+    def estimated_wait(self) -> float:
+        """Оценка ожидания (с) для задачи, поставленной сейчас."""
+        with self._lock:
+            ahead = self.queued + self.running
+        avg = self.avg_task_s if self.avg_task_s is not None else 5.0
+        return round((ahead // self.workers + 1) * avg, 1)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def _execute(self, fn, args, enqueued_at: float, deadline: float):
+        started = time.time()
+        with self._lock:
+            self.queued -= 1
+            self.avg_wait_s = 0.8 * self.avg_wait_s + 0.2 * (started - enqueued_at)
+            if started > deadline:
+                self.expired += 1
+                raise DeadlineExceeded(f"Задача ждала в очереди {started - enqueued_at:.1f}с")
+            self.running += 1
+        try:
+            return fn(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            duration = time.time() - started
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.avg_task_s = duration if self.avg_task_s is None else 0.8 * self.avg_task_s + 0.2 * duration
+
+    async def run(self, fn, *args, deadline_s: float = None):
+        """Выполняет fn(*args) в пуле транскрипции.
+
+        Raises:
+            DeadlineExceeded: задача не дождалась запуска за `deadline_s`.
+        """
+        enqueued_at = time.time()
+        deadline = enqueued_at + (deadline_s or self.deadline_s)
+        with self._lock:
+            self.queued += 1
+        future = self.executor.submit(self._execute, fn, args, enqueued_at, deadline)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future):
+        # Отмена ожидающей корутины (клиент отключился, новая запись) отменяет задачу,
+        # если она еще не запущена: _execute тогда не вызывается, и место в очереди освобождается здесь
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+                self.cancelled += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'expired': self.expired,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'avg_task_s': round(self.avg_task_s, 3) if self.avg_task_s is not None else None,
+                'avg_wait_s': round(self.avg_wait_s, 3),
+            }
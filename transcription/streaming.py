@@ -0,0 +1,93 @@
+# ==============================================================================
+# STREAMING VAD SEGMENTATION
+# ==============================================================================
+# Потоковая обработка записи: декодированный PCM (16 кГц, mono, float32, см.
+# decoder.py) режется на фразы детектором речевой активности, и каждая
+# законченная фраза транскрибируется в фоне, пока кандидат продолжает говорить.
+
+import numpy as np
+
+from decoder import SAMPLE_RATE
+
+
+class SpeechSegmenter:
+    """
+    Энергетический VAD с адаптивным порогом шума.
+
+    Сигнал делится на кадры по `frame_ms`; кадр считается речью, если его RMS
+    выше `speech_ratio` x оценка уровня шума (и не ниже `min_energy`). Фраза
+    закрывается после `min_silence_ms` тишины (не раньше `min_segment_s`) или
+    принудительно по достижении `max_segment_s` — чтобы фраза помещалась в
+    30-секундное окно Whisper. Фрагменты без речевых кадров отбрасываются.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30, min_silence_ms: int = 600,
+                 min_segment_s: float = 2.0, max_segment_s: float = 25.0, speech_ratio: float = 3.0,
+                 min_energy: float = 0.005, noise_adaptation: float = 0.01, initial_noise_floor: float = 0.001):
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.min_silence_frames = max(1, min_silence_ms // frame_ms)
+        self.min_segment_frames = int(min_segment_s * 1000) // frame_ms
+        self.max_segment_frames = int(max_segment_s * 1000) // frame_ms
+        self.speech_ratio = speech_ratio
+        self.min_energy = min_energy
+        self.noise_adaptation = noise_adaptation
+        self.noise_floor = initial_noise_floor
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._frames = []
+        self._speech_frames = 0
+        self._silence_run = 0
+
+    def _is_speech(self, energy: float) -> bool:
+        # Уровень шума мгновенно опускается к тихим кадрам и поднимается медленно:
+        # по кадрам тишины за секунды, по кадрам речи — за минуту, чтобы длинная
+        # фраза не "растворялась" в шуме, а постоянный громкий фон со временем отсекался
+        if energy < self.noise_floor:
+            self.noise_floor = energy
+        speech = energy > max(self.min_energy, self.noise_floor * self.speech_ratio)
+        rate = self.noise_adaptation / 20 if speech else self.noise_adaptation
+        self.noise_floor += rate * (energy - self.noise_floor)
+        return speech
+
+    def _emit(self):
+        segment = np.concatenate(self._frames) if self._speech_frames else None
+        self._frames = []
+        self._speech_frames = 0
+        self._silence_run = 0
+        return segment
+
+    def feed(self, samples: np.ndarray) -> list:
+        """Добавляет сэмплы и возвращает список законченных фраз (numpy массивов)."""
+        data = np.concatenate([self._tail, samples]) if self._tail.size else samples
+        count = len(data) // self.frame_size
+        self._tail = data[count * self.frame_size:]
+        if count == 0:
+            return []
+
+        frames = data[:count * self.frame_size].reshape(count, self.frame_size)
+        energy = np.sqrt(np.mean(frames ** 2, axis=1))
+
+        segments = []
+        for frame, frame_energy in zip(frames, energy):
+            self._frames.append(frame)
+            if self._is_speech(float(frame_energy)):
+                self._speech_frames += 1
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+            length = len(self._frames)
+            pause = self._silence_run >= self.min_silence_frames and length >= self.min_segment_frames
+            if pause or length >= self.max_segment_frames:
+                segment = self._emit()
+                if segment is not None:
+                    segments.append(segment)
+        return segments
+
+    def flush(self):
+        """Возвращает последнюю незаконченную фразу (или None)."""
+        if self._tail.size:
+            self._frames.append(self._tail)
+            self._tail = np.zeros(0, dtype=np.float32)
+        if not self._frames:
+            return None
+        return self._emit()
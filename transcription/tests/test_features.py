@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from features import RunningStats, StreamingFeatures, compute_features
+from features_benchmark import SR, synthetic_voice
+
+
+def test_running_stats_merge_matches_numpy():
+    values = np.random.default_rng(1).normal(3.0, 2.0, 1000)
+    stats = RunningStats()
+    for part in np.array_split(values, 7):
+        stats.update(part)
+    stats.update(np.zeros(0))
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std())
+
+
+def test_running_stats_empty():
+    assert RunningStats().std == 0.0
+
+
+@pytest.mark.parametrize('chunk', [1000, 4096, 16000])
+def test_streaming_features_match_batch(chunk):
+    audio = synthetic_voice(8)
+    batch = compute_features(audio, SR)
+    streaming = StreamingFeatures(SR)
+    for start in range(0, len(audio), chunk):
+        streaming.update(audio[start:start + chunk])
+    streamed = streaming.finalize()
+
+    assert set(streamed) == set(batch)
+    for key in ('avg_energy', 'energy_std', 'spectral_brightness', 'brightness_stability', 'avg_pitch', 'pitch_std'):
+        assert streamed[key] == pytest.approx(batch[key], rel=1e-4), key
+    # Порог речи в потоке применяется по корзинам энергии, темп — с накопленным top_db
+    assert streamed['speech_ratio'] == pytest.approx(batch['speech_ratio'], abs=0.02)
+    assert streamed['tempo'] == pytest.approx(batch['tempo'], rel=0.05)
@@ -0,0 +1,22 @@
+import pytest
+
+from protocol import FRAME_AUDIO, FrameError, pack_audio_frame, unpack_audio_frame
+
+
+def test_round_trip():
+    frame = pack_audio_frame(7, b"\x1aE\xdf\xa3webm")
+    assert frame[0] == FRAME_AUDIO
+    seq, payload = unpack_audio_frame(frame)
+    assert seq == 7
+    assert bytes(payload) == b"\x1aE\xdf\xa3webm"
+
+
+def test_sequence_wraps_at_uint32():
+    seq, payload = unpack_audio_frame(pack_audio_frame(2 ** 32 + 3, b""))
+    assert (seq, bytes(payload)) == (3, b"")
+
+
+@pytest.mark.parametrize("frame", [b"", b"\x01\x00\x00", b"\x02\x00\x00\x00\x01data"])
+def test_malformed_frames_are_rejected(frame):
+    with pytest.raises(FrameError):
+        unpack_audio_frame(frame)
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scheduler import DeadlineExceeded, TranscriptionQueue
+
+
+async def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_cancelled_pending_task_releases_its_slot():
+    queue = TranscriptionQueue(workers=1, max_pending=2, deadline_s=60)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(queue.run(release.wait))
+        await wait_until(lambda: queue.metrics()['running'] == 1)
+        pending = asyncio.ensure_future(queue.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+        assert queue.saturated()
+
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        release.set()
+        await running
+
+    asyncio.run(scenario())
+    metrics = queue.metrics()
+    assert (metrics['queued'], metrics['running'], metrics['cancelled']) == (0, 0, 1)
+    assert not queue.saturated()
+
+
+def test_task_past_deadline_is_not_started():
+    queue = TranscriptionQueue(workers=1, max_pending=4, deadline_s=60)
+    started = []
+
+    async def scenario():
+        blocker = asyncio.ensure_future(queue.run(time.sleep, 0.2))
+        await wait_until(lambda: queue.metrics()['running'] == 1)
+        with pytest.raises(DeadlineExceeded):
+            await queue.run(started.append, 1, deadline_s=0.05)
+        await blocker
+
+    asyncio.run(scenario())
+    assert started == []
+    assert queue.metrics()['expired'] == 1
+    assert queue.metrics()['queued'] == 0
+
+
+def test_estimated_wait_grows_with_backlog():
+    queue = TranscriptionQueue(workers=2, max_pending=8)
+    assert queue.estimated_wait() == 5.0
+    queue.queued = 4
+    assert queue.estimated_wait() == 15.0
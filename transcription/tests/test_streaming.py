@@ -0,0 +1,93 @@
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from decoder import SAMPLE_RATE, FFmpegStreamDecoder
+from streaming import SpeechSegmenter
+
+
+def tone(seconds, amplitude=0.2):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 180 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def feed_in_chunks(segmenter, audio, chunk_s=0.25):
+    segments = []
+    step = int(chunk_s * SAMPLE_RATE)
+    for start in range(0, len(audio), step):
+        segments.extend(segmenter.feed(audio[start:start + step]))
+    last = segmenter.flush()
+    return segments + ([last] if last is not None else [])
+
+
+def test_phrases_are_split_at_pauses():
+    audio = np.concatenate([tone(3), silence(1), tone(2.5), silence(1)])
+    segments = feed_in_chunks(SpeechSegmenter(), audio)
+    # Фраза закрывается после 600 мс тишины; остаток паузы идет в начало следующей, хвост без речи отбрасывается
+    assert [round(len(segment) / SAMPLE_RATE, 1) for segment in segments] == [3.6, 3.5]
+
+
+def test_speech_at_recording_start_is_kept():
+    segments = feed_in_chunks(SpeechSegmenter(), np.concatenate([tone(2.5), silence(1)]))
+    assert len(segments) == 1
+    assert np.abs(segments[0][:SAMPLE_RATE]).max() > 0.1
+
+
+def test_long_speech_is_cut_at_max_segment():
+    segments = feed_in_chunks(SpeechSegmenter(max_segment_s=5.0), tone(12))
+    assert [round(len(segment) / SAMPLE_RATE) for segment in segments] == [5, 5, 2]
+
+
+def test_silence_produces_no_segments():
+    assert feed_in_chunks(SpeechSegmenter(), silence(5)) == []
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg не установлен")
+def test_decoder_survives_corrupt_input():
+    decoder = FFmpegStreamDecoder()
+    garbage = np.random.default_rng(0).integers(0, 256, 2_000_000, dtype=np.uint8).tobytes()
+    try:
+        for start in range(0, len(garbage), 65536):
+            decoder.feed(garbage[start:start + 65536])
+    except (BrokenPipeError, OSError):
+        pass
+    assert decoder.close(timeout=10).dtype == np.float32
+
+
+class FakeProcess:
+    def poll(self):
+        return None
+
+
+class FakeDecoder:
+    def __init__(self, sample_rate):
+        time.sleep(0.05)  # запуск процесса
+        self.process = FakeProcess()
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+
+def test_decoder_pool_does_not_grow_after_a_burst(monkeypatch):
+    import decoder
+
+    monkeypatch.setattr(decoder, "FFmpegStreamDecoder", FakeDecoder)
+    pool = decoder.DecoderPool(size=2)
+    acquired = []
+    threads = [threading.Thread(target=lambda: acquired.append(pool.acquire())) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(0.5)  # фоновые замены выданных декодеров
+    assert len(acquired) == 10
+    assert len(pool._idle) == 2
+    assert not any(item.killed for item in acquired)
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import voice_analyser as va
+from protocol import pack_audio_frame
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(va.service_state, 'ready', True)
+    monkeypatch.setattr(va, 'STREAMING_ENABLED', False)
+    processed = []
+
+    async def fake_process(audio_bytes):
+        processed.append(bytes(audio_bytes))
+        return 'text', {'tags': [], 'meta': {}}
+
+    monkeypatch.setattr(va, 'process_buffered_audio', fake_process)
+    with TestClient(va.app) as test_client:
+        yield test_client, processed
+
+
+def test_busy_discards_recording_and_next_one_starts_clean(client, monkeypatch):
+    test_client, processed = client
+    saturated = [True]
+    monkeypatch.setattr(va.transcription_queue, 'saturated', lambda: saturated[0])
+
+    with test_client.websocket_connect('/ws/voice') as ws:
+        ws.send_bytes(pack_audio_frame(0, b'first'))
+        ws.send_json({'type': 'end'})
+        assert ws.receive_json()['type'] == 'busy'
+
+        # Новая запись без `start`: номера чанков снова с 0, старые байты не подмешиваются
+        saturated[0] = False
+        ws.send_bytes(pack_audio_frame(0, b'second'))
+        ws.send_json({'type': 'end'})
+        response = ws.receive_json()
+
+    assert response['type'] == 'final_result'
+    assert processed == [b'second']
+
+
+def test_deadline_miss_answers_busy(client, monkeypatch):
+    test_client, _ = client
+
+    async def too_late(audio_bytes):
+        raise va.DeadlineExceeded()
+
+    monkeypatch.setattr(va, 'process_buffered_audio', too_late)
+    with test_client.websocket_connect('/ws/voice') as ws:
+        ws.send_bytes(pack_audio_frame(0, b'audio'))
+        ws.send_json({'type': 'end'})
+        assert ws.receive_json()['type'] == 'busy'
+
+
+def test_missed_phrase_is_recorded_on_session(monkeypatch):
+    async def too_late(*args):
+        raise va.DeadlineExceeded()
+
+    monkeypatch.setattr(va.transcription_queue, 'run', too_late)
+    session = va.StreamingSession.__new__(va.StreamingSession)
+    session.texts = []
+    session.missed_segments = 0
+    asyncio.run(session._transcribe_after(None, np.zeros(1600, dtype=np.float32), 1))
+    assert session.missed_segments == 1
+
+
+def test_partial_streaming_result_is_not_sent(monkeypatch):
+    class MissedSession:
+        async def finish(self):
+            raise va.DeadlineExceeded("Не распознано фраз: 1 из 3")
+
+    buffered = []
+
+    async def fake_process(audio_bytes):
+        buffered.append(audio_bytes)
+        return 'text', {'tags': [], 'meta': {}}
+
+    monkeypatch.setattr(va, 'process_buffered_audio', fake_process)
+    assert asyncio.run(va.finish_recording(MissedSession(), b'audio')) is None
+    assert buffered == []
+
+
+def test_batching_is_disabled_for_backends_without_batch_decoding(monkeypatch):
+    from asr import backend_supports_batching
+
+    monkeypatch.setenv('ASR_BACKEND', 'faster-whisper')
+    assert not backend_supports_batching()
+    monkeypatch.setenv('ASR_BACKEND', 'whisper')
+    assert backend_supports_batching()
+
+
+class FakeDecoder:
+    """Вместо ffmpeg: чанки — уже готовый float32 PCM."""
+
+    def __init__(self):
+        self.pending = []
+
+    def feed(self, chunk):
+        self.pending.append(np.frombuffer(chunk, dtype=np.float32))
+
+    def read(self):
+        pending, self.pending = self.pending, []
+        return np.concatenate(pending) if pending else np.zeros(0, dtype=np.float32)
+
+    def close(self):
+        return self.read()
+
+
+class FakeDecoderPool:
+    def acquire(self):
+        return FakeDecoder()
+
+
+@pytest.mark.parametrize('engine', ['librosa', 'fast'])
+def test_streaming_and_buffered_analysis_give_same_tags(monkeypatch, engine):
+    from features_benchmark import synthetic_voice
+
+    async def skip_transcription(self, previous, segment, index):
+        pass
+
+    monkeypatch.setattr(va, 'FEATURE_ENGINE', engine)
+    monkeypatch.setattr(va, 'get_decoder_pool', FakeDecoderPool)
+    monkeypatch.setattr(va.StreamingSession, '_transcribe_after', skip_transcription)
+    audio = synthetic_voice(6)
+
+    async def stream():
+        session = va.StreamingSession(websocket=None)
+        for start in range(0, len(audio), 4000):
+            await session.feed(audio[start:start + 4000].tobytes())
+        return await session.finish()
+
+    _, streamed = asyncio.run(stream())
+    buffered = va.analyze_audio_sync(audio, va.SAMPLE_RATE)
+    assert sorted(streamed['tags']) == sorted(buffered['tags'])
+    assert streamed['scores'] == buffered['scores']
+
+
+def test_librosa_is_the_default_feature_engine():
+    env = {key: value for key, value in os.environ.items() if key != 'FEATURE_ENGINE'}
+    output = subprocess.run(
+        [sys.executable, '-c', 'import voice_analyser; print(voice_analyser.FEATURE_ENGINE)'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == 'librosa'
+
+
+def test_streaming_feature_error_still_gives_final_result(monkeypatch):
+    from features_benchmark import synthetic_voice
+
+    async def skip_transcription(self, previous, segment, index):
+        pass
+
+    def broken_update(self, samples):
+        raise ValueError("сбой признаков")
+
+    monkeypatch.setattr(va, 'FEATURE_ENGINE', 'fast')
+    monkeypatch.setattr(va, 'get_decoder_pool', FakeDecoderPool)
+    monkeypatch.setattr(va.StreamingSession, '_transcribe_after', skip_transcription)
+    monkeypatch.setattr(va.StreamingFeatures, 'update', broken_update)
+    audio = synthetic_voice(2)
+
+    async def stream():
+        session = va.StreamingSession(websocket=None)
+        for start in range(0, len(audio), 4000):
+            await session.feed(audio[start:start + 4000].tobytes())
+        return await va.finish_recording(session, b'')
+
+    transcription, analysis = asyncio.run(stream())
+    assert transcription
+    assert analysis['tags']
+
+
+def test_unexpected_streaming_error_falls_back_to_buffered(monkeypatch):
+    class BrokenSession:
+        aborted = False
+
+        async def finish(self):
+            raise RuntimeError("сбой")
+
+        def abort(self):
+            self.aborted = True
+
+    async def fake_process(audio_bytes):
+        return 'text', {'tags': [], 'meta': {}}
+
+    monkeypatch.setattr(va, 'process_buffered_audio', fake_process)
+    session = BrokenSession()
+    assert asyncio.run(va.finish_recording(session, b'audio'))[0] == 'text'
+    assert session.aborted
@@ -0,0 +1,414 @@
+# ==============================================================================
+# END-TO-END TRANSCRIPTION BENCHMARK
+# ==============================================================================
+# Нагрузочный прогон сервиса транскрипции через /ws/voice на синтетических
+# записях. Для каждой конфигурации (переменные окружения сервиса: ASR_BACKEND,
+# WHISPER_MODEL, ASR_BATCH_SIZE, ASR_WORKERS, ...) бенчмарк запускает сервис
+# локально, дожидается /readyz, затем N одновременных клиентов отправляют
+# записи бинарными кадрами (protocol.py) и ждут final_result. Отчет: время до
+# результата после `end`, real-time factor, разбивка по этапам (декодирование,
+# ASR, признаки голоса из meta ответа), CPU и память процесса сервиса.
+#
+# Записи: tone — гармонический тон, noise — только шум, voice — синтетический
+# "голос" с фразами и паузами, tts — русские фразы через espeak-ng (если
+# установлен). Все работает офлайн на CPU.
+#
+#   python transcription_benchmark.py --config ASR_BACKEND=whisper \
+#       --config ASR_BACKEND=faster-whisper,ASR_COMPUTE_TYPE=int8 --concurrency 1 4
+#   python transcription_benchmark.py --url ws://localhost:8001/ws/voice   # уже запущенный сервис
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+
+from decoder import SAMPLE_RATE
+from protocol import pack_audio_frame
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHUNK_S = 0.25  # как timeslice MediaRecorder во фронтенде
+TTS_SENTENCES = [
+    "Здравствуйте, меня зовут Анна, я backend разработчик.",
+    "Последние три года я работала с Python и PostgreSQL.",
+    "В текущем проекте я отвечала за платежный сервис и его мониторинг.",
+    "Мне интересно развиваться в сторону архитектуры распределенных систем.",
+]
+
+
+# ==============================================================================
+# AUDIO FIXTURES
+# ==============================================================================
+
+def tone(seconds: float, seed: int = 0) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.2 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def noise(seconds: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (0.003 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def voice(seconds: float, seed: int = 0) -> np.ndarray:
+    """Гармонический сигнал с плавающим тоном, слогами и паузами между фразами (~4-7 с)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    frequency = 140 * (1 + 0.08 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(frequency) / SAMPLE_RATE
+    signal = sum((0.3 / k) * np.sin(k * phase) for k in range(1, 8))
+    syllables = (np.sin(2 * np.pi * 2.5 * t) > -0.3).astype(float)
+    phrases = np.ones(len(t))
+    position = 0.0
+    while position < seconds:
+        position += rng.uniform(4, 7)
+        start = int(position * SAMPLE_RATE)
+        phrases[start:start + int(0.9 * SAMPLE_RATE)] = 0
+        position += 0.9
+    return (signal * syllables * phrases + 0.003 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def tts(seconds: float, seed: int = 0) -> np.ndarray:
+    """Русские фразы через espeak-ng (офлайн), повторяются до нужной длительности."""
+    binary = shutil.which("espeak-ng") or shutil.which("espeak")
+    if binary is None:
+        raise RuntimeError("espeak-ng не установлен")
+    parts = []
+    total = 0
+    index = seed
+    while total < seconds * SAMPLE_RATE:
+        sentence = TTS_SENTENCES[index % len(TTS_SENTENCES)]
+        wav = subprocess.run([binary, "-v", "ru", "--stdout", sentence], capture_output=True, check=True).stdout
+        pcm = subprocess.run(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0", "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+            input=wav, capture_output=True, check=True,
+        ).stdout
+        parts.extend([np.frombuffer(pcm, np.float32), np.zeros(int(0.8 * SAMPLE_RATE), np.float32)])
+        total += len(parts[-2]) + len(parts[-1])
+        index += 1
+    return np.concatenate(parts)[:int(seconds * SAMPLE_RATE)]
+
+
+FIXTURES = {'tone': tone, 'noise': noise, 'voice': voice, 'tts': tts}
+
+
+def encode_webm(audio_np: np.ndarray) -> bytes:
+    """Кодирует PCM в WebM/Opus — тот же формат, что пишет MediaRecorder в браузере."""
+    return subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", "32k", "-f", "webm", "pipe:1"],
+        input=audio_np.tobytes(), capture_output=True, check=True,
+    ).stdout
+
+
+def build_fixtures(names: list, durations: list) -> list:
+    fixtures = []
+    for name in names:
+        for seconds in durations:
+            try:
+                audio = FIXTURES[name](seconds)
+            except Exception as e:
+                print(f"⚠️ Запись '{name}' пропущена: {e}")
+                break
+            fixtures.append({'name': f"{name}-{seconds:g}s", 'seconds': len(audio) / SAMPLE_RATE, 'webm': encode_webm(audio)})
+    return fixtures
+
+
+# ==============================================================================
+# SERVICE PROCESS
+# ==============================================================================
+
+class ProcessMonitor:
+    """Периодически снимает CPU и RSS процесса сервиса (вместе с дочерними ffmpeg, если есть psutil)."""
+
+    def __init__(self, pid: int, interval_s: float = 0.5):
+        self.pid = pid
+        self.interval_s = interval_s
+        self.samples = []
+        self._stop = threading.Event()
+        try:
+            import psutil
+            self._process = psutil.Process(pid)
+        except ImportError:
+            self._process = None
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _read(self):
+        """(CPU-секунды, RSS в МБ)."""
+        if self._process is not None:
+            processes = [self._process] + self._process.children(recursive=True)
+            cpu = rss = 0.0
+            for process in processes:
+                try:
+                    times = process.cpu_times()
+                    cpu += times.user + times.system + getattr(times, 'children_user', 0) + getattr(times, 'children_system', 0)
+                    rss += process.memory_info().rss
+                except Exception:
+                    continue
+            return cpu, rss / 2 ** 20
+        # Без psutil: только сам процесс, через /proc (Linux)
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{self.pid}/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        return cpu, rss / 2 ** 20
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.samples.append((time.time(), *self._read()))
+            except Exception:
+                return
+            self._stop.wait(self.interval_s)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        if len(self.samples) < 2:
+            return {}
+        (t0, cpu0, _), (t1, cpu1, _) = self.samples[0], self.samples[-1]
+        return {
+            'cpu_percent': round(100 * (cpu1 - cpu0) / max(t1 - t0, 1e-9), 1),
+            'rss_peak_mb': round(max(rss for _, _, rss in self.samples), 1),
+        }
+
+
+def start_service(overrides: dict, port: int, timeout_s: float):
+    """Запускает сервис с заданными переменными окружения и ждет /readyz.
+
+    Returns:
+        (процесс, время холодного старта в с, ответ /readyz)
+    """
+    env = {**os.environ, 'MODEL_LOADING': 'eager', **overrides}
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "voice_analyser:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=SERVICE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    started = time.time()
+    while time.time() - started < timeout_s:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"Сервис завершился при запуске:\n{log.read().decode(errors='replace')[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=2) as response:
+                return process, time.time() - started, json.loads(response.read())
+        except Exception:
+            time.sleep(0.5)
+    stop_service(process)
+    raise RuntimeError(f"Сервис не стал готов за {timeout_s:.0f}с")
+
+
+def stop_service(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def fetch_metrics(ws_url: str) -> dict:
+    http_url = ws_url.replace("ws://", "http://").replace("wss://", "https://").rsplit("/ws/", 1)[0]
+    try:
+        with urllib.request.urlopen(f"{http_url}/metrics", timeout=5) as response:
+            return json.loads(response.read())
+    except Exception:
+        return {}
+
+
+# ==============================================================================
+# CLIENTS
+# ==============================================================================
+
+async def run_client(ws_url: str, fixture: dict, realtime: bool, streaming: bool) -> dict:
+    """Одна запись: start, бинарные кадры, end; ждет final_result (или busy/error)."""
+    webm = fixture['webm']
+    chunk_size = max(1, int(len(webm) * CHUNK_S / fixture['seconds']))
+    result = {'fixture': fixture['name'], 'audio_s': fixture['seconds'], 'partials': 0}
+    async with websockets.connect(ws_url, max_size=None, open_timeout=600) as ws:
+        await ws.send(json.dumps({'type': 'start', 'streaming': streaming}))
+        started = time.time()
+        for seq, offset in enumerate(range(0, len(webm), chunk_size)):
+            await ws.send(pack_audio_frame(seq, webm[offset:offset + chunk_size]))
+            if realtime:
+                await asyncio.sleep(max(0.0, started + (seq + 1) * CHUNK_S - time.time()))
+        end_sent = time.time()
+        await ws.send(json.dumps({'type': 'end'}))
+        async for raw in ws:
+            message = json.loads(raw)
+            if message['type'] == 'partial_transcription':
+                result['partials'] += 1
+                result.setdefault('first_partial_s', round(time.time() - started, 3))
+                continue
+            result['status'] = message['type']
+            if message['type'] != 'final_result':
+                result['message'] = message.get('message')
+                break
+            finished = time.time()
+            meta = message['analysis'].get('meta', {})
+            result.update({
+                'time_to_final_s': finished - end_sent,
+                'total_s': finished - started,
+                'rtf': (finished - started) / fixture['seconds'],
+                'decode_ms': meta.get('decode', {}).get('decode_ms'),
+                'asr_ms': meta.get('asr', {}).get('asr_ms'),
+                'features_ms': meta.get('processing_time_ms'),
+                'text': message['transcription'],
+            })
+            break
+    return result
+
+
+async def run_round(ws_url: str, fixtures: list, concurrency: int, realtime: bool, streaming: bool) -> list:
+    """Каждая запись прогоняется `concurrency` клиентами одновременно."""
+    results = []
+    for fixture in fixtures:
+        outcomes = await asyncio.gather(
+            *(run_client(ws_url, fixture, realtime, streaming) for _ in range(concurrency)),
+            return_exceptions=True,
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                outcome = {'fixture': fixture['name'], 'status': 'exception', 'message': str(outcome)}
+            results.append(outcome)
+    return results
+
+
+# ==============================================================================
+# REPORT
+# ==============================================================================
+
+def percentile(values: list, q: float):
+    return float(np.percentile(values, q)) if values else None
+
+
+def mean(values: list):
+    values = [value for value in values if value is not None]
+    return statistics.mean(values) if values else None
+
+
+def fmt(value, digits: int = 2) -> str:
+    return "—" if value is None else f"{value:.{digits}f}"
+
+
+def summarize(results: list) -> list:
+    rows = []
+    for name in dict.fromkeys(result['fixture'] for result in results):
+        group = [result for result in results if result['fixture'] == name]
+        done = [result for result in group if result.get('status') == 'final_result']
+        latency = [result['time_to_final_s'] for result in done]
+        rows.append({
+            'fixture': name,
+            'clients': len(group),
+            'ok': len(done),
+            'busy': sum(result.get('status') == 'busy' for result in group),
+            'errors': sum(result.get('status') in ('error', 'exception') for result in group),
+            'ttf_p50_s': percentile(latency, 50),
+            'ttf_p95_s': percentile(latency, 95),
+            'rtf': mean([result['rtf'] for result in done]),
+            'decode_ms': mean([result['decode_ms'] for result in done]),
+            'asr_ms': mean([result['asr_ms'] for result in done]),
+            'features_ms': mean([result['features_ms'] for result in done]),
+        })
+    return rows
+
+
+def print_report(label: str, concurrency: int, rows: list, resources: dict, metrics: dict):
+    print(f"\n📊 {label} | клиентов: {concurrency} | CPU {fmt(resources.get('cpu_percent'), 0)}% "
+          f"| пик RSS {fmt(resources.get('rss_peak_mb'), 0)} МБ")
+    print(f"   {'запись':<14}{'ok':>4}{'busy':>6}{'err':>5}{'TTF p50':>9}{'TTF p95':>9}{'RTF':>7}"
+          f"{'decode мс':>11}{'ASR мс':>10}{'признаки мс':>13}")
+    for row in rows:
+        print(f"   {row['fixture']:<14}{row['ok']:>4}{row['busy']:>6}{row['errors']:>5}"
+              f"{fmt(row['ttf_p50_s']):>9}{fmt(row['ttf_p95_s']):>9}{fmt(row['rtf']):>7}"
+              f"{fmt(row['decode_ms'], 0):>11}{fmt(row['asr_ms'], 0):>10}{fmt(row['features_ms'], 0):>13}")
+    if metrics.get('batching'):
+        print(f"   батчинг: {metrics['batching']}")
+
+
+def parse_config(text: str) -> dict:
+    overrides = {}
+    for item in filter(None, text.split(",")):
+        key, _, value = item.partition("=")
+        overrides[key.strip()] = value.strip()
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк /ws/voice на синтетических записях")
+    parser.add_argument("--config", action="append", default=[],
+                        help="Переменные окружения сервиса через запятую, например ASR_BACKEND=whisper,ASR_BATCH_SIZE=4 "
+                             "(можно несколько; по умолчанию — текущее окружение)")
+    parser.add_argument("--url", help="Использовать уже запущенный сервис (ws://.../ws/voice) вместо локального запуска")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--fixtures", nargs="+", default=["voice", "tone", "noise"], choices=list(FIXTURES))
+    parser.add_argument("--durations", type=float, nargs="+", default=[10, 45], help="Длительности записей, с")
+    parser.add_argument("--realtime", action="store_true", help="Отправлять чанки в темпе записи (иначе — максимально быстро)")
+    parser.add_argument("--buffered", action="store_true", help="Отключить потоковую транскрипцию (обработка после `end`)")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--startup-timeout", type=float, default=900)
+    parser.add_argument("--json", help="Сохранить результаты в файл")
+    args = parser.parse_args()
+
+    print("🎛️ Подготовка записей...")
+    fixtures = build_fixtures(args.fixtures, args.durations)
+    if not fixtures:
+        parser.error("нет ни одной записи")
+
+    report = []
+    configs = [None] if args.url else [parse_config(text) for text in args.config] or [{}]
+    for overrides in configs:
+        label = args.url or ", ".join(f"{key}={value}" for key, value in overrides.items()) or "окружение по умолчанию"
+        process = None
+        cold_start = {}
+        try:
+            if args.url:
+                ws_url = args.url
+            else:
+                print(f"\n🚀 Запуск сервиса: {label}")
+                process, startup_s, readiness = start_service(overrides, args.port, args.startup_timeout)
+                ws_url = f"ws://127.0.0.1:{args.port}/ws/voice"
+                cold_start = {'startup_s': round(startup_s, 2), **readiness.get('timings_ms', {})}
+                print(f"🔥 Готов за {startup_s:.1f}с: {readiness.get('timings_ms')}")
+
+            for concurrency in args.concurrency:
+                monitor = ProcessMonitor(process.pid).start() if process is not None else None
+                results = asyncio.run(run_round(ws_url, fixtures, concurrency, args.realtime, not args.buffered))
+                resources = monitor.stop() if monitor is not None else {}
+                metrics = fetch_metrics(ws_url)
+                rows = summarize(results)
+                print_report(label, concurrency, rows, resources, metrics)
+                report.append({
+                    'config': overrides, 'url': args.url, 'concurrency': concurrency, 'realtime': args.realtime,
+                    'streaming': not args.buffered, 'cold_start': cold_start, 'resources': resources,
+                    'metrics': metrics, 'summary': rows, 'results': results,
+                })
+        except Exception as e:
+            print(f"❌ Конфигурация '{label}' не выполнена: {e}")
+        finally:
+            if process is not None:
+                stop_service(process)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результаты сохранены в {args.json}")
+
+
+if __name__ == "__main__":
+    main()
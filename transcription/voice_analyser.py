@@ -5,21 +5,29 @@ import io
 import json
 import base64
 import asyncio
-import tempfile
 import os
+import threading
 import traceback
 import time
 
 # Imports for Web Server
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from starlette.websockets import WebSocketState
 
 # Imports for Transcription
-import whisper
+from asr import backend_supports_batching, load_asr_backend
+from batching import BatchingEngine
 
 # Imports for Voice Analysis
 import numpy as np
-import librosa
+
+# Imports for Decoding and Streaming Mode
+from decoder import SAMPLE_RATE, decode_audio_bytes, get_decoder_pool
+from protocol import FrameError, unpack_audio_frame
+from scheduler import DeadlineExceeded, TranscriptionQueue
+from streaming import SpeechSegmenter
+from features import StreamingFeatures, compute_features, compute_features_librosa
 
 # ==============================================================================
 # INITIALIZATION
@@ -27,67 +35,78 @@ import librosa
 
 app = FastAPI()
 
-# Load Whisper model
-model_name = os.getenv("WHISPER_MODEL", "small").strip()
-print(f"🤖 Загрузка модели Whisper '{model_name}'...")
-model = whisper.load_model(model_name)
-print(f"✅ Модель Whisper '{model_name}' загружена.")
+# Загрузка моделей: eager — при старте сервиса в фоне (с прогревом), lazy — при первом подключении (для разработки).
+# Модель ASR (бэкенд выбирается через ASR_BACKEND, см. asr.py) создается в load_models_sync().
+MODEL_LOADING = os.getenv("MODEL_LOADING", "eager").strip().lower()
+asr = None
+batching_engine = None
+transcriber = None
+models_lock = threading.Lock()
+service_state = {'ready': False, 'loading': False, 'error': None, 'timings_ms': {}}
+
+# Батчинг фрагментов из разных сессий (ASR_BATCH_SIZE > 1); иначе каждая запись распознается отдельно
+asr_batch_size = int(os.getenv("ASR_BATCH_SIZE", "1"))
+if asr_batch_size > 1 and not backend_supports_batching():
+    # Последовательный transcribe_batch в одном потоке диспетчера только сериализовал бы все сессии
+    print(f"⚠️ ASR_BATCH_SIZE={asr_batch_size} игнорируется: бэкенд {os.getenv('ASR_BACKEND')} не поддерживает батчинг")
+    asr_batch_size = 1
+
+# Потоковый режим: транскрипция фраз во время записи (можно переопределить сообщением "start")
+STREAMING_ENABLED = os.getenv("STREAMING_TRANSCRIPTION", "1").strip() == "1"
+
+# Ограниченная очередь транскрипции: число потоков Whisper, предел очереди и крайний срок задачи.
+# С батчингом потоки очереди только ждут результат батча, поэтому их не меньше размера батча.
+asr_workers = max(int(os.getenv("ASR_WORKERS", "1")), asr_batch_size)
+transcription_queue = TranscriptionQueue(
+    workers=asr_workers,
+    max_pending=int(os.getenv("ASR_MAX_PENDING", str(4 * asr_workers))),
+    deadline_s=float(os.getenv("ASR_DEADLINE_S", "120")),
+)
+
+# Признаки голоса: librosa — прежний набор вызовов librosa, fast — один STFT и YIN (features.py).
+# Пороги features_to_tags подобраны по значениям librosa (pitch_std у piptrack включает гармоники
+# и на порядки больше, чем у YIN), поэтому fast включается явно, пока пороги не пересчитаны.
+FEATURE_ENGINE = os.getenv("FEATURE_ENGINE", "librosa").strip().lower()
 
 # ==============================================================================
 # VOICE ANALYSIS LOGIC (from voice_analyser.py)
 # ==============================================================================
 
+DEFAULT_FEATURES = {
+    'avg_energy': 0.01, 'energy_std': 0.01, 'energy_stability': 1,
+    'avg_pitch': 100, 'pitch_std': 10, 'pitch_stability': 1,
+    'tempo': 120, 'speech_ratio': 0.5, 'spectral_brightness': 2000,
+    'brightness_stability': 1,
+}
+
+
 def extract_features(audio: np.ndarray, sr: int):
     """Извлечение акустических признаков из аудиоданных."""
-    features = {}
-    print("🔬 Начало извлечения акустических признаков...")
+    print(f"🔬 Начало извлечения акустических признаков ({FEATURE_ENGINE})...")
     try:
-        # Энергетические характеристики
-        energy = librosa.feature.rms(y=audio)[0]
-        features['avg_energy'] = np.mean(energy)
-        features['energy_std'] = np.std(energy)
-        features['energy_stability'] = 1 / (np.std(energy) + 0.001)
-
-        # Высота тона
-        pitches, magnitudes = librosa.piptrack(y=audio, sr=sr)
-        pitch_values = pitches[pitches > 0]
-        if len(pitch_values) > 0:
-            features['avg_pitch'] = np.mean(pitch_values)
-            features['pitch_std'] = np.std(pitch_values)
-            features['pitch_stability'] = 1 / (np.std(pitch_values) + 0.1)
+        if FEATURE_ENGINE == "librosa":
+            features = compute_features_librosa(audio, sr)
         else:
-            features['avg_pitch'] = 0
-            features['pitch_std'] = 0
-            features['pitch_stability'] = 0
-
-        # Темп и речевая активность
-        tempo, _ = librosa.beat.beat_track(y=audio, sr=sr)
-        features['tempo'] = tempo[0] if isinstance(tempo, np.ndarray) and tempo.size > 0 else tempo
-
-        silence_threshold = np.mean(energy) * 0.15
-        speech_frames = np.sum(energy > silence_threshold)
-        features['speech_ratio'] = speech_frames / len(energy) if len(energy) > 0 else 0.0
-
-        # Спектральные характеристики
-        spectral_centroids = librosa.feature.spectral_centroid(y=audio, sr=sr)[0]
-        features['spectral_brightness'] = np.mean(spectral_centroids)
-        features['brightness_stability'] = 1 / (np.std(spectral_centroids) + 0.1)
+            features = compute_features(audio, sr)
         
         print("👍 Признаки успешно извлечены.")
 
     except Exception as e:
         print(f"❌ Ошибка извлечения признаков: {e}")
         # Возвращаем базовые значения в случае ошибки
-        return {
-            'avg_energy': 0.01, 'energy_std': 0.01, 'energy_stability': 1,
-            'avg_pitch': 100, 'pitch_std': 10, 'pitch_stability': 1,
-            'tempo': 120, 'speech_ratio': 0.5, 'spectral_brightness': 2000,
-            'brightness_stability': 1,
-            'error': str(e)
-        }
+        return {**DEFAULT_FEATURES, 'error': str(e)}
     return features
 
 
+def finalize_streaming_features(accumulator: StreamingFeatures):
+    """Признаки из потоковых накопителей (с теми же базовыми значениями при ошибке)."""
+    try:
+        return accumulator.finalize()
+    except Exception as e:
+        print(f"❌ Ошибка расчета потоковых признаков: {e}")
+        return {**DEFAULT_FEATURES, 'error': str(e)}
+
+
 def features_to_tags(features: dict):
     """Преобразование признаков в теги софт-скиллов."""
     tags = []
@@ -165,12 +184,15 @@ def analyze_audio_sync(audio_np: np.ndarray, sr: int):
     
     start_time = time.time()
     features = extract_features(audio_np, sr)
+    return build_analysis(features, len(audio_np) / sr, (time.time() - start_time) * 1000)
+
+
+def build_analysis(features: dict, duration_s: float, processing_time_ms: float):
+    """Теги и оценки по признакам с метаданными обработки."""
     analysis_result = features_to_tags(features)
-    processing_time = (time.time() - start_time) * 1000
-    
     analysis_result['meta'] = {
-        'total_duration': round(len(audio_np) / sr, 2),
-        'processing_time_ms': round(processing_time, 1)
+        'total_duration': round(duration_s, 2),
+        'processing_time_ms': round(processing_time_ms, 1)
     }
     return analysis_result
 
@@ -184,11 +206,9 @@ def transcribe_audio_sync(audio_np: np.ndarray):
     try:
         print(f"🤖 Запускаем Whisper для транскрипции...")
         start_time = time.time()
-        result = model.transcribe(audio_np, language="ru")
+        transcribed_text = transcriber.transcribe(audio_np)
         processing_time = time.time() - start_time
-        print(f"🎯 Whisper завершил обработку за {processing_time:.2f}с")
-        
-        transcribed_text = result["text"].strip()
+        print(f"🎯 Whisper ({transcriber.name}) завершил обработку за {processing_time:.2f}с")
         
         if not transcribed_text:
             print("⚠️ Whisper вернул пустой текст")
@@ -199,36 +219,417 @@ def transcribe_audio_sync(audio_np: np.ndarray):
         print(f"❌ Ошибка Whisper/FFmpeg: {e}")
         return "Извините, возникли технические проблемы с распознаванием речи. Попробуйте записать ответ еще раз."
 
+# ==============================================================================
+# STREAMING TRANSCRIPTION
+# ==============================================================================
+
+def transcribe_segment_sync(audio_np: np.ndarray, prompt: str = None):
+    """Транскрипция одной фразы; предыдущий текст передается как контекст Whisper."""
+    try:
+        return transcriber.transcribe(audio_np, prompt)
+    except Exception as e:
+        print(f"❌ Ошибка Whisper при транскрипции фразы: {e}")
+        return ""
+
+
+class StreamingSession:
+    """Запись в потоковом режиме: декодирование, VAD и транскрипция фраз по ходу записи."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.loop = asyncio.get_event_loop()
+        self.decoder = get_decoder_pool().acquire()
+        self.segmenter = SpeechSegmenter(sample_rate=SAMPLE_RATE)
+        # Движок fast накапливает признаки по ходу записи (память не зависит от длины ответа);
+        # для librosa сэмплы сохраняются и признаки считаются по всей записи в finish()
+        self.features = StreamingFeatures(SAMPLE_RATE) if FEATURE_ENGINE == "fast" else None
+        self.audio_parts = []
+        self.features_task = None
+        self.features_error = None
+        self.features_ms = 0.0
+        self.samples = 0
+        self.texts = []
+        self.asr_ms = 0.0
+        self.segments_scheduled = 0
+        self.missed_segments = 0
+        self.last_task = None
+
+    async def feed(self, chunk: bytes):
+        # Запись в пайп ffmpeg блокирующая — выполняется вне цикла событий
+        await self.loop.run_in_executor(None, self.decoder.feed, chunk)
+        self._drain(self.decoder.read())
+
+    def _drain(self, samples: np.ndarray):
+        if samples.size == 0:
+            return
+        self.samples += len(samples)
+        if self.features is not None:
+            self.features_task = asyncio.ensure_future(self._update_features_after(self.features_task, samples))
+        else:
+            self.audio_parts.append(samples)
+        for segment in self.segmenter.feed(samples):
+            self._schedule(segment)
+
+    def _schedule(self, segment: np.ndarray):
+        # Фразы транскрибируются по очереди: каждая ждет предыдущую, чтобы сохранить порядок и контекст
+        self.segments_scheduled += 1
+        self.last_task = asyncio.ensure_future(self._transcribe_after(self.last_task, segment, self.segments_scheduled))
+
+    async def _transcribe_after(self, previous, segment: np.ndarray, index: int):
+        if previous is not None:
+            await previous
+        prompt = " ".join(self.texts)[-200:]
+        start_time = time.time()
+        try:
+            text = await transcription_queue.run(transcribe_segment_sync, segment, prompt)
+        except DeadlineExceeded as e:
+            print(f"⏰ Фраза #{index} пропущена: {e}")
+            self.missed_segments += 1
+            return
+        self.asr_ms += (time.time() - start_time) * 1000
+        print(f"🧩 Фраза #{index} ({len(segment) / SAMPLE_RATE:.1f}с) распознана за {time.time() - start_time:.2f}с")
+        if not text:
+            return
+        self.texts.append(text)
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            try:
+                await self.websocket.send_json({'type': 'partial_transcription', 'segment': index, 'text': text})
+            except Exception as e:
+                print(f"⚠️ Не удалось отправить промежуточную транскрипцию: {e}")
+
+    def _update_features(self, samples: np.ndarray):
+        # Ошибка не прерывает цепочку обновлений: в finish() признаки заменяются базовыми, как в extract_features
+        if self.features_error is not None:
+            return
+        start_time = time.time()
+        try:
+            self.features.update(samples)
+        except Exception as e:
+            print(f"❌ Ошибка потокового расчета признаков: {e}")
+            self.features_error = e
+        self.features_ms += (time.time() - start_time) * 1000
+
+    async def _update_features_after(self, previous, samples: np.ndarray):
+        # Обновления идут по порядку и вне цикла событий
+        if previous is not None:
+            await previous
+        await self.loop.run_in_executor(None, self._update_features, samples)
+
+    async def finish(self):
+        """Завершает запись: дожидается хвоста декодера, последней фразы и признаков голоса.
+
+        Returns:
+            (transcription, analysis) или (None, None), если поток не удалось декодировать.
+
+        Raises:
+            DeadlineExceeded: часть фраз не дождалась транскрипции — неполный текст не отдается.
+        """
+        start_time = time.time()
+        self._drain(await self.loop.run_in_executor(None, self.decoder.close))
+        last_segment = self.segmenter.flush()
+        if last_segment is not None:
+            self._schedule(last_segment)
+
+        if self.samples == 0:
+            return None, None
+        if self.features_task is not None:
+            await self.features_task
+        finalize_start = time.time()
+        if self.features is None:
+            features = await self.loop.run_in_executor(None, extract_features, np.concatenate(self.audio_parts), SAMPLE_RATE)
+        elif self.features_error is not None:
+            features = {**DEFAULT_FEATURES, 'error': str(self.features_error)}
+        else:
+            features = await self.loop.run_in_executor(None, finalize_streaming_features, self.features)
+        self.features_ms += (time.time() - finalize_start) * 1000
+        analysis = build_analysis(features, self.samples / SAMPLE_RATE, self.features_ms)
+        if self.last_task is not None:
+            await self.last_task
+        if self.missed_segments:
+            raise DeadlineExceeded(f"Не распознано фраз: {self.missed_segments} из {self.segments_scheduled}")
+        print(f"⚡ Хвост записи обработан за {time.time() - start_time:.2f}с после сигнала завершения ({self.segments_scheduled} фраз)")
+        analysis['meta']['asr'] = {'asr_ms': round(self.asr_ms, 1), 'segments': self.segments_scheduled}
+        transcription = " ".join(self.texts).strip() or "Не удалось распознать речь"
+        return transcription, analysis
+
+    def abort(self):
+        self.decoder.kill()
+        if self.last_task is not None:
+            self.last_task.cancel()
+        if self.features_task is not None:
+            self.features_task.cancel()
+
+
+def start_streaming_session(websocket: WebSocket):
+    """Создает потоковую сессию или возвращает None (тогда запись обрабатывается целиком после `end`)."""
+    try:
+        return StreamingSession(websocket)
+    except Exception as e:
+        print(f"⚠️ Потоковый режим недоступен ({e}), используем обработку после завершения записи")
+        return None
+
+# ==============================================================================
+# MODEL LIFECYCLE
+# ==============================================================================
+
+def warmup_audio(seconds: float = 2.0):
+    """Синтетический сигнал для прогрева: гармонический тон с шумом."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = 0.1 * np.sin(2 * np.pi * 180 * t) + 0.05 * np.sin(2 * np.pi * 360 * t)
+    noise = 0.005 * np.random.default_rng(0).standard_normal(len(t))
+    return (signal + noise).astype(np.float32)
+
+
+def load_models_sync():
+    """Загружает модели, запускает пул декодеров и прогревает их (один раз на процесс)."""
+    global asr, batching_engine, transcriber
+    with models_lock:
+        if service_state['ready']:
+            return
+        service_state['loading'] = True
+        service_state['error'] = None
+        timings = service_state['timings_ms']
+        cold_start = time.time()
+        try:
+            start_time = time.time()
+            asr = load_asr_backend()
+            if asr_batch_size > 1:
+                batching_engine = BatchingEngine(asr, batch_size=asr_batch_size, max_wait_ms=int(os.getenv("ASR_BATCH_WAIT_MS", "50")))
+            transcriber = batching_engine or asr
+            timings['model_load'] = round((time.time() - start_time) * 1000, 1)
+
+            # Заранее запущенные процессы ffmpeg для декодирования записей
+            start_time = time.time()
+            get_decoder_pool()
+            timings['decoder_pool'] = round((time.time() - start_time) * 1000, 1)
+
+            # Первый вызов инициализирует ядра (PyTorch/CTranslate2, numba в librosa)
+            audio = warmup_audio()
+            start_time = time.time()
+            transcriber.transcribe(audio)
+            timings['asr_warmup'] = round((time.time() - start_time) * 1000, 1)
+            start_time = time.time()
+            extract_features(audio, SAMPLE_RATE)
+            if FEATURE_ENGINE == "fast":
+                accumulator = StreamingFeatures(SAMPLE_RATE)
+                accumulator.update(audio)
+                accumulator.finalize()
+            timings['features_warmup'] = round((time.time() - start_time) * 1000, 1)
+
+            timings['cold_start_total'] = round((time.time() - cold_start) * 1000, 1)
+            service_state['ready'] = True
+            print(f"🔥 Модели загружены и прогреты ({MODEL_LOADING}): {timings}")
+        except Exception as e:
+            service_state['error'] = str(e)
+            print(f"❌ Ошибка загрузки моделей: {e}")
+            raise
+        finally:
+            service_state['loading'] = False
+
+
+async def ensure_models_loaded():
+    """Дожидается загрузки моделей (в режиме lazy — запускает ее)."""
+    if not service_state['ready']:
+        await asyncio.get_event_loop().run_in_executor(None, load_models_sync)
+
+
+@app.on_event("startup")
+async def startup_event():
+    if MODEL_LOADING == "eager":
+        # В фоне: /healthz отвечает сразу, /readyz — после прогрева
+        asyncio.get_event_loop().run_in_executor(None, load_models_sync)
+    else:
+        print("💤 Ленивая загрузка моделей: модели будут загружены при первом подключении")
+
+
+@app.get("/healthz")
+async def healthz():
+    """Процесс жив (не зависит от загрузки моделей)."""
+    return {'status': 'ok'}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Готовность принимать трафик: 200 после загрузки и прогрева моделей (в режиме lazy — сразу)."""
+    body = {
+        'mode': MODEL_LOADING,
+        'models_loaded': service_state['ready'],
+        'timings_ms': service_state['timings_ms'],
+    }
+    if service_state['ready'] or (MODEL_LOADING != "eager" and not service_state['error']):
+        return {'status': 'ready', **body}
+    status = 'error' if service_state['error'] else 'loading'
+    return JSONResponse(status_code=503, content={'status': status, 'error': service_state['error'], **body})
+
 # ==============================================================================
 # WEBSOCKET LOGIC
 # ==============================================================================
 
+async def process_buffered_audio(audio_bytes: bytes):
+    """Обработка записи целиком: декодирование в памяти, затем транскрипция и анализ параллельно."""
+    loop = asyncio.get_event_loop()
+
+    print("🔄 Декодирование аудио в numpy array (ffmpeg, в памяти)...")
+    audio_np, decode_stats = await loop.run_in_executor(None, decode_audio_bytes, audio_bytes)
+    print(f"✅ Аудио декодировано за {decode_stats['decode_ms'] / 1000:.2f}с "
+          f"({decode_stats['decode_ms_per_audio_s']} мс на секунду аудио). Сэмплов: {len(audio_np)}, Частота: {SAMPLE_RATE}Hz")
+
+    # Параллельный запуск транскрипции и анализа в отдельных потоках
+    print("🚀 Запускаем транскрипцию и анализ параллельно...")
+    asr_start = time.time()
+
+    async def transcribe_task():
+        result = await transcription_queue.run(transcribe_audio_sync, audio_np)
+        return result, (time.time() - asr_start) * 1000
+
+    analyze_task = loop.run_in_executor(None, analyze_audio_sync, audio_np, SAMPLE_RATE)
+
+    # Ожидаем результаты
+    (transcription_result, asr_ms), analysis_result = await asyncio.gather(transcribe_task(), analyze_task)
+    analysis_result.setdefault('meta', {})['decode'] = decode_stats
+    analysis_result['meta']['asr'] = {'asr_ms': round(asr_ms, 1), 'segments': 1}
+    return transcription_result, analysis_result
+
+
+async def finish_recording(session, audio_bytes: bytes):
+    """Результат записи: из потоковой сессии или, если она недоступна, обработкой целиком.
+
+    Returns:
+        (transcription, analysis) или None, если транскрипция не уложилась в крайний срок.
+    """
+    try:
+        if session is not None:
+            try:
+                transcription, analysis = await session.finish()
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"⚠️ Ошибка потоковой обработки ({e}), запись будет обработана целиком")
+                session.abort()
+                transcription = None
+            if transcription is not None:
+                return transcription, analysis
+        return await process_buffered_audio(audio_bytes)
+    except DeadlineExceeded as e:
+        print(f"⏰ Запись не обработана: {e}")
+        return None
+
+
+async def send_busy(websocket: WebSocket, reason: str):
+    """Сообщает клиенту о перегрузке; запись отбрасывается, ответ нужно записать заново."""
+    wait_s = transcription_queue.estimated_wait()
+    print(f"🚦 Очередь транскрипции переполнена ({reason}), ожидание ~{wait_s}с: {transcription_queue.metrics()}")
+    if websocket.application_state == WebSocketState.CONNECTED:
+        await websocket.send_json({
+            'type': 'busy',
+            'reason': reason,
+            'estimated_wait_s': wait_s,
+            'message': f'Сервис распознавания перегружен, запишите ответ еще раз через {wait_s:.0f} с.',
+        })
+
+
+@app.get("/metrics")
+async def metrics():
+    """Метрики очереди транскрипции и батчинга."""
+    result = {'transcription_queue': transcription_queue.metrics()}
+    if batching_engine is not None:
+        result['batching'] = batching_engine.metrics()
+    return result
+
+
 @app.websocket("/ws/voice")
 async def websocket_voice(websocket: WebSocket):
+    """
+    Протокол:
+    - бинарный кадр (см. protocol.py): заголовок с номером чанка + фрагмент WebM/Opus;
+    - {"type": "audio_chunk", "data": <base64>} — то же в JSON (режим совместимости);
+    - {"type": "start", "streaming": true|false} — необязательно, режим следующей записи
+      (по умолчанию STREAMING_TRANSCRIPTION);
+    - {"type": "end"} — конец записи.
+    Если очередь транскрипции переполнена, на `end` приходит {"type": "busy",
+    "estimated_wait_s": ...}: запись отбрасывается, и ответ нужно записать заново.
+    В потоковом режиме сервер присылает {"type": "partial_transcription"} по мере
+    распознавания фраз; в обоих режимах запись завершается {"type": "final_result"}.
+    """
     print("🔗 Новое WebSocket подключение")
     await websocket.accept()
     print("✅ WebSocket соединение принято")
+
+    try:
+        await ensure_models_loaded()
+    except Exception as e:
+        await websocket.send_json({'type': 'error', 'message': f'Модели распознавания недоступны: {e}'})
+        await websocket.close()
+        return
     
     audio_buffer = io.BytesIO()
     chunks_received = 0
+    expected_seq = 0
+    seq_gaps = 0
+    recording_started = None
+    streaming = STREAMING_ENABLED
+    session = None
     
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            frame = await websocket.receive()
+            if frame['type'] == 'websocket.disconnect':
+                raise WebSocketDisconnect(frame.get('code', 1000))
+
+            chunk_bytes = None
+            message = None
+            if frame.get('bytes') is not None:
+                try:
+                    seq, chunk_bytes = unpack_audio_frame(frame['bytes'])
+                except FrameError as e:
+                    print(f"⚠️ Пропущен некорректный бинарный кадр: {e}")
+                    continue
+                if seq != expected_seq:
+                    seq_gaps += 1
+                    print(f"⚠️ Нарушен порядок чанков: ожидался #{expected_seq}, получен #{seq}")
+                expected_seq = seq + 1
+            else:
+                message = json.loads(frame['text'])
+                if message['type'] == 'audio_chunk':
+                    chunk_bytes = base64.b64decode(message['data'])
             
-            if message['type'] == 'audio_chunk':
-                chunk_b64 = message['data']
-                chunk_bytes = base64.b64decode(chunk_b64)
+            if chunk_bytes is not None:
                 audio_buffer.write(chunk_bytes)
                 chunks_received += 1
+
+                if chunks_received == 1:
+                    recording_started = time.time()
+                    # При перегрузке фразы не транскрибируются по ходу записи: решение принимается на `end`
+                    if streaming and not transcription_queue.saturated():
+                        session = start_streaming_session(websocket)
+                if session is not None:
+                    try:
+                        await session.feed(chunk_bytes)
+                    except Exception as e:
+                        print(f"⚠️ Ошибка потокового декодирования ({e}), запись будет обработана целиком")
+                        session.abort()
+                        session = None
                 
                 if chunks_received % 20 == 0:
                     print(f"🎵 Получено {chunks_received} чанков, общий размер: {audio_buffer.tell()} байт")
 
+            elif message['type'] == 'start':
+                if session is not None:
+                    session.abort()
+                    session = None
+                audio_buffer = io.BytesIO()
+                chunks_received = 0
+                expected_seq = 0
+                seq_gaps = 0
+                recording_started = None
+                streaming = bool(message.get('streaming', STREAMING_ENABLED))
+                print(f"🎬 Начало записи, потоковый режим: {streaming}")
+
             elif message['type'] == 'end':
                 print("🏁 Получен сигнал завершения записи.")
-                print(f"📈 Всего получено чанков: {chunks_received}")
+                print(f"📈 Всего получено чанков: {chunks_received}, пропусков в нумерации: {seq_gaps}")
+                if recording_started is not None and time.time() > recording_started:
+                    print(f"📶 Поток записи: {audio_buffer.tell() / 1024 / (time.time() - recording_started):.1f} КБ/с")
                 
                 audio_bytes = audio_buffer.getvalue()
                 
@@ -238,37 +639,23 @@ async def websocket_voice(websocket: WebSocket):
                         await websocket.send_json({'type': 'error', 'message': 'Аудиозапись пуста.'})
                     continue # Ждем следующую запись
 
-                print(f"🎧 Начинаем обработку аудио размером {len(audio_bytes)} байт")
-                loop = asyncio.get_event_loop()
-                
-                # Создаем временный файл для декодирования
-                temp_audio_file = tempfile.NamedTemporaryFile(suffix=".webm", delete=False)
-                temp_file_path = temp_audio_file.name
-                
-                try:
-                    temp_audio_file.write(audio_bytes)
-                    temp_audio_file.close()
-                    print(f"💾 Аудио данные записаны во временный файл: {temp_file_path}")
-
-                    # Декодируем аудио в numpy array с помощью librosa
-                    # Это CPU-bound операция, но librosa.load быстрая для небольших файлов
-                    print("🔄 Декодирование аудио файла в numpy array...")
-                    start_decode = time.time()
-                    audio_np, sr = librosa.load(temp_file_path, sr=16000, mono=True)
-                    print(f"✅ Аудио декодировано за {time.time() - start_decode:.2f}с. Сэмплов: {len(audio_np)}, Частота: {sr}Hz")
-
-                    # Параллельный запуск транскрипции и анализа в отдельных потоках
-                    print("🚀 Запускаем транскрипцию и анализ параллельно...")
-                    transcribe_task = loop.run_in_executor(None, transcribe_audio_sync, audio_np)
-                    analyze_task = loop.run_in_executor(None, analyze_audio_sync, audio_np, sr)
-                    
-                    # Ожидаем результаты
-                    transcription_result = await transcribe_task
-                    analysis_result = await analyze_task
-                    
+                if session is None and transcription_queue.saturated():
+                    transcription_queue.reject()
+                    result = None
+                    busy_reason = 'queue_full'
+                else:
+                    print(f"🎧 Начинаем обработку аудио размером {len(audio_bytes)} байт")
+                    result = await finish_recording(session, audio_bytes)
+                    session = None
+                    busy_reason = 'deadline_exceeded'
+
+                if result is None:
+                    await send_busy(websocket, busy_reason)
+                else:
+                    transcription_result, analysis_result = result
                     print(f"📝 Результат транскрипции: '{transcription_result}'")
                     print(f"📊 Результат анализа: {analysis_result['tags']}")
-                    
+
                     if websocket.application_state == WebSocketState.CONNECTED:
                         response = {
                             'type': 'final_result',
@@ -281,15 +668,13 @@ async def websocket_voice(websocket: WebSocket):
                     else:
                         print("❌ WebSocket не подключен, не можем отправить результат")
 
-                finally:
-                    # Удаляем временный файл
-                    if os.path.exists(temp_file_path):
-                        os.unlink(temp_file_path)
-                        print(f"🗑️ Временный файл удален: {temp_file_path}")
-
-                # Сброс для следующей записи
+                # Сброс для следующей записи (и после busy: клиент не повторяет `end`, а записывает ответ заново)
                 audio_buffer = io.BytesIO()
                 chunks_received = 0
+                expected_seq = 0
+                seq_gaps = 0
+                recording_started = None
+                streaming = STREAMING_ENABLED
                 print("\n🔄 Буфер сброшен, готов к новой записи.")
 
     except WebSocketDisconnect:
@@ -298,6 +683,8 @@ async def websocket_voice(websocket: WebSocket):
         print(f"❌ Критическая ошибка в WebSocket: {e}")
         traceback.print_exc()
     finally:
+        if session is not None:
+            session.abort()
         # Убедимся, что буфер закрыт
         if not audio_buffer.closed:
             audio_buffer.close()